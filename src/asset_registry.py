@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Per-snapshot view over Hyperliquid `metaAndAssetCtxs`.
+
+Built once per ctxs refresh: coin -> asset index, per-asset metadata from the
+universe (szDecimals, maxLeverage, ...) and float64 NumPy columns over the
+asset contexts (NaN where a value is missing), so per-coin lookups are O(1)
+and cross-asset computations can work on whole columns.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+# Context fields exposed as columns
+CTX_COLUMNS = ("funding", "premium", "openInterest", "markPx", "oraclePx", "dayNtlVlm")
+
+# Columns computed from CTX_COLUMNS on first use
+DERIVED_COLUMNS = ("oiUsd", "absFunding", "absPremium")
+
+
+def _to_float(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+class AssetRegistry:
+    def __init__(self, universe_obj: Dict[str, Any], ctxs: List[Dict[str, Any]]) -> None:
+        universe = universe_obj.get("universe", []) if isinstance(universe_obj, dict) else []
+        self.universe: List[Dict[str, Any]] = [a if isinstance(a, dict) else {} for a in universe]
+        self.ctxs: List[Dict[str, Any]] = [c if isinstance(c, dict) else {} for c in (ctxs or [])]
+        self.names: List[str] = [str(a.get("name") or "") for a in self.universe]
+        self.name_to_idx: Dict[str, int] = {n: i for i, n in enumerate(self.names) if n}
+        n = len(self.names)
+        self.sz_decimals = np.array([_to_float(a.get("szDecimals")) for a in self.universe], dtype=np.float64)
+        self.max_leverage = np.array([_to_float(a.get("maxLeverage")) for a in self.universe], dtype=np.float64)
+        self.delisted = np.array([bool(a.get("isDelisted")) for a in self.universe], dtype=bool)
+        # ctxs is positionally aligned with the universe; pad/truncate defensively
+        rows = self.ctxs[:n] + [{}] * max(0, n - len(self.ctxs))
+        self.columns: Dict[str, np.ndarray] = {
+            name: np.array([_to_float(c.get(name)) for c in rows], dtype=np.float64) for name in CTX_COLUMNS
+        }
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, coin: str) -> bool:
+        return coin in self.name_to_idx
+
+    def index(self, coin: str) -> Optional[int]:
+        return self.name_to_idx.get(coin)
+
+    def ctx(self, coin: str) -> Dict[str, Any]:
+        """Raw asset context dict for coin ({} if unknown)."""
+        idx = self.name_to_idx.get(coin)
+        if idx is None or idx >= len(self.ctxs):
+            return {}
+        return self.ctxs[idx]
+
+    def metadata(self, coin: str) -> Dict[str, Any]:
+        """Universe entry for coin (name, szDecimals, maxLeverage, ...)."""
+        idx = self.name_to_idx.get(coin)
+        return self.universe[idx] if idx is not None else {}
+
+    def column(self, name: str) -> np.ndarray:
+        col = self.columns.get(name)
+        if col is None and name in DERIVED_COLUMNS:
+            if name == "oiUsd":
+                col = self.columns["openInterest"] * self.columns["markPx"]
+            else:
+                col = np.abs(self.columns["funding" if name == "absFunding" else "premium"])
+            self.columns[name] = col
+        if col is None:
+            raise KeyError(name)
+        return col
+
+    def screen(
+        self,
+        sort_by: str,
+        top: int = 10,
+        ascending: bool = False,
+        ranges: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+        mask: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """Indices of the top assets by column `sort_by` among rows passing every (lo, hi) range and `mask`.
+
+        Missing values (NaN) fail any range on their column and are never ranked.
+        """
+        key = self.column(sort_by)
+        keep = ~np.isnan(key)
+        if mask is not None:
+            keep &= mask
+        for name, (lo, hi) in (ranges or {}).items():
+            col = self.column(name)
+            # NaN compares False, so missing values drop out here
+            if lo is not None:
+                keep &= col >= lo
+            if hi is not None:
+                keep &= col <= hi
+        rows = np.flatnonzero(keep)
+        if rows.size == 0:
+            return rows
+        vals = key[rows] if ascending else -key[rows]
+        k = min(max(int(top), 1), rows.size)
+        if k < rows.size:
+            part = np.argpartition(vals, k - 1)[:k]
+            rows, vals = rows[part], vals[part]
+        return rows[np.argsort(vals, kind="stable")]
+
+    def value(self, coin: str, name: str) -> Optional[float]:
+        idx = self.name_to_idx.get(coin)
+        if idx is None:
+            return None
+        v = self.column(name)[idx]
+        return None if np.isnan(v) else float(v)
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Parallel, resumable corpus embedding for large datasets.
+
+Chunks are split into fixed-size blocks that worker processes embed
+independently. Each finished block is written atomically to
+
+    <index_dir>/embed_blocks/block_000000.npy
+
+and a block file on disk is its checkpoint: re-running the same command after
+a crash only embeds the missing blocks. Once every block exists they are
+streamed into the files `rag_query.build_or_load_index` loads
+(index.faiss + mapping.json with FAISS, embeddings.npy always).
+
+Usage:
+  python3 build_embeddings.py \
+    --dataset runs/current/chunks.jsonl \
+    --index-dir ./rag_index \
+    [--workers 4] [--block-size 4096] [--devices cuda:0,cuda:1] [--backend onnx]
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import shutil
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from chunk_store import ChunkStore, open_chunk_store
+from onnx_embedder import BACKENDS, load_embedder
+from rag_query import FAISS_AVAILABLE, faiss
+
+
+_WORKER: Dict[str, Any] = {}
+
+
+def _block_path(block_dir: str, block_id: int) -> str:
+    return os.path.join(block_dir, f'block_{block_id:06d}.npy')
+
+
+def _init_worker(model_id: str, backend: str, store_dir: str, devices: Any, threads: int) -> None:
+    device = None
+    if devices is not None:
+        try:
+            device = devices.get_nowait()
+        except Exception:
+            device = None
+    if threads > 0:
+        try:
+            import torch
+            torch.set_num_threads(threads)
+        except Exception:
+            pass
+    _WORKER['embedder'] = load_embedder(model_id, backend=backend, device=device)
+    _WORKER['chunks'] = ChunkStore(store_dir)
+
+
+def _embed_block(task: Tuple[int, int, int, str, int]) -> Tuple[int, int]:
+    block_id, lo, hi, out_path, batch_size = task
+    chunks: ChunkStore = _WORKER['chunks']
+    texts = [chunks.text(i) for i in range(lo, hi)]
+    embs = _WORKER['embedder'].encode(texts, batch_size=batch_size, convert_to_numpy=True, normalize_embeddings=True)
+    tmp = out_path + '.tmp.npy'
+    np.save(tmp, np.asarray(embs, dtype=np.float32))
+    os.replace(tmp, out_path)
+    return block_id, hi - lo
+
+
+def _check_manifest(block_dir: str, manifest: Dict[str, Any], restart: bool) -> None:
+    path = os.path.join(block_dir, 'manifest.json')
+    if restart and os.path.isdir(block_dir):
+        shutil.rmtree(block_dir)
+    os.makedirs(block_dir, exist_ok=True)
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            existing = json.load(f)
+        if existing != manifest:
+            raise SystemExit(
+                f'{block_dir} holds blocks from a different build ({existing}); '
+                're-run with --restart to discard them'
+            )
+        return
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+
+
+def embed_blocks(
+    store: ChunkStore,
+    block_dir: str,
+    model_id: str,
+    backend: str,
+    block_size: int,
+    batch_size: int,
+    workers: int,
+    devices: Optional[List[str]],
+) -> int:
+    n = len(store)
+    n_blocks = (n + block_size - 1) // block_size
+    tasks = []
+    for b in range(n_blocks):
+        out_path = _block_path(block_dir, b)
+        if os.path.exists(out_path):
+            continue
+        tasks.append((b, b * block_size, min(n, (b + 1) * block_size), out_path, batch_size))
+    done = n_blocks - len(tasks)
+    if done:
+        print(f'Resuming: {done}/{n_blocks} blocks already embedded')
+    if not tasks:
+        return n_blocks
+
+    if workers <= 1:
+        _init_worker(model_id, backend, store.store_dir, None, 0)
+        for t in tasks:
+            _embed_block(t)
+            done += 1
+            print(f'Embedded block {done}/{n_blocks}')
+        return n_blocks
+
+    # Spawn (not fork) so torch/tokenizers thread pools start clean in each worker
+    ctx = mp.get_context('spawn')
+    device_q = None
+    if devices:
+        device_q = ctx.Queue()
+        for i in range(workers):
+            device_q.put(devices[i % len(devices)])
+    threads = max(1, (os.cpu_count() or 1) // workers) if not devices else 0
+    with ctx.Pool(
+        processes=workers,
+        initializer=_init_worker,
+        initargs=(model_id, backend, store.store_dir, device_q, threads),
+    ) as pool:
+        for _ in pool.imap_unordered(_embed_block, tasks):
+            done += 1
+            print(f'Embedded block {done}/{n_blocks}')
+    return n_blocks
+
+
+def merge_blocks(block_dir: str, n_blocks: int, count: int, index_dir: str) -> None:
+    """Stream blocks into embeddings.npy (and index.faiss when FAISS is available)."""
+    dim = int(np.load(_block_path(block_dir, 0), mmap_mode='r').shape[1])
+    emb_path = os.path.join(index_dir, 'embeddings.npy')
+    tmp_path = emb_path + '.tmp'
+    out = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.float32, shape=(count, dim))
+    index = faiss.IndexFlatIP(dim) if FAISS_AVAILABLE else None
+    row = 0
+    for b in range(n_blocks):
+        block = np.load(_block_path(block_dir, b))
+        out[row:row + block.shape[0]] = block
+        if index is not None:
+            index.add(np.ascontiguousarray(block, dtype=np.float32))
+        row += block.shape[0]
+    if row != count:
+        raise SystemExit(f'Merged {row} rows but the dataset has {count} chunks')
+    out.flush()
+    del out
+    os.replace(tmp_path, emb_path)
+    if index is not None:
+        faiss.write_index(index, os.path.join(index_dir, 'index.faiss'))
+        with open(os.path.join(index_dir, 'mapping.json'), 'w', encoding='utf-8') as f:
+            json.dump({'dim': dim, 'count': count}, f)
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description='Parallel, resumable embedding build for the RAG index')
+    p.add_argument('--dataset', required=True, help='Path to chunks.jsonl')
+    p.add_argument('--index-dir', default='./rag_index', help='Index directory (same as rag_query/server)')
+    p.add_argument('--model', default='sentence-transformers/all-MiniLM-L6-v2', help='SentenceTransformer model id')
+    p.add_argument('--backend', choices=BACKENDS, default=os.getenv('RAG_EMBEDDER_BACKEND', 'torch'), help='Embedder backend')
+    p.add_argument('--workers', type=int, default=1, help='Worker processes')
+    p.add_argument('--devices', default=None, help='Comma-separated devices assigned round-robin to workers (e.g. cuda:0,cuda:1)')
+    p.add_argument('--block-size', type=int, default=4096, help='Chunks per checkpointed block')
+    p.add_argument('--batch-size', type=int, default=64, help='Encode batch size')
+    p.add_argument('--restart', action='store_true', help='Discard existing blocks and start over')
+    p.add_argument('--keep-blocks', action='store_true', help='Keep block files after merging')
+    return p.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    store = open_chunk_store(args.dataset, args.index_dir)
+    if not len(store):
+        raise SystemExit('Dataset has no chunks')
+    block_dir = os.path.join(args.index_dir, 'embed_blocks')
+    manifest = {
+        'model': args.model,
+        'backend': args.backend,
+        'count': len(store),
+        'block_size': args.block_size,
+        'source': store.manifest.get('source'),
+        'size': store.manifest.get('size'),
+        'mtime_ns': store.manifest.get('mtime_ns'),
+    }
+    _check_manifest(block_dir, manifest, args.restart)
+    devices = [d.strip() for d in args.devices.split(',') if d.strip()] if args.devices else None
+    n_blocks = embed_blocks(
+        store,
+        block_dir,
+        model_id=args.model,
+        backend=args.backend,
+        block_size=args.block_size,
+        batch_size=args.batch_size,
+        workers=args.workers,
+        devices=devices,
+    )
+    merge_blocks(block_dir, n_blocks, len(store), args.index_dir)
+    if not args.keep_blocks:
+        shutil.rmtree(block_dir)
+    print(f'Wrote index for {len(store)} chunks to {args.index_dir}', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
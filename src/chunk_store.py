@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Compact on-disk chunk store built from chunks.jsonl.
+
+Layout of <index_dir>/chunk_store/:
+
+    manifest.json              source path/size/mtime, row count
+    text.bin / text.off.npy    UTF-8 blob + int64 offsets [N + 1]
+    id.bin / id.off.npy        chunk ids, same encoding
+    extra.bin / extra.off.npy  JSON of any non-standard keys ("" when none)
+    title.npy, source_url.npy, doc_path.npy
+                               int32 codes into strings.json (dictionary-encoded;
+                               these repeat for every chunk of a document)
+    chunk_index.npy            int64
+    present.npy                uint8 bitmask of which standard keys a row had
+
+Opening the store only memory-maps these files, so startup cost and resident
+memory do not grow with the corpus; a row is decoded into a dict only when it
+is accessed (e.g. the top-k hits of a retrieval).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+from typing import Any, Dict, Iterator, List, Sequence, Union
+
+import numpy as np
+
+
+# Standard chunk keys, in the order build_from_markdown_dir writes them
+COLUMNS = ("id", "source_url", "title", "chunk_index", "text", "doc_path")
+_BLOB_COLUMNS = ("id", "text")
+_DICT_COLUMNS = ("source_url", "title", "doc_path")
+_BIT = {name: 1 << i for i, name in enumerate(COLUMNS)}
+
+
+class _BlobWriter:
+    def __init__(self, path: str) -> None:
+        self.f = open(path, "wb")
+        self.offsets: List[int] = [0]
+
+    def add(self, value: str) -> None:
+        data = value.encode("utf-8")
+        self.f.write(data)
+        self.offsets.append(self.offsets[-1] + len(data))
+
+    def close(self, offsets_path: str) -> None:
+        self.f.close()
+        np.save(offsets_path, np.asarray(self.offsets, dtype=np.int64))
+
+
+class _Blob:
+    def __init__(self, path: str, offsets_path: str) -> None:
+        self.offsets = np.load(offsets_path, mmap_mode="r")
+        # np.memmap refuses zero-length files
+        self.data = np.memmap(path, dtype=np.uint8, mode="r") if os.path.getsize(path) else np.empty(0, dtype=np.uint8)
+
+    def get(self, i: int) -> str:
+        lo, hi = int(self.offsets[i]), int(self.offsets[i + 1])
+        return self.data[lo:hi].tobytes().decode("utf-8")
+
+
+def _source_fingerprint(jsonl_path: str) -> Dict[str, Any]:
+    st = os.stat(jsonl_path)
+    return {"source": os.path.abspath(jsonl_path), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def build_chunk_store(jsonl_path: str, store_dir: str) -> None:
+    """Stream chunks.jsonl into the columnar layout (never holds all chunks in memory)."""
+    tmp_dir = store_dir + ".tmp"
+    if os.path.isdir(tmp_dir):
+        shutil.rmtree(tmp_dir)
+    os.makedirs(tmp_dir)
+    blobs = {name: _BlobWriter(os.path.join(tmp_dir, f"{name}.bin")) for name in _BLOB_COLUMNS + ("extra",)}
+    dicts: Dict[str, Dict[str, int]] = {name: {} for name in _DICT_COLUMNS}
+    codes: Dict[str, List[int]] = {name: [] for name in _DICT_COLUMNS}
+    chunk_index: List[int] = []
+    present: List[int] = []
+    with open(jsonl_path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            rec = json.loads(line)
+            mask = 0
+            for name in _BLOB_COLUMNS:
+                value = rec.pop(name, None)
+                if isinstance(value, str):
+                    mask |= _BIT[name]
+                    blobs[name].add(value)
+                else:
+                    blobs[name].add("")
+                    if value is not None:
+                        rec[name] = value
+            for name in _DICT_COLUMNS:
+                value = rec.pop(name, None)
+                if isinstance(value, str):
+                    mask |= _BIT[name]
+                    codes[name].append(dicts[name].setdefault(value, len(dicts[name])))
+                else:
+                    codes[name].append(-1)
+                    if value is not None:
+                        rec[name] = value
+            ci = rec.pop("chunk_index", None)
+            if isinstance(ci, int) and not isinstance(ci, bool):
+                mask |= _BIT["chunk_index"]
+                chunk_index.append(ci)
+            else:
+                chunk_index.append(-1)
+                if ci is not None:
+                    rec["chunk_index"] = ci
+            blobs["extra"].add(json.dumps(rec, ensure_ascii=False) if rec else "")
+            present.append(mask)
+    for name, writer in blobs.items():
+        writer.close(os.path.join(tmp_dir, f"{name}.off.npy"))
+    for name in _DICT_COLUMNS:
+        np.save(os.path.join(tmp_dir, f"{name}.npy"), np.asarray(codes[name], dtype=np.int32))
+    np.save(os.path.join(tmp_dir, "chunk_index.npy"), np.asarray(chunk_index, dtype=np.int64))
+    np.save(os.path.join(tmp_dir, "present.npy"), np.asarray(present, dtype=np.uint8))
+    strings = {name: [""] * len(d) for name, d in dicts.items()}
+    for name, d in dicts.items():
+        for value, code in d.items():
+            strings[name][code] = value
+    with open(os.path.join(tmp_dir, "strings.json"), "w", encoding="utf-8") as f:
+        json.dump(strings, f, ensure_ascii=False)
+    manifest = dict(_source_fingerprint(jsonl_path), count=len(present))
+    with open(os.path.join(tmp_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    if os.path.isdir(store_dir):
+        shutil.rmtree(store_dir)
+    os.replace(tmp_dir, store_dir)
+
+
+class ChunkStore(Sequence):
+    """Read-only, memory-mapped sequence of chunk dicts (drop-in for load_chunks' list)."""
+
+    def __init__(self, store_dir: str) -> None:
+        self.store_dir = store_dir
+        with open(os.path.join(store_dir, "manifest.json"), "r", encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        with open(os.path.join(store_dir, "strings.json"), "r", encoding="utf-8") as f:
+            self.strings: Dict[str, List[str]] = json.load(f)
+        self.blobs = {
+            name: _Blob(os.path.join(store_dir, f"{name}.bin"), os.path.join(store_dir, f"{name}.off.npy"))
+            for name in _BLOB_COLUMNS + ("extra",)
+        }
+        self.codes = {name: np.load(os.path.join(store_dir, f"{name}.npy"), mmap_mode="r") for name in _DICT_COLUMNS}
+        self.chunk_index = np.load(os.path.join(store_dir, "chunk_index.npy"), mmap_mode="r")
+        self.present = np.load(os.path.join(store_dir, "present.npy"), mmap_mode="r")
+        self._count = int(self.manifest.get("count", self.present.shape[0]))
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, i: Union[int, slice]) -> Any:
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self._count))]
+        i = int(i)
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError("chunk index out of range")
+        out = self.metadata(i)
+        if self.present[i] & _BIT["text"]:
+            # Re-insert text at its original position among the standard keys
+            ordered: Dict[str, Any] = {}
+            for name in COLUMNS:
+                if name == "text":
+                    ordered["text"] = self.blobs["text"].get(i)
+                elif name in out:
+                    ordered[name] = out.pop(name)
+            ordered.update(out)
+            return ordered
+        return out
+
+    def __iter__(self) -> Iterator[dict]:
+        for i in range(self._count):
+            yield self[i]
+
+    def text(self, i: int) -> str:
+        return self.blobs["text"].get(int(i))
+
+    def metadata(self, i: int) -> Dict[str, Any]:
+        """Row without its text (cheap; no text blob access)."""
+        i = int(i)
+        mask = int(self.present[i])
+        out: Dict[str, Any] = {}
+        for name in COLUMNS:
+            if not mask & _BIT[name] or name == "text":
+                continue
+            if name in _DICT_COLUMNS:
+                out[name] = self.strings[name][int(self.codes[name][i])]
+            elif name == "chunk_index":
+                out[name] = int(self.chunk_index[i])
+            else:
+                out[name] = self.blobs[name].get(i)
+        extra = self.blobs["extra"].get(i)
+        if extra:
+            out.update(json.loads(extra))
+        return out
+
+
+def corpus_fingerprint(chunks: Sequence[Any]) -> Dict[str, Any]:
+    """Identity of a chunk corpus for derived indexes (BM25, identifiers, collection shards).
+
+    A ChunkStore contributes its source path/size/mtime; anything else (an in-memory list from
+    load_chunks) is hashed row by row, so same-length edits are still detected.
+    """
+    fp: Dict[str, Any] = {"count": len(chunks)}
+    manifest = getattr(chunks, "manifest", None)
+    if isinstance(manifest, dict):
+        fp.update({k: manifest.get(k) for k in ("source", "size", "mtime_ns")})
+        return fp
+    h = hashlib.blake2b(digest_size=16)
+    for chunk in chunks:
+        h.update(json.dumps(chunk, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8"))
+        h.update(b"\n")
+    fp["sha"] = h.hexdigest()
+    return fp
+
+
+def open_chunk_store(jsonl_path: str, index_dir: str) -> ChunkStore:
+    """Open `index_dir/chunk_store`, (re)building it if missing or older than `jsonl_path`."""
+    store_dir = os.path.join(index_dir, "chunk_store")
+    manifest_path = os.path.join(store_dir, "manifest.json")
+    fresh = False
+    if os.path.exists(manifest_path):
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            fp = _source_fingerprint(jsonl_path)
+            fresh = all(manifest.get(k) == v for k, v in fp.items())
+        except Exception:
+            fresh = False
+    if not fresh:
+        os.makedirs(index_dir, exist_ok=True)
+        build_chunk_store(jsonl_path, store_dir)
+    return ChunkStore(store_dir)
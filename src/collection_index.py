@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Named collections over the chunk corpus, each searchable as its own shard.
+
+A chunk's collection is its `source_url` host by default (one per scraped
+GitBook site), the parent directory of `doc_path` for local files, or any
+chunk field with RAG_COLLECTION_KEY=field:<name>. Layout:
+
+    <index_dir>/collections/manifest.json   key, names, chunk count, corpus fingerprint
+    <index_dir>/collections/codes.npy       int32 [N] collection code per chunk row
+
+A shard is a view of the global dense index restricted to its rows (an ID
+selector for FAISS, a row gather for NumpyIndex); no vectors are copied, so
+sharding costs about 12 bytes per chunk. Searching with `collections=[...]`
+only scores the selected shards; without a filter the global index is used
+as before.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+
+import numpy as np
+
+from chunk_store import corpus_fingerprint
+
+try:  # noqa: SIM105
+    import faiss  # type: ignore
+    FAISS_AVAILABLE = True
+except Exception:  # pragma: no cover
+    faiss = None  # type: ignore
+    FAISS_AVAILABLE = False
+
+
+def collection_of(chunk: dict, key: str = "host") -> str:
+    if key.startswith("field:"):
+        return str(chunk.get(key[len("field:"):]) or "default")
+    url = str(chunk.get("source_url") or "")
+    host = urlparse(url).netloc
+    if host:
+        return host.lower()
+    path = str(chunk.get("doc_path") or (url[len("file://"):] if url.startswith("file://") else ""))
+    return os.path.basename(os.path.dirname(path)) or "default"
+
+
+def _top_k(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    idx = np.argpartition(-scores, kth=min(k, scores.shape[1]) - 1, axis=1)[:, :k]
+    top = np.take_along_axis(scores, idx, axis=1)
+    order = np.argsort(-top, axis=1)
+    return np.take_along_axis(top, order, axis=1), np.take_along_axis(idx, order, axis=1)
+
+
+class ShardView:
+    """The base index restricted to global `rows`; search() returns global row ids."""
+
+    def __init__(self, base: Any, rows: np.ndarray) -> None:
+        self.base = base
+        self.rows = np.ascontiguousarray(rows, dtype=np.int64)
+        self._sel: Any = None
+        self._params: Any = None
+
+    def search(self, queries: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        k = min(top_k, self.rows.shape[0])
+        if hasattr(self.base, "embeddings"):
+            # Gathered per query and dropped afterwards; nothing stays resident
+            scores = queries.astype(np.float32) @ self.base.embeddings[self.rows].T
+            s, i = _top_k(scores, k)
+            return s, self.rows[i]
+        if self._params is None:
+            # FAISS flat index: only ids in the selector are scored; keep both objects alive here
+            self._sel = faiss.IDSelectorBatch(self.rows.shape[0], faiss.swig_ptr(self.rows))
+            self._params = faiss.SearchParameters(sel=self._sel)
+        s, i = self.base.search(np.ascontiguousarray(queries, dtype=np.float32), k, params=self._params)
+        return np.asarray(s)[:, :k], np.asarray(i)[:, :k]
+
+
+class ShardedIndex:
+    """Global dense index plus one shard view per collection; search() matches NumpyIndex/FAISS."""
+
+    def __init__(self, base: Any, names: List[str], row_codes: np.ndarray) -> None:
+        self.base = base
+        self.names = names
+        self.row_codes = row_codes
+        # Rows of every collection from one stable sort of the codes
+        order = np.argsort(row_codes, kind="stable")
+        bounds = np.cumsum(np.bincount(row_codes, minlength=len(names)))[:-1]
+        self.shards = [ShardView(base, rows) for rows in np.split(order, bounds)]
+        self._code_of = {n: i for i, n in enumerate(names)}
+
+    @property
+    def ntotal(self) -> int:
+        return int(self.row_codes.shape[0])
+
+    def codes_for(self, collections: Sequence[str]) -> List[int]:
+        return [self._code_of[c] for c in collections if c in self._code_of]
+
+    def sizes(self) -> Dict[str, int]:
+        return {name: int(shard.rows.shape[0]) for name, shard in zip(self.names, self.shards)}
+
+    def search(self, queries: np.ndarray, top_k: int, collections: Optional[Sequence[str]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        if collections is None:
+            return self.base.search(queries, top_k)
+        b = queries.shape[0]
+        parts_s: List[np.ndarray] = []
+        parts_i: List[np.ndarray] = []
+        for code in self.codes_for(collections):
+            shard = self.shards[code]
+            if shard.rows.shape[0] == 0 or top_k <= 0:
+                continue
+            s, i = shard.search(queries, top_k)
+            parts_s.append(s)
+            parts_i.append(i)
+        if not parts_s:
+            return np.full((b, top_k), -np.inf, dtype=np.float32), np.full((b, top_k), -1, dtype=np.int64)
+        scores = np.concatenate(parts_s, axis=1)
+        indices = np.concatenate(parts_i, axis=1)
+        order = np.argsort(-scores, axis=1)[:, :top_k]
+        return np.take_along_axis(scores, order, axis=1), np.take_along_axis(indices, order, axis=1)
+
+
+def build_or_load_collections(
+    chunks: Sequence[dict],
+    index: Any,
+    index_dir: str,
+    key: Optional[str] = None,
+) -> ShardedIndex:
+    """Load collection codes from `index_dir/collections`, computing them if missing or stale.
+
+    Shards are views of `index`, so only the corpus decides whether the codes are reused.
+    """
+    key = key or os.getenv("RAG_COLLECTION_KEY", "host")
+    corpus = corpus_fingerprint(chunks)
+    root = os.path.join(index_dir, "collections")
+    manifest_path = os.path.join(root, "manifest.json")
+    if os.path.exists(manifest_path):
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest.get("key") == key and manifest.get("corpus") == corpus:
+                return ShardedIndex(index, manifest["names"], np.load(os.path.join(root, "codes.npy")))
+        except Exception:
+            pass
+
+    code_of: Dict[str, int] = {}
+    codes = np.empty(len(chunks), dtype=np.int32)
+    for row in range(len(chunks)):
+        meta = chunks.metadata(row) if hasattr(chunks, "metadata") else chunks[row]
+        codes[row] = code_of.setdefault(collection_of(meta, key), len(code_of))
+    names = [""] * len(code_of)
+    for name, code in code_of.items():
+        names[code] = name
+
+    tmp_root = root + ".tmp"
+    if os.path.isdir(tmp_root):
+        shutil.rmtree(tmp_root)
+    os.makedirs(tmp_root)
+    np.save(os.path.join(tmp_root, "codes.npy"), codes)
+    with open(os.path.join(tmp_root, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump({"key": key, "names": names, "count": len(chunks), "corpus": corpus}, f)
+    if os.path.isdir(root):
+        shutil.rmtree(root)
+    os.replace(tmp_root, root)
+    return ShardedIndex(index, names, codes)
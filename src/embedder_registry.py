@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Process-wide sentence-embedder registry.
+
+Every component (server, rag_chat, rag_query, nl_tool_selector) asks
+`get_embedder()` for its model, so one instance per (model, device, backend)
+is loaded and shared. `get_embedder()` without a model id returns the default
+embedder: RAG_EMBEDDER / RAG_EMBEDDER_DEVICE / RAG_EMBEDDER_BACKEND, or whatever
+the entry point passed to `set_default_embedder()`.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from onnx_embedder import OnnxEmbedder, load_embedder
+
+
+DEFAULT_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+_Key = Tuple[str, str, str]
+
+_LOCK = threading.Lock()
+_KEY_LOCKS: Dict[_Key, threading.Lock] = {}
+_EMBEDDERS: Dict[_Key, Any] = {}
+_INFO: Dict[_Key, Dict[str, Any]] = {}
+_DEFAULT: Dict[str, Optional[str]] = {"model": None, "device": None, "backend": None}
+
+
+def canonical_model_id(model_id: str) -> str:
+    """'all-MiniLM-L6-v2' and 'sentence-transformers/all-MiniLM-L6-v2' are the same model."""
+    model_id = model_id.strip()
+    if "/" not in model_id and not os.path.exists(model_id):
+        return "sentence-transformers/" + model_id
+    return model_id
+
+
+def resolve_device(device: Optional[str] = None) -> str:
+    device = (device or os.getenv("RAG_EMBEDDER_DEVICE") or "").strip().lower()
+    if device:
+        return device
+    # Same preference order SentenceTransformer uses when device=None
+    try:
+        import torch
+
+        if torch.cuda.is_available():
+            return "cuda"
+        if torch.backends.mps.is_available():
+            return "mps"
+    except Exception:
+        pass
+    return "cpu"
+
+
+def resolve_backend(backend: Optional[str] = None) -> str:
+    return (backend or os.getenv("RAG_EMBEDDER_BACKEND") or "torch").strip().lower()
+
+
+def set_default_embedder(model_id: str, device: Optional[str] = None, backend: Optional[str] = None) -> None:
+    """Make `get_embedder()` (no args) resolve to this model; called by CLI entry points."""
+    with _LOCK:
+        _DEFAULT.update(model=model_id, device=device, backend=backend)
+
+
+def _default_model() -> str:
+    return _DEFAULT["model"] or os.getenv("RAG_EMBEDDER") or DEFAULT_MODEL
+
+
+def default_embedder_key() -> Tuple[str, str]:
+    """(model id, backend) of the default embedder; identifies what its vectors are comparable with."""
+    return canonical_model_id(_default_model()), resolve_backend(_DEFAULT["backend"])
+
+
+def _model_bytes(embedder: Any) -> int:
+    if isinstance(embedder, OnnxEmbedder):
+        try:
+            return os.path.getsize(embedder.model_path)
+        except OSError:
+            return 0
+    total = 0
+    try:
+        for t in list(embedder.parameters()) + list(embedder.buffers()):
+            total += t.numel() * t.element_size()
+    except Exception:
+        pass
+    return total
+
+
+def get_embedder(model_id: Optional[str] = None, device: Optional[str] = None, backend: Optional[str] = None) -> Any:
+    """Shared embedder for (model, device, backend); loaded on first request."""
+    if model_id is None:
+        model_id = _default_model()
+        device = device or _DEFAULT["device"]
+        backend = backend or _DEFAULT["backend"]
+    key = (canonical_model_id(model_id), resolve_device(device), resolve_backend(backend))
+    embedder = _EMBEDDERS.get(key)
+    if embedder is None:
+        with _LOCK:
+            key_lock = _KEY_LOCKS.setdefault(key, threading.Lock())
+        # Per-key lock: concurrent first requests load the model once, other models are not blocked
+        with key_lock:
+            embedder = _EMBEDDERS.get(key)
+            if embedder is None:
+                t0 = time.perf_counter()
+                embedder = load_embedder(key[0], backend=key[2], device=key[1])
+                info = {
+                    "model": key[0],
+                    "device": key[1],
+                    "backend": "onnx" if isinstance(embedder, OnnxEmbedder) else "torch",
+                    "requestedBackend": key[2],
+                    "quantized": bool(getattr(embedder, "quantized", False)),
+                    "memoryBytes": _model_bytes(embedder),
+                    "loadSeconds": round(time.perf_counter() - t0, 3),
+                    "requests": 0,
+                }
+                with _LOCK:
+                    _INFO[key] = info
+                    _EMBEDDERS[key] = embedder
+    with _LOCK:
+        _INFO[key]["requests"] += 1
+    return embedder
+
+
+def embedder_stats() -> List[Dict[str, Any]]:
+    """One entry per loaded embedder with its approximate weight memory."""
+    with _LOCK:
+        out = [dict(info) for info in _INFO.values()]
+    for info in out:
+        info["memoryMB"] = round(info["memoryBytes"] / (1 << 20), 1)
+    return out
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Local SQLite store for Hyperliquid funding history with incremental sync.
+
+Settled funding points never change, so each (network, coin) keeps the
+contiguous window [covered_from, synced_to] it has already fetched. A query
+only fetches the missing head and tail of its window and everything else,
+including window aggregates, is answered from disk:
+
+    funding(network, coin, time, fundingRate, premium, rate)
+    sync_state(network, coin, covered_from, synced_to)
+
+Points are assumed published `settle_ms` after their timestamp; a later
+point can show up on the next sync after that.
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+HOUR_MS = 3_600_000
+# Funding timestamps land a few ms after the hour; a boundary counts as crossed this long after it
+_BOUNDARY_SLOP_MS = 60_000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS funding (
+    network TEXT NOT NULL,
+    coin TEXT NOT NULL,
+    time INTEGER NOT NULL,
+    fundingRate TEXT,
+    premium TEXT,
+    rate REAL,
+    PRIMARY KEY (network, coin, time)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS sync_state (
+    network TEXT NOT NULL,
+    coin TEXT NOT NULL,
+    covered_from INTEGER NOT NULL,
+    synced_to INTEGER NOT NULL,
+    PRIMARY KEY (network, coin)
+);
+"""
+
+
+def _to_float(value: Any) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class FundingStore:
+    def __init__(self, path: str, settle_ms: int = 120_000) -> None:
+        self.path = path
+        self.settle_ms = int(settle_ms)
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            try:
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            except sqlite3.DatabaseError:
+                pass
+            self._conn.executescript(_SCHEMA)
+            self._conn.commit()
+        self._counters = {"queries": 0, "networkFree": 0, "fetches": 0, "rowsStored": 0}
+
+    def _state(self, network: str, coin: str) -> Optional[Tuple[int, int]]:
+        row = self._conn.execute(
+            "SELECT covered_from, synced_to FROM sync_state WHERE network = ? AND coin = ?", (network, coin)
+        ).fetchone()
+        return (int(row[0]), int(row[1])) if row else None
+
+    def _upper(self, end: int, now_ms: Optional[int]) -> int:
+        now = int(now_ms if now_ms is not None else time.time() * 1000)
+        return min(int(end), now - self.settle_ms)
+
+    def missing(self, network: str, coin: str, start: int, end: int, now_ms: Optional[int] = None) -> List[Tuple[int, int]]:
+        """[start, end] ranges to fetch so that the stored coverage spans the query window."""
+        start, end = int(start), int(end)
+        with self._lock:
+            state = self._state(network, coin)
+            self._counters["queries"] += 1
+        if state is None:
+            return [(start, end)] if start <= end else []
+        covered_from, synced_to = state
+        ranges: List[Tuple[int, int]] = []
+        if start < covered_from:
+            ranges.append((start, covered_from - 1))
+        if end > synced_to:
+            upper = self._upper(end, now_ms)
+            # Latest hour boundary that should be settled by now
+            boundary = (upper // HOUR_MS) * HOUR_MS
+            if start > synced_to + 1 or (upper > synced_to and boundary + _BOUNDARY_SLOP_MS > synced_to):
+                ranges.append((synced_to + 1, end))
+        if not ranges:
+            with self._lock:
+                self._counters["networkFree"] += 1
+        return ranges
+
+    def record(
+        self,
+        network: str,
+        coin: str,
+        rows: Iterable[Dict[str, Any]],
+        start: int,
+        end: int,
+        now_ms: Optional[int] = None,
+    ) -> None:
+        """Store fetched rows and extend coverage after the ranges from missing() were all fetched."""
+        values = []
+        for r in rows:
+            if not isinstance(r, dict) or r.get("time") is None:
+                continue
+            values.append((network, coin, int(r["time"]), r.get("fundingRate"), r.get("premium"), _to_float(r.get("fundingRate"))))
+        start = int(start)
+        upper = max(self._upper(end, now_ms), start - 1)
+        with self._lock:
+            state = self._state(network, coin)
+            covered_from, synced_to = (start, upper) if state is None else (min(state[0], start), max(state[1], upper))
+            with self._conn:
+                self._conn.executemany("INSERT OR REPLACE INTO funding VALUES (?, ?, ?, ?, ?, ?)", values)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?, ?)", (network, coin, covered_from, synced_to)
+                )
+            self._counters["fetches"] += 1
+            self._counters["rowsStored"] += len(values)
+
+    def rows(self, network: str, coin: str, start: int, end: int) -> List[Dict[str, Any]]:
+        """Stored points in [start, end], shaped like fundingHistory rows."""
+        with self._lock:
+            cur = self._conn.execute(
+                "SELECT time, fundingRate, premium FROM funding WHERE network = ? AND coin = ? AND time BETWEEN ? AND ? ORDER BY time",
+                (network, coin, int(start), int(end)),
+            )
+            return [{"coin": coin, "fundingRate": f, "premium": p, "time": t} for t, f, p in cur.fetchall()]
+
+    def aggregate(self, network: str, coin: str, start: int, end: int) -> Dict[str, Any]:
+        """count/avg/sum/min/max of the hourly rate in [start, end]; annualized = avg * 24 * 365."""
+        with self._lock:
+            count, avg, total, lo, hi, first, last = self._conn.execute(
+                "SELECT COUNT(rate), AVG(rate), SUM(rate), MIN(rate), MAX(rate), MIN(time), MAX(time) "
+                "FROM funding WHERE network = ? AND coin = ? AND time BETWEEN ? AND ?",
+                (network, coin, int(start), int(end)),
+            ).fetchone()
+        return {
+            "coin": coin,
+            "points": int(count or 0),
+            "avg": avg,
+            "sum": total,
+            "min": lo,
+            "max": hi,
+            "annualized": avg * 24 * 365 if avg is not None else None,
+            "firstTime": first,
+            "lastTime": last,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = dict(self._counters)
+            out["series"] = self._conn.execute("SELECT COUNT(*) FROM sync_state").fetchone()[0]
+            out["points"] = self._conn.execute("SELECT COUNT(*) FROM funding").fetchone()[0]
+        out["path"] = self.path
+        return out
+
+
+def store_from_env() -> Optional[FundingStore]:
+    """FundingStore at HYPERLIQUID_FUNDING_DB (None when HYPERLIQUID_FUNDING_STORE=0 or it cannot be opened)."""
+    if os.getenv("HYPERLIQUID_FUNDING_STORE", "1") == "0":
+        return None
+    try:
+        return FundingStore(
+            os.getenv("HYPERLIQUID_FUNDING_DB", "./hl_data/funding.sqlite"),
+            settle_ms=int(float(os.getenv("HYPERLIQUID_FUNDING_SETTLE_S", "120")) * 1000),
+        )
+    except Exception:
+        return None
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Client-side request-weight budget for the Hyperliquid Info API.
+
+Hyperliquid limits each IP to a request-weight budget per minute (1200 by
+default), and each /info `type` has a weight. `WeightScheduler` is a token
+bucket over that budget with a priority queue in front of it:
+
+- interactive (chat/tool calls) is served first,
+- batch (multi-coin tools, history backfills) waits behind it and may not
+  drain the last HYPERLIQUID_BATCH_RESERVE fraction of the bucket,
+- background (refreshers) waits behind both and keeps HYPERLIQUID_BACKGROUND_RESERVE.
+
+The priority of the current call comes from `info_priority(...)`, a context
+manager backed by a ContextVar, so it flows into asyncio tasks and
+`asyncio.to_thread` calls started inside it.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import heapq
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+PRIORITIES = ("interactive", "batch", "background")
+
+# Weights per the Info API docs; anything not listed costs DEFAULT_WEIGHT
+DEFAULT_WEIGHT = 20
+TYPE_WEIGHTS: Dict[str, int] = {
+    "l2Book": 2,
+    "allMids": 2,
+    "clearinghouseState": 2,
+    "orderStatus": 2,
+    "spotClearinghouseState": 2,
+    "exchangeStatus": 2,
+    "userRole": 60,
+}
+# Types that cost one extra unit per 20 items returned
+PER_ITEM_TYPES = {
+    "recentTrades",
+    "historicalOrders",
+    "userFills",
+    "userFillsByTime",
+    "fundingHistory",
+    "userFunding",
+    "userNonFundingLedgerUpdates",
+    "twapHistory",
+    "userTwapSliceFills",
+    "candleSnapshot",
+}
+
+_PRIORITY: contextvars.ContextVar[str] = contextvars.ContextVar("hl_info_priority", default="interactive")
+
+
+@contextmanager
+def info_priority(priority: str) -> Iterator[None]:
+    """Run the enclosed Info calls at `priority` (interactive, batch or background)."""
+    if priority not in PRIORITIES:
+        raise ValueError(f"priority must be one of {PRIORITIES}")
+    token = _PRIORITY.set(priority)
+    try:
+        yield
+    finally:
+        _PRIORITY.reset(token)
+
+
+def current_priority() -> str:
+    return _PRIORITY.get()
+
+
+def request_weight(payload: Dict[str, Any]) -> int:
+    return TYPE_WEIGHTS.get(str(payload.get("type")), DEFAULT_WEIGHT)
+
+
+def response_weight(payload: Dict[str, Any], data: Any) -> int:
+    """Extra weight charged after the fact for item-priced types."""
+    if payload.get("type") in PER_ITEM_TYPES and isinstance(data, list):
+        return len(data) // 20
+    return 0
+
+
+class RateLimitTimeout(RuntimeError):
+    pass
+
+
+class WeightScheduler:
+    def __init__(
+        self,
+        budget_per_min: float = 1200.0,
+        capacity: Optional[float] = None,
+        reserves: Optional[Dict[str, float]] = None,
+        max_wait_s: float = 30.0,
+    ) -> None:
+        self.rate = float(budget_per_min) / 60.0
+        self.capacity = float(capacity if capacity is not None else budget_per_min)
+        self.reserves = {"interactive": 0.0, "batch": 0.2, "background": 0.5}
+        self.reserves.update(reserves or {})
+        self.max_wait_s = float(max_wait_s)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self._queue: List[Tuple[int, int]] = []  # (priority rank, seq)
+        self._seq = itertools.count()
+        self._stats: Dict[str, Dict[str, float]] = {
+            p: {"granted": 0, "weight": 0, "throttled": 0, "waitMsTotal": 0.0, "waitMsMax": 0.0, "timeouts": 0, "queued": 0}
+            for p in PRIORITIES
+        }
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _try_grant(self, ticket: Tuple[int, int], priority: str, weight: float) -> float:
+        """Caller holds the lock. 0 when granted, else seconds until it might be."""
+        self._refill()
+        if self._queue and self._queue[0] != ticket:
+            return 0.05
+        floor = self.reserves.get(priority, 0.0) * self.capacity
+        # A request heavier than the usable bucket is allowed once the bucket is full
+        need = min(weight + floor, self.capacity)
+        if self._tokens >= need:
+            self._tokens -= weight
+            heapq.heappop(self._queue)
+            return 0.0
+        return max((need - self._tokens) / self.rate, 0.001)
+
+    def _enqueue(self, priority: str) -> Tuple[int, int]:
+        ticket = (PRIORITIES.index(priority), next(self._seq))
+        heapq.heappush(self._queue, ticket)
+        self._stats[priority]["queued"] += 1
+        return ticket
+
+    def _abandon(self, ticket: Tuple[int, int], priority: str, timed_out: bool = True) -> None:
+        if ticket not in self._queue:
+            return
+        self._queue.remove(ticket)
+        heapq.heapify(self._queue)
+        self._stats[priority]["queued"] -= 1
+        if timed_out:
+            self._stats[priority]["timeouts"] += 1
+        self._cond.notify_all()
+
+    def _granted(self, priority: str, weight: float, waited_s: float) -> None:
+        st = self._stats[priority]
+        st["queued"] -= 1
+        st["granted"] += 1
+        st["weight"] += weight
+        if waited_s > 0.0005:
+            st["throttled"] += 1
+            st["waitMsTotal"] += waited_s * 1000.0
+            st["waitMsMax"] = max(st["waitMsMax"], waited_s * 1000.0)
+        # The next ticket may be grantable now
+        self._cond.notify_all()
+
+    def acquire(self, weight: float, priority: Optional[str] = None) -> float:
+        """Block until `weight` tokens are granted; returns seconds waited."""
+        priority = priority or current_priority()
+        t0 = time.monotonic()
+        with self._cond:
+            ticket = self._enqueue(priority)
+            try:
+                while True:
+                    wait = self._try_grant(ticket, priority, weight)
+                    if wait == 0.0:
+                        waited = time.monotonic() - t0
+                        self._granted(priority, weight, waited)
+                        return waited
+                    if time.monotonic() - t0 + wait > self.max_wait_s:
+                        self._abandon(ticket, priority)
+                        raise RateLimitTimeout(f"Info API weight budget exhausted ({priority}, weight {weight})")
+                    self._cond.wait(min(wait, 0.25))
+            except BaseException:
+                # Interrupted while queued: free the slot so later tickets are not stuck behind it
+                self._abandon(ticket, priority, timed_out=False)
+                raise
+
+    async def aacquire(self, weight: float, priority: Optional[str] = None) -> float:
+        priority = priority or current_priority()
+        t0 = time.monotonic()
+        with self._lock:
+            ticket = self._enqueue(priority)
+        try:
+            while True:
+                with self._lock:
+                    wait = self._try_grant(ticket, priority, weight)
+                    if wait == 0.0:
+                        waited = time.monotonic() - t0
+                        self._granted(priority, weight, waited)
+                        return waited
+                    if time.monotonic() - t0 + wait > self.max_wait_s:
+                        self._abandon(ticket, priority)
+                        raise RateLimitTimeout(f"Info API weight budget exhausted ({priority}, weight {weight})")
+                await asyncio.sleep(min(wait, 0.05))
+        except BaseException:
+            # Cancelled (tool deadline, client disconnect) while queued: drop the ticket, not counted as a timeout
+            with self._lock:
+                self._abandon(ticket, priority, timed_out=False)
+            raise
+
+    def charge(self, weight: float, priority: Optional[str] = None) -> None:
+        """Consume weight without waiting (post-response item charges); may leave the bucket in debt."""
+        if weight <= 0:
+            return
+        with self._lock:
+            self._refill()
+            self._tokens -= weight
+            self._stats[priority or current_priority()]["weight"] += weight
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._refill()
+            return {
+                "tokens": round(self._tokens, 1),
+                "capacity": self.capacity,
+                "budgetPerMin": round(self.rate * 60.0, 1),
+                "queueDepth": len(self._queue),
+                "priorities": {p: dict(st, waitMsTotal=round(st["waitMsTotal"], 1), waitMsMax=round(st["waitMsMax"], 1)) for p, st in self._stats.items()},
+            }
+
+
+def scheduler_from_env() -> Optional[WeightScheduler]:
+    """WeightScheduler configured from HYPERLIQUID_WEIGHT_* env vars (None when HYPERLIQUID_RATE_LIMIT=0)."""
+    if os.getenv("HYPERLIQUID_RATE_LIMIT", "1") == "0":
+        return None
+    budget = float(os.getenv("HYPERLIQUID_WEIGHT_BUDGET", "1200"))
+    return WeightScheduler(
+        budget_per_min=budget,
+        capacity=float(os.getenv("HYPERLIQUID_WEIGHT_BURST", str(budget))),
+        reserves={
+            "batch": float(os.getenv("HYPERLIQUID_BATCH_RESERVE", "0.2")),
+            "background": float(os.getenv("HYPERLIQUID_BACKGROUND_RESERVE", "0.5")),
+        },
+        max_wait_s=float(os.getenv("HYPERLIQUID_RATE_MAX_WAIT_S", "30")),
+    )
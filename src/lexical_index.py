@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Lexical (BM25) inverted index stored next to the dense index in RAG_INDEX_DIR.
+
+Postings are kept in CSR form with precomputed BM25 impact weights, so a query
+is a handful of dict lookups plus a NumPy reduction over the matching postings:
+
+    <index_dir>/bm25/meta.json      (doc count, parameters, corpus fingerprint)
+    <index_dir>/bm25/vocab.json     (term list; position = term id)
+    <index_dir>/bm25/offsets.npy    int64 [V + 1]
+    <index_dir>/bm25/docs.npy       int32 [P]    chunk row per posting
+    <index_dir>/bm25/weights.npy    float16 [P]  BM25 impact per posting
+
+Arrays are memory-mapped on load.
+
+An exact-identifier index (hex addresses / tx hashes -> chunk rows) lives in
+<index_dir>/identifiers.json and turns exact-match boosting into dict lookups.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+from array import array
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from chunk_store import corpus_fingerprint
+
+
+_TOKEN_RE = re.compile(r"[A-Za-z0-9_]+")
+_CAMEL_RE = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+")
+# 64-hex tx hashes and 40-hex addresses (same shapes rag_chat extracts from queries)
+_HEX_ID_RE = re.compile(r"\b0x(?:[a-fA-F0-9]{64}|[a-fA-F0-9]{40})\b")
+
+
+@lru_cache(maxsize=1 << 18)
+def _expand_token(tok: str) -> Tuple[str, ...]:
+    low = tok.lower()
+    if tok.startswith("0x") or len(tok) > 40:
+        return (low,)
+    parts = _CAMEL_RE.findall(tok)
+    if len(parts) > 1:
+        return (low,) + tuple(p.lower() for p in parts)
+    return (low,)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens; camelCase/snake_case identifiers also emit their parts.
+
+    `clearinghouseState` -> ["clearinghousestate", "clearinghouse", "state"], so both
+    the exact API term and its natural-language pieces are searchable.
+    """
+    out: List[str] = []
+    for tok in _TOKEN_RE.findall(text):
+        out.extend(_expand_token(tok))
+    return out
+
+
+class BM25Index:
+    def __init__(
+        self,
+        vocab: Dict[str, int],
+        offsets: np.ndarray,
+        docs: np.ndarray,
+        weights: np.ndarray,
+        doc_count: int,
+        max_df_ratio: float = 0.5,
+    ) -> None:
+        self.vocab = vocab
+        self.offsets = offsets
+        self.docs = docs
+        self.weights = weights
+        self.doc_count = int(doc_count)
+        # Terms present in more than this fraction of chunks carry almost no signal;
+        # skip them (unless they are all the query has) to keep posting scans short.
+        self.max_df = max(1, int(max_df_ratio * self.doc_count))
+
+    @classmethod
+    def build(cls, texts: Iterable[str], k1: float = 1.2, b: float = 0.75) -> "BM25Index":
+        vocab: Dict[str, int] = {}
+        term_ids = array("i")
+        doc_ids = array("i")
+        tfs = array("f")
+        doc_lens: List[int] = []
+        for doc_id, text in enumerate(texts):
+            tokens = tokenize(text or "")
+            doc_lens.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                tid = vocab.setdefault(term, len(vocab))
+                term_ids.append(tid)
+                doc_ids.append(doc_id)
+                tfs.append(tf)
+        n_docs = len(doc_lens)
+        terms = np.frombuffer(term_ids, dtype=np.int32)
+        docs = np.frombuffer(doc_ids, dtype=np.int32)
+        tf = np.frombuffer(tfs, dtype=np.float32)
+        order = np.lexsort((docs, terms))
+        terms, docs, tf = terms[order], docs[order], tf[order]
+        df_counts = np.bincount(terms, minlength=len(vocab))
+        offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(df_counts, out=offsets[1:])
+        df = df_counts.astype(np.float64)
+        lens = np.asarray(doc_lens, dtype=np.float32)
+        avgdl = float(lens.mean()) if n_docs else 1.0
+        idf = np.log1p((n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+        norm = k1 * (1.0 - b + b * lens[docs] / max(avgdl, 1e-9))
+        weights = (idf[terms] * tf * (k1 + 1.0) / (tf + norm)).astype(np.float16)
+        return cls(vocab, offsets, docs.astype(np.int32), weights, n_docs)
+
+    def save(self, out_dir: str, k1: float = 1.2, b: float = 0.75, corpus: Optional[Dict[str, Any]] = None) -> None:
+        os.makedirs(out_dir, exist_ok=True)
+        terms = [""] * len(self.vocab)
+        for term, tid in self.vocab.items():
+            terms[tid] = term
+        with open(os.path.join(out_dir, "vocab.json"), "w", encoding="utf-8") as f:
+            json.dump(terms, f, ensure_ascii=False)
+        np.save(os.path.join(out_dir, "offsets.npy"), self.offsets)
+        np.save(os.path.join(out_dir, "docs.npy"), self.docs)
+        np.save(os.path.join(out_dir, "weights.npy"), self.weights)
+        # meta.json is written last and marks the index as complete
+        with open(os.path.join(out_dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"count": self.doc_count, "terms": len(terms), "postings": int(self.docs.shape[0]), "k1": k1, "b": b, "corpus": corpus}, f)
+
+    @classmethod
+    def load(cls, in_dir: str) -> "BM25Index":
+        with open(os.path.join(in_dir, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        with open(os.path.join(in_dir, "vocab.json"), "r", encoding="utf-8") as f:
+            terms = json.load(f)
+        vocab = {t: i for i, t in enumerate(terms)}
+        offsets = np.load(os.path.join(in_dir, "offsets.npy"), mmap_mode="r")
+        docs = np.load(os.path.join(in_dir, "docs.npy"), mmap_mode="r")
+        weights = np.load(os.path.join(in_dir, "weights.npy"), mmap_mode="r")
+        return cls(vocab, offsets, docs, weights, int(meta.get("count", 0)))
+
+    def search(self, query: str, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (scores, chunk rows) for the top_k BM25 matches, best first."""
+        spans: List[Tuple[int, int]] = []
+        common: List[Tuple[int, int]] = []
+        for term in set(tokenize(query)):
+            tid = self.vocab.get(term)
+            if tid is None:
+                continue
+            lo, hi = int(self.offsets[tid]), int(self.offsets[tid + 1])
+            (common if hi - lo > self.max_df else spans).append((lo, hi))
+        if not spans:
+            spans = common
+        if not spans or top_k <= 0:
+            return np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)
+        docs = np.concatenate([self.docs[lo:hi] for lo, hi in spans])
+        weights = np.concatenate([self.weights[lo:hi] for lo, hi in spans]).astype(np.float32)
+        if len(spans) == 1:
+            rows, scores = docs, weights
+        else:
+            rows, inverse = np.unique(docs, return_inverse=True)
+            scores = np.bincount(inverse, weights=weights).astype(np.float32)
+        k = min(top_k, rows.shape[0])
+        part = np.argpartition(-scores, k - 1)[:k]
+        order = np.argsort(-scores[part], kind="stable")
+        return scores[part][order], rows[part][order].astype(np.int64)
+
+
+def build_or_load_bm25(chunks: Sequence[dict], index_dir: str) -> Optional[BM25Index]:
+    """Load the BM25 index from `index_dir/bm25`, rebuilding it when missing or built from another corpus."""
+    bm25_dir = os.path.join(index_dir, "bm25")
+    meta_path = os.path.join(bm25_dir, "meta.json")
+    corpus = corpus_fingerprint(chunks)
+    if os.path.exists(meta_path):
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("corpus") == corpus:
+                return BM25Index.load(bm25_dir)
+        except Exception:
+            pass
+    if not len(chunks):
+        return None
+    index = BM25Index.build(c.get("text", "") for c in chunks)
+    index.save(bm25_dir, corpus=corpus)
+    return index
+
+
+class IdentifierIndex:
+    """Map of lowercased hex identifiers to the chunk rows whose text/title/url/path contain them.
+
+    Only 0x-prefixed 40-hex addresses and 64-hex tx hashes are indexed: those are the
+    exact tokens rag_chat extracts from queries for exact-match boosting.
+    """
+
+    FIELDS = ("text", "title", "source_url", "doc_path")
+
+    def __init__(self, postings: Dict[str, List[int]], doc_count: int, corpus: Optional[Dict[str, Any]] = None) -> None:
+        self.postings = postings
+        self.doc_count = int(doc_count)
+        self.corpus = corpus
+
+    @classmethod
+    def build(cls, chunks: Iterable[dict]) -> "IdentifierIndex":
+        postings: Dict[str, List[int]] = {}
+        count = 0
+        for row, c in enumerate(chunks):
+            count += 1
+            found: set[str] = set()
+            for field in cls.FIELDS:
+                value = c.get(field)
+                if value:
+                    found.update(m.lower() for m in _HEX_ID_RE.findall(str(value)))
+            for ident in found:
+                postings.setdefault(ident, []).append(row)
+        return cls(postings, count)
+
+    def save(self, path: str) -> None:
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"count": self.doc_count, "corpus": self.corpus, "ids": self.postings}, f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "IdentifierIndex":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data.get("ids", {}), int(data.get("count", 0)), data.get("corpus"))
+
+    def lookup(self, identifiers: Iterable[str]) -> List[int]:
+        """Rows matching any identifier, in corpus order."""
+        rows: set[int] = set()
+        for ident in identifiers:
+            rows.update(self.postings.get(ident.lower(), ()))
+        return sorted(rows)
+
+
+def build_or_load_identifiers(chunks: Sequence[dict], index_dir: str) -> IdentifierIndex:
+    """Load `index_dir/identifiers.json`, rebuilding it when missing or built from another corpus."""
+    path = os.path.join(index_dir, "identifiers.json")
+    corpus = corpus_fingerprint(chunks)
+    if os.path.exists(path):
+        try:
+            index = IdentifierIndex.load(path)
+            if index.corpus == corpus:
+                return index
+        except Exception:
+            pass
+    os.makedirs(index_dir, exist_ok=True)
+    index = IdentifierIndex.build(chunks)
+    index.corpus = corpus
+    index.save(path)
+    return index
+
+
+def fuse_rrf(
+    ranked_lists: Sequence[Sequence[int]],
+    weights: Optional[Sequence[float]] = None,
+    rrf_k: int = 60,
+) -> List[Tuple[int, float]]:
+    """Reciprocal-rank fusion of several best-first row lists; returns (row, score) best first."""
+    fused: Dict[int, float] = {}
+    for li, rows in enumerate(ranked_lists):
+        w = 1.0 if weights is None else float(weights[li])
+        for rank, row in enumerate(rows):
+            row = int(row)
+            if row < 0:
+                continue
+            fused[row] = fused.get(row, 0.0) + w / (rrf_k + rank + 1)
+    return sorted(fused.items(), key=lambda x: x[1], reverse=True)
@@ -4,7 +4,7 @@
 from __future__ import annotations
 
 import re
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional
 import re as _re
 import time as _time
 
@@ -47,18 +47,14 @@ def _contains_any(text: str, needles: List[str]) -> bool:
     return any(n in t for n in needles)
 
 
-def _load_universe_and_ctxs(network: str) -> Tuple[List[Dict], List[Dict]]:
+def _load_registry(network: str):
     if hl is None:
         raise RuntimeError("mcp_hyperliquid module not available")
-    resp = hl.get_meta_and_asset_ctxs(network=network)
-    data = resp.get("data")
-    if not isinstance(data, list) or len(data) != 2:
-        raise RuntimeError("Unexpected metaAndAssetCtxs response structure")
-    universe_obj, ctxs = data[0], data[1]
-    universe = universe_obj.get("universe", []) if isinstance(universe_obj, dict) else []
-    if not isinstance(universe, list) or not isinstance(ctxs, list):
+    # Shared warm snapshot: the per-coin tools fanned out for the same prompt reuse it
+    registry = hl.asset_registry(network)
+    if not len(registry):
         raise RuntimeError("Malformed metaAndAssetCtxs data")
-    return universe, ctxs
+    return registry
 
 
 def _orderbook_imbalance(bids: list[tuple[float, float]], asks: list[tuple[float, float]]) -> float:
@@ -114,79 +110,80 @@ def get_market_data_summary(prompt: str, network: str = "mainnet") -> str:
                 except Exception:
                     pass
         return ""
+    if hl is not None:
+        tickers = tickers[:hl.max_tickers()]
     try:
-        universe, ctxs = _load_universe_and_ctxs(network)
-        # Build name->index map
-        name_to_idx = {a.get("name"): i for i, a in enumerate(universe) if isinstance(a, dict) and "name" in a}
+        registry = _load_registry(network)
         lines: List[str] = ["Market data (Hyperliquid):"]
-        for t in tickers:
-            # Intent: average funding rate for coin
-            if _contains_all(prompt, ["average", "funding"]) and hl is not None:
-                try:
-                    now_ms = int(_time.time() * 1000)
-                    days = 7 if "week" in prompt.lower() else 1
-                    start_ms = now_ms - days * 24 * 60 * 60 * 1000
-                    fh = hl.get_funding_history(coin=t, startTime=start_ms, endTime=now_ms, network=network).get("data", [])
-                    vals: List[float] = []
-                    for row in fh:
+        # Per-coin intents run for every ticker concurrently (hl.fan_out); the first intent
+        # that produces data for any ticker answers the prompt.
+
+        # Intent: average funding rate for coin
+        if _contains_all(prompt, ["average", "funding"]) and hl is not None:
+            now_ms = int(_time.time() * 1000)
+            days = 7 if "week" in prompt.lower() else 1
+            start_ms = now_ms - days * 24 * 60 * 60 * 1000
+
+            def _avg_funding(t: str) -> Optional[str]:
+                # Aggregated from the local funding store; only the unsynced tail hits the API
+                agg = hl.get_funding_summary(coin=t, startTime=start_ms, endTime=now_ms, network=network).get("data", {})
+                if agg.get("avg") is None:
+                    return None
+                return f"Avg funding ({days}d) for {t}: {agg['avg']:.6f} (annualized {agg['annualized']:.2%}, {agg['points']} points)"
+
+            found = [r for r in hl.fan_out(_avg_funding, tickers) if isinstance(r, str)]
+            if found:
+                return "\n".join(found)
+
+        # Intent: predicted funding rates (one call shared by all tickers)
+        if _contains_any(prompt, ["predicted funding", "predicted rates"]) and hl is not None:
+            try:
+                pf = hl.get_predicted_fundings(network=network).get("data", [])
+                # pf is list of [coin, [[venue, {fundingRate, nextFundingTime}], ...]]
+                by_coin = {entry[0]: entry[1] for entry in pf if isinstance(entry, list) and len(entry) > 1}
+                found = []
+                for t in tickers:
+                    parts: List[str] = []
+                    for venue, meta in by_coin.get(t) or []:
                         try:
-                            vals.append(float(row.get("fundingRate")))
+                            parts.append(f"{venue}:{meta.get('fundingRate')}")
                         except Exception:
                             continue
-                    if vals:
-                        avg = sum(vals) / len(vals)
-                        return f"Avg funding ({days}d) for {t}: {avg:.6f}"
-                except Exception:
-                    pass
-
-            # Intent: predicted funding rates
-            if _contains_any(prompt, ["predicted funding", "predicted rates"]) and hl is not None:
-                try:
-                    pf = hl.get_predicted_fundings(network=network).get("data", [])
-                    # pf is list of [coin, [[venue, {fundingRate, nextFundingTime}], ...]]
-                    per_coin = None
-                    for entry in pf:
-                        if isinstance(entry, list) and entry and entry[0] == t:
-                            per_coin = entry[1]
-                            break
-                    if per_coin:
-                        parts: List[str] = []
-                        for venue, meta in per_coin:
-                            try:
-                                parts.append(f"{venue}:{meta.get('fundingRate')}")
-                            except Exception:
-                                continue
-                        if parts:
-                            return f"Predicted funding for {t}: " + ", ".join(parts)
-                except Exception:
-                    pass
+                    if parts:
+                        found.append(f"Predicted funding for {t}: " + ", ".join(parts))
+                if found:
+                    return "\n".join(found)
+            except Exception:
+                pass
 
-            # Intent: tickers at OI cap
-            if _contains_any(prompt, ["oi cap", "open interest cap"]) and hl is not None:
-                try:
-                    caps = hl.get_perps_at_open_interest_cap(network=network).get("data", [])
-                    if isinstance(caps, list) and caps:
-                        return "Perps at OI cap: " + ", ".join(caps)
-                except Exception:
-                    pass
+        # Intent: tickers at OI cap
+        if _contains_any(prompt, ["oi cap", "open interest cap"]) and hl is not None:
+            try:
+                caps = hl.get_perps_at_open_interest_cap(network=network).get("data", [])
+                if isinstance(caps, list) and caps:
+                    return "Perps at OI cap: " + ", ".join(caps)
+            except Exception:
+                pass
 
-            # Intent: active asset data with user + coin
-            addrs = extract_eth_addresses(prompt)
-            if addrs and _contains_any(prompt, ["active asset", "available to trade", "max trade"]) and hl is not None:
-                try:
-                    a = hl.get_active_asset_data(user=addrs[0], coin=t, network=network).get("data", {})
-                    lev = a.get("leverage", {}) if isinstance(a, dict) else {}
-                    at = a.get("availableToTrade")
-                    msz = a.get("maxTradeSzs")
-                    mp = a.get("markPx")
-                    return f"Active asset {t} for {addrs[0]} — lev {lev.get('type')}/{lev.get('value')}, avail {at}, maxSz {msz}, mark {mp}"
-                except Exception:
-                    pass
-            idx = name_to_idx.get(t)
-            if idx is None or idx >= len(ctxs):
-                lines.append(f"- {t}: not found")
-                continue
-            c = ctxs[idx]
+        # Intent: active asset data with user + coin
+        addrs = extract_eth_addresses(prompt)
+        if addrs and _contains_any(prompt, ["active asset", "available to trade", "max trade"]) and hl is not None:
+            def _active_asset(t: str) -> str:
+                a = hl.get_active_asset_data(user=addrs[0], coin=t, network=network).get("data", {})
+                lev = a.get("leverage", {}) if isinstance(a, dict) else {}
+                at = a.get("availableToTrade")
+                msz = a.get("maxTradeSzs")
+                mp = a.get("markPx")
+                return f"Active asset {t} for {addrs[0]} — lev {lev.get('type')}/{lev.get('value')}, avail {at}, maxSz {msz}, mark {mp}"
+
+            found = [r for r in hl.fan_out(_active_asset, tickers) if isinstance(r, str)]
+            if found:
+                return "\n".join(found)
+
+        def _ticker_line(t: str) -> str:
+            if t not in registry:
+                return f"- {t}: not found"
+            c = registry.ctx(t)
             # Common fields per docs: markPx, oraclePx, funding, openInterest, midPx, dayNtlVlm
             mark = c.get("markPx")
             oracle = c.get("oraclePx")
@@ -194,16 +191,11 @@ def get_market_data_summary(prompt: str, network: str = "mainnet") -> str:
             oi = c.get("openInterest")
             vlm = c.get("dayNtlVlm")
             prem = c.get("premium")
-            # Perp asset context intent (explicit)
-            if _contains_any(prompt, ["asset context", "funding", "open interest", "mark price", "premium"]):
-                # always include basic context
-                pass
-
             try:
                 full = hl.get_full_market_picture(coin=t, network=network, depth=50, trades=30)
                 sig = full.get("signal", {})
                 imb = full.get("analytics", {}).get("imbalance")
-                lines.append(
+                return (
                     f"- {t}: mark {mark}, oracle {oracle}, funding {funding}, OI {oi}, vol {vlm}, prem {prem}, obImb {imb:.2f if isinstance(imb, (int,float)) else 'n/a'}, signal {sig.get('label')} ({sig.get('score')})"
                 )
             except Exception:
@@ -216,9 +208,12 @@ def get_market_data_summary(prompt: str, network: str = "mainnet") -> str:
                 asks = ob.get("asks", []) if isinstance(ob, dict) else []
                 imb = _orderbook_imbalance(bids, asks)
                 signal = "buy" if imb > 0.1 else ("sell" if imb < -0.1 else "neutral")
-                lines.append(
+                return (
                     f"- {t}: mark {mark}, oracle {oracle}, funding {funding}, OI {oi}, vol {vlm}, prem {prem}, obImb {imb:.2f}, signal {signal}"
                 )
+
+        for t, line in zip(tickers, hl.fan_out(_ticker_line, tickers)):
+            lines.append(line if isinstance(line, str) else f"- {t}: unavailable")
         return "\n".join(lines)
     except Exception:
         # Fail open: do not block chat if market fetch fails
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Rolling per-asset history of premium, funding, open interest and mark price.
+
+Each ctxs refresh hands its AssetRegistry to `MarketSampler.record`, which
+writes one row of every asset's values into a fixed-size ring buffer
+(capacity x assets x fields, float64, NaN where missing). Alongside it the
+sampler keeps running sums over the buffer window, updated on insert and
+eviction, so rolling mean, std, z-score and least-squares slope per coin are
+O(1) and a delta over N minutes is one binary search.
+
+Values are summed relative to a per-column reference (their first value) and
+the sums are rebuilt from the buffer once per `capacity` inserts, which keeps
+the usual sum/sum-of-squares cancellation error from building up.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+
+FIELDS = ("premium", "funding", "openInterest", "markPx")
+_FIELD_IDX = {f: i for i, f in enumerate(FIELDS)}
+
+
+class MarketSampler:
+    def __init__(self, capacity: int = 720, min_interval_ms: int = 5000) -> None:
+        self.capacity = max(2, int(capacity))
+        self.min_interval_ms = int(min_interval_ms)
+        self._lock = threading.Lock()
+        self._reset([])
+
+    def _reset(self, names: List[str]) -> None:
+        n = len(names)
+        self.names: List[str] = list(names)
+        self.name_to_idx: Dict[str, int] = {c: i for i, c in enumerate(self.names)}
+        self.ts = np.full(self.capacity, np.nan)
+        self.buf = np.full((self.capacity, n, len(FIELDS)), np.nan)
+        self.head = 0
+        self.size = 0
+        self.pushes = 0
+        self.t0 = 0.0
+        self.ref = np.full((n, len(FIELDS)), np.nan)
+        self._zero_sums(n)
+
+    def _zero_sums(self, n: int) -> None:
+        shape = (n, len(FIELDS))
+        self.n = np.zeros(shape)
+        self.sx = np.zeros(shape)
+        self.sxx = np.zeros(shape)
+        self.st = np.zeros(shape)
+        self.stt = np.zeros(shape)
+        self.stx = np.zeros(shape)
+
+    def _grow(self, names: List[str]) -> None:
+        # New listings are appended to the universe; extend every per-asset array with empty columns
+        extra = len(names) - len(self.names)
+        pad = np.full((self.capacity, extra, len(FIELDS)), np.nan)
+        self.buf = np.concatenate([self.buf, pad], axis=1)
+        self.ref = np.vstack([self.ref, np.full((extra, len(FIELDS)), np.nan)])
+        for attr in ("n", "sx", "sxx", "st", "stt", "stx"):
+            setattr(self, attr, np.vstack([getattr(self, attr), np.zeros((extra, len(FIELDS)))]))
+        self.names = list(names)
+        self.name_to_idx = {c: i for i, c in enumerate(self.names)}
+
+    def _apply(self, row: np.ndarray, ts_s: float, sign: float) -> None:
+        d = row - self.ref
+        m = np.isfinite(d)
+        dd = np.where(m, d, 0.0)
+        t = ts_s - self.t0
+        self.n += sign * m
+        self.sx += sign * dd
+        self.sxx += sign * dd * dd
+        self.st += sign * m * t
+        self.stt += sign * m * t * t
+        self.stx += sign * dd * t
+
+    def _order(self) -> np.ndarray:
+        return (self.head - self.size + np.arange(self.size)) % self.capacity
+
+    def _rebuild(self) -> None:
+        order = self._order()
+        self.t0 = float(self.ts[order[0]]) if order.size else 0.0
+        self._zero_sums(len(self.names))
+        for i in order:
+            self._apply(self.buf[i], float(self.ts[i]), 1.0)
+
+    def record(self, ts_ms: int, registry: Any) -> bool:
+        """Append one sample of every asset from an AssetRegistry; False if skipped (too soon or not newer)."""
+        names = list(registry.names)
+        with self._lock:
+            if self.size:
+                last_ms = float(self.ts[(self.head - 1) % self.capacity]) * 1000.0
+                if ts_ms <= last_ms or ts_ms - last_ms < self.min_interval_ms:
+                    return False
+            if names[:len(self.names)] != self.names:
+                self._reset(names)
+            elif len(names) > len(self.names):
+                self._grow(names)
+            row = np.stack([registry.column(f) for f in FIELDS], axis=1)
+            ts_s = ts_ms / 1000.0
+            if self.size == 0:
+                self.t0 = ts_s
+            fresh = np.isnan(self.ref) & np.isfinite(row)
+            self.ref[fresh] = row[fresh]
+            if self.size == self.capacity:
+                self._apply(self.buf[self.head], float(self.ts[self.head]), -1.0)
+            self.buf[self.head] = row
+            self.ts[self.head] = ts_s
+            self._apply(row, ts_s, 1.0)
+            self.head = (self.head + 1) % self.capacity
+            self.size = min(self.size + 1, self.capacity)
+            self.pushes += 1
+            if self.pushes % self.capacity == 0:
+                self._rebuild()
+            return True
+
+    def _field_stats(self, i: int, f: int) -> Dict[str, Optional[float]]:
+        n = float(self.n[i, f])
+        last = float(self.buf[(self.head - 1) % self.capacity, i, f]) if self.size else float("nan")
+        out: Dict[str, Optional[float]] = {"last": None if np.isnan(last) else last, "samples": int(n), "mean": None, "std": None, "zScore": None, "slopePerMin": None}
+        if n < 1:
+            return out
+        sx, sxx, st, stt, stx = (float(a[i, f]) for a in (self.sx, self.sxx, self.st, self.stt, self.stx))
+        mean_d = sx / n
+        out["mean"] = float(self.ref[i, f]) + mean_d
+        if n < 2:
+            return out
+        var = max((sxx - sx * mean_d) / (n - 1.0), 0.0)
+        std = var ** 0.5
+        out["std"] = std
+        if std > 0 and out["last"] is not None:
+            out["zScore"] = (out["last"] - out["mean"]) / std
+        den = n * stt - st * st
+        if den > 0:
+            out["slopePerMin"] = (n * stx - st * sx) / den * 60.0
+        return out
+
+    def stats(self, coin: str, fields: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        """Rolling {last, samples, mean, std, zScore, slopePerMin} per field over the buffer window (None for unknown coins)."""
+        with self._lock:
+            i = self.name_to_idx.get(coin)
+            if i is None:
+                return None
+            out: Dict[str, Any] = {f: self._field_stats(i, _FIELD_IDX[f]) for f in (fields or FIELDS)}
+            order = self._order()
+            out["windowS"] = float(self.ts[order[-1]] - self.ts[order[0]]) if order.size else 0.0
+            return out
+
+    def delta(self, coin: str, field: str, minutes: float) -> Optional[Dict[str, Any]]:
+        """Change of `field` since the sample closest to `minutes` ago (the oldest one if history is shorter)."""
+        with self._lock:
+            i = self.name_to_idx.get(coin)
+            if i is None or self.size < 2:
+                return None
+            f = _FIELD_IDX[field]
+            order = self._order()
+            ts = self.ts[order]
+            j = max(int(np.searchsorted(ts, ts[-1] - float(minutes) * 60.0, side="right")) - 1, 0)
+            then, now = float(self.buf[order[j], i, f]), float(self.buf[order[-1], i, f])
+            span_s = float(ts[-1] - ts[j])
+        if np.isnan(then) or np.isnan(now):
+            return None
+        return {"from": then, "to": now, "delta": now - then, "pct": (now - then) / then if then else None, "spanS": span_s}
+
+    def info(self) -> Dict[str, Any]:
+        with self._lock:
+            order = self._order()
+            return {
+                "assets": len(self.names),
+                "samples": self.size,
+                "capacity": self.capacity,
+                "windowS": float(self.ts[order[-1]] - self.ts[order[0]]) if order.size else 0.0,
+                "bytes": int(self.buf.nbytes),
+            }
+
+
+def sampler_from_env() -> Optional[MarketSampler]:
+    """MarketSampler sized from HYPERLIQUID_SAMPLER_* env vars (None when HYPERLIQUID_SAMPLER=0)."""
+    if os.getenv("HYPERLIQUID_SAMPLER", "1") == "0":
+        return None
+    return MarketSampler(
+        capacity=int(os.getenv("HYPERLIQUID_SAMPLER_CAPACITY", "720")),
+        min_interval_ms=int(float(os.getenv("HYPERLIQUID_SAMPLER_EVERY_S", "5")) * 1000),
+    )
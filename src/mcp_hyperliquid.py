@@ -26,13 +26,48 @@ Then connect an MCP-compatible client via stdio using this command.
 
 from __future__ import annotations
 
+import asyncio
+import contextvars
+import inspect
+import json
 import os
+import threading
 import time
-from typing import Any, Dict, Optional, List, Tuple
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional, List, Tuple
 
+import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ProtocolError
+from urllib3.util.retry import Retry
 from mcp.server.fastmcp import FastMCP
-from ws_hyperliquid import fetch_orderbook_snapshot, fetch_recent_trades
+from asset_registry import AssetRegistry
+from funding_store import FundingStore, store_from_env
+from market_sampler import MarketSampler, sampler_from_env
+from info_scheduler import WeightScheduler, info_priority, request_weight, response_weight, scheduler_from_env
+from ttl_cache import TTLCache
+from ws_hyperliquid import (
+    afetch_candle_updates,
+    afetch_orderbook_snapshot,
+    afetch_orderbook_snapshots,
+    afetch_recent_trades,
+    afetch_recent_trades_many,
+    fetch_candle_updates,
+    fetch_orderbook_snapshot,
+    fetch_orderbook_snapshots,
+    fetch_recent_trades,
+    fetch_recent_trades_many,
+)
+
+try:  # Optional: async tools fall back to running the requests client in a thread
+    import httpx  # type: ignore
+    HTTPX_AVAILABLE = True
+except Exception:  # pragma: no cover
+    httpx = None  # type: ignore
+    HTTPX_AVAILABLE = False
 
 
 MAINNET_INFO = "https://api.hyperliquid.xyz/info"
@@ -47,190 +82,711 @@ def _select_info_base(network: str) -> str:
 
 
 _METRICS = {"info_calls": 0, "info_errors": 0}
+_METRICS_LOCK = threading.Lock()
+
+
+def _inc_metric(name: str, n: int = 1) -> None:
+    with _METRICS_LOCK:
+        _METRICS[name] = _METRICS.get(name, 0) + n
+
+
+_HTTP_SESSIONS: Dict[str, requests.Session] = {}
+_HTTP_SESSIONS_LOCK = threading.Lock()
+
+
+def _http_session(url: str) -> requests.Session:
+    """Keep-alive session with its own connection pool, one per Info base URL (i.e. per network)."""
+    sess = _HTTP_SESSIONS.get(url)
+    if sess is not None:
+        return sess
+    with _HTTP_SESSIONS_LOCK:
+        sess = _HTTP_SESSIONS.get(url)
+        if sess is None:
+            retries = int(os.getenv("HYPERLIQUID_HTTP_RETRIES", "3"))
+            # Only connect errors are retried here (the request never reached the API); read and
+            # status retries spend weight and go through the scheduler in _post_info
+            retry = Retry(
+                total=retries,
+                connect=retries,
+                read=0,
+                status=0,
+                other=0,
+                backoff_factor=float(os.getenv("HYPERLIQUID_HTTP_BACKOFF", "0.25")),
+                allowed_methods=frozenset({"POST"}),
+                raise_on_status=False,
+            )
+            adapter = HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=int(os.getenv("HYPERLIQUID_HTTP_POOL", "16")),
+                max_retries=retry,
+            )
+            sess = requests.Session()
+            sess.mount("https://", adapter)
+            sess.mount("http://", adapter)
+            sess.headers.update({"Content-Type": "application/json"})
+            if os.getenv("HYPERLIQUID_HTTP_KEEPALIVE", "1") == "0":
+                sess.headers["Connection"] = "close"
+            _HTTP_SESSIONS[url] = sess
+    return sess
+
+
+def _http_pool_stats() -> Dict[str, Any]:
+    out: Dict[str, Any] = {}
+    with _HTTP_SESSIONS_LOCK:
+        sessions = list(_HTTP_SESSIONS.items())
+    for url, sess in sessions:
+        adapter = sess.get_adapter(url)
+        stats: Dict[str, Any] = {"poolMaxsize": getattr(adapter, "_pool_maxsize", None), "connectionsOpened": 0, "requests": 0, "idle": 0}
+        try:
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                stats["connectionsOpened"] += pool.num_connections
+                stats["requests"] += pool.num_requests
+                # The pool queue is pre-filled with None placeholders; count real connections
+                stats["idle"] += sum(1 for c in list(pool.pool.queue) if c is not None) if pool.pool is not None else 0
+        except Exception:
+            pass
+        out[url] = stats
+    return out
+
+
+# One weight budget per network (the limit is per IP and per API host)
+_SCHEDULERS: Dict[str, Optional[WeightScheduler]] = {}
+_SCHEDULERS_LOCK = threading.Lock()
+
+
+def _info_scheduler(network: str) -> Optional[WeightScheduler]:
+    url = _select_info_base(network)
+    with _SCHEDULERS_LOCK:
+        if url not in _SCHEDULERS:
+            _SCHEDULERS[url] = scheduler_from_env()
+        return _SCHEDULERS[url]
 
 
 def _post_info(payload: Dict[str, Any], network: str) -> Any:
     url = _select_info_base(network)
     # Allow override of timeout via env
     timeout_s = float(os.getenv("HYPERLIQUID_HTTP_TIMEOUT", "20"))
-    headers = {"Content-Type": "application/json"}
-    _METRICS["info_calls"] += 1
-    resp = requests.post(url, json=payload, headers=headers, timeout=timeout_s)
+    retries = int(os.getenv("HYPERLIQUID_HTTP_RETRIES", "3"))
+    backoff = float(os.getenv("HYPERLIQUID_HTTP_BACKOFF", "0.25"))
+    scheduler = _info_scheduler(network)
+    _inc_metric("info_calls")
+    session = _http_session(url)
+    attempt = 0
+    while True:
+        # Every attempt spends weight upstream, retries included (same policy as _apost_info)
+        if scheduler is not None:
+            scheduler.acquire(request_weight(payload))
+        try:
+            resp = session.post(url, json=payload, timeout=timeout_s)
+        except (requests.ReadTimeout, requests.ConnectionError) as e:
+            # ConnectionError wrapping ProtocolError is a dropped connection after the send
+            dropped = isinstance(e, requests.ReadTimeout) or (e.args and isinstance(e.args[0], ProtocolError))
+            if not dropped or attempt >= retries:
+                raise
+        else:
+            if resp.status_code not in (429, 500, 502, 503, 504) or attempt >= retries:
+                break
+        time.sleep(backoff * (2 ** attempt))
+        attempt += 1
     try:
         resp.raise_for_status()
     except requests.HTTPError as e:
         # Attach body for easier debugging in client
-        _METRICS["info_errors"] += 1
+        _inc_metric("info_errors")
+        raise RuntimeError(f"Hyperliquid info request failed: {e}; body={resp.text}") from e
+    try:
+        data = resp.json()
+    except Exception as e:
+        _inc_metric("info_errors")
+        raise RuntimeError(f"Failed to parse JSON from Hyperliquid: {e}; body={resp.text[:512]}") from e
+    if scheduler is not None:
+        scheduler.charge(response_weight(payload, data))
+    return data
+
+
+# Async clients are bound to the event loop that created them: event loop -> {url: AsyncClient}.
+# Pooled connections keep their loop alive, so entries of closed loops are also pruned whenever
+# a new loop registers; aclose_http_clients() closes a loop's clients from its shutdown path.
+_ASYNC_CLIENTS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, Any]]" = weakref.WeakKeyDictionary()
+_ASYNC_CLIENTS_LOCK = threading.Lock()
+
+
+async def aclose_http_clients() -> None:
+    """Close the running loop's pooled httpx clients (call before the loop is closed)."""
+    with _ASYNC_CLIENTS_LOCK:
+        clients = _ASYNC_CLIENTS.pop(asyncio.get_running_loop(), {})
+    for client in clients.values():
+        try:
+            await client.aclose()
+        except Exception:
+            pass
+
+
+def _async_client(url: str) -> Any:
+    loop = asyncio.get_running_loop()
+    with _ASYNC_CLIENTS_LOCK:
+        clients = _ASYNC_CLIENTS.get(loop)
+        if clients is None:
+            for old in [l for l in _ASYNC_CLIENTS.keys() if l.is_closed()]:
+                del _ASYNC_CLIENTS[old]
+            clients = _ASYNC_CLIENTS[loop] = {}
+        client = clients.get(url)
+        if client is None or client.is_closed:
+            pool = int(os.getenv("HYPERLIQUID_HTTP_POOL", "16"))
+            headers = {"Content-Type": "application/json"}
+            if os.getenv("HYPERLIQUID_HTTP_KEEPALIVE", "1") == "0":
+                headers["Connection"] = "close"
+            client = httpx.AsyncClient(
+                headers=headers,
+                limits=httpx.Limits(max_connections=pool, max_keepalive_connections=pool),
+                # transport-level retries cover connect errors; status retries are below
+                transport=httpx.AsyncHTTPTransport(retries=int(os.getenv("HYPERLIQUID_HTTP_RETRIES", "3"))),
+            )
+            clients[url] = client
+    return client
+
+
+async def _apost_info(payload: Dict[str, Any], network: str) -> Any:
+    """Async _post_info: same metrics, errors and retry policy, on a pooled httpx.AsyncClient."""
+    if not HTTPX_AVAILABLE:
+        return await asyncio.to_thread(_post_info, payload, network)
+    url = _select_info_base(network)
+    timeout_s = float(os.getenv("HYPERLIQUID_HTTP_TIMEOUT", "20"))
+    retries = int(os.getenv("HYPERLIQUID_HTTP_RETRIES", "3"))
+    backoff = float(os.getenv("HYPERLIQUID_HTTP_BACKOFF", "0.25"))
+    scheduler = _info_scheduler(network)
+    _inc_metric("info_calls")
+    client = _async_client(url)
+    attempt = 0
+    while True:
+        # Every attempt spends weight upstream, retries included
+        if scheduler is not None:
+            await scheduler.aacquire(request_weight(payload))
+        try:
+            resp = await client.post(url, json=payload, timeout=timeout_s)
+        except (httpx.ReadError, httpx.ReadTimeout, httpx.RemoteProtocolError):
+            if attempt >= retries:
+                raise
+        else:
+            if resp.status_code not in (429, 500, 502, 503, 504) or attempt >= retries:
+                break
+        await asyncio.sleep(backoff * (2 ** attempt))
+        attempt += 1
+    try:
+        resp.raise_for_status()
+    except httpx.HTTPStatusError as e:
+        _inc_metric("info_errors")
         raise RuntimeError(f"Hyperliquid info request failed: {e}; body={resp.text}") from e
     try:
-        return resp.json()
+        data = resp.json()
     except Exception as e:
-        _METRICS["info_errors"] += 1
+        _inc_metric("info_errors")
         raise RuntimeError(f"Failed to parse JSON from Hyperliquid: {e}; body={resp.text[:512]}") from e
+    if scheduler is not None:
+        scheduler.charge(response_weight(payload, data))
+    return data
+
 
+@asynccontextmanager
+async def _server_lifespan(_server: Any) -> AsyncIterator[None]:
+    try:
+        yield
+    finally:
+        await aclose_http_clients()
 
-mcp = FastMCP("hyperliquid-info")
+
+mcp = FastMCP("hyperliquid-info", lifespan=_server_lifespan)
+
+
+############################
+# Info tools
+#
+# Each tool is split into a pure payload builder / result shaper and thin sync
+# (requests) and async (httpx) wrappers that only do the I/O.
+############################
+
+
+def _info_raw_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
+    if not isinstance(payload, dict) or "type" not in payload:
+        raise ValueError("payload must be an object and include a 'type' field")
+    return payload
 
 
-@mcp.tool()
 def info_raw(payload: Dict[str, Any], network: str = "mainnet") -> Dict[str, Any]:
     """Call Hyperliquid /info with an arbitrary payload.
 
     - payload: JSON body to POST (must include key 'type')
     - network: 'mainnet' (default) or 'testnet'
     """
-    if not isinstance(payload, dict) or "type" not in payload:
-        raise ValueError("payload must be an object and include a 'type' field")
-    data = _post_info(payload, network)
+    data = _post_info(_info_raw_payload(payload), network)
     return {"ok": True, "type": payload.get("type"), "data": data}
 
 
-@mcp.tool()
-def get_perp_dexs(network: str = "mainnet") -> Dict[str, Any]:
-    """List perpetual DEXs (type=perpDexs)."""
-    data = _post_info({"type": "perpDexs"}, network)
+async def ainfo_raw(payload: Dict[str, Any], network: str = "mainnet") -> Dict[str, Any]:
+    data = await _apost_info(_info_raw_payload(payload), network)
+    return {"ok": True, "type": payload.get("type"), "data": data}
+
+
+def _perp_dexs_result(data: Any) -> Dict[str, Any]:
     summary = f"{len(data) if isinstance(data, list) else 0} entries"
     return {"ok": True, "data": data, "summary": summary}
 
 
-@mcp.tool()
-def get_meta(dex: str = "", network: str = "mainnet") -> Dict[str, Any]:
-    """Retrieve perpetuals metadata (type=meta)."""
+def get_perp_dexs(network: str = "mainnet") -> Dict[str, Any]:
+    """List perpetual DEXs (type=perpDexs)."""
+    return _perp_dexs_result(_post_info({"type": "perpDexs"}, network))
+
+
+async def aget_perp_dexs(network: str = "mainnet") -> Dict[str, Any]:
+    return _perp_dexs_result(await _apost_info({"type": "perpDexs"}, network))
+
+
+def _meta_payload(dex: str) -> Dict[str, Any]:
     payload = {"type": "meta"}
     if dex:
         payload["dex"] = dex
-    data = _post_info(payload, network)
+    return payload
+
+
+def _meta_result(data: Any) -> Dict[str, Any]:
     uni = data.get("universe", []) if isinstance(data, dict) else []
     summary = f"{len(uni)} assets in universe"
     return {"ok": True, "data": data, "summary": summary}
 
 
-@mcp.tool()
-def get_meta_and_asset_ctxs(network: str = "mainnet") -> Dict[str, Any]:
-    """Retrieve perpetuals asset contexts (type=metaAndAssetCtxs)."""
-    data = _post_info({"type": "metaAndAssetCtxs"}, network)
+def get_meta(dex: str = "", network: str = "mainnet") -> Dict[str, Any]:
+    """Retrieve perpetuals metadata (type=meta)."""
+    return _meta_result(_post_info(_meta_payload(dex), network))
+
+
+async def aget_meta(dex: str = "", network: str = "mainnet") -> Dict[str, Any]:
+    return _meta_result(await _apost_info(_meta_payload(dex), network))
+
+
+def _meta_and_asset_ctxs_result(data: Any) -> Dict[str, Any]:
     uni = data[0].get("universe", []) if isinstance(data, list) and data and isinstance(data[0], dict) else []
     ctxs = data[1] if isinstance(data, list) and len(data) > 1 else []
     summary = f"universe {len(uni)} / ctxs {len(ctxs)}"
     return {"ok": True, "data": data, "summary": summary}
 
 
-@mcp.tool()
-def get_clearinghouse_state(user: str, dex: str = "", network: str = "mainnet") -> Dict[str, Any]:
-    """Retrieve user's perpetuals account summary (type=clearinghouseState).
+def get_meta_and_asset_ctxs(network: str = "mainnet") -> Dict[str, Any]:
+    """Retrieve perpetuals asset contexts (type=metaAndAssetCtxs)."""
+    return _meta_and_asset_ctxs_result(_post_info({"type": "metaAndAssetCtxs"}, network))
 
-    - user: 42-char hex address, e.g., 0x...
-    - dex: perp dex name (optional)
-    """
+
+async def aget_meta_and_asset_ctxs(network: str = "mainnet") -> Dict[str, Any]:
+    return _meta_and_asset_ctxs_result(await _apost_info({"type": "metaAndAssetCtxs"}, network))
+
+
+def _clearinghouse_state_payload(user: str, dex: str) -> Dict[str, Any]:
     if not isinstance(user, str) or not user.startswith("0x"):
         raise ValueError("user must be a 0x-prefixed address string")
     payload = {"type": "clearinghouseState", "user": user}
     if dex:
         payload["dex"] = dex
-    data = _post_info(payload, network)
+    return payload
+
+
+def _clearinghouse_state_result(data: Any) -> Dict[str, Any]:
     ms = data.get("marginSummary", {}) if isinstance(data, dict) else {}
     positions = data.get("assetPositions", []) if isinstance(data, dict) else []
     summary = f"acct {ms.get('accountValue')} ntl {ms.get('totalNtlPos')} pos {len(positions)}"
     return {"ok": True, "data": data, "summary": summary}
 
 
-@mcp.tool()
-def get_user_funding(user: str, startTime: int, endTime: Optional[int] = None, network: str = "mainnet") -> Dict[str, Any]:
-    """Retrieve user's funding history (type=userFunding).
+def get_clearinghouse_state(user: str, dex: str = "", network: str = "mainnet") -> Dict[str, Any]:
+    """Retrieve user's perpetuals account summary (type=clearinghouseState).
 
-    - startTime/endTime in milliseconds; endTime optional (defaults to now)
+    - user: 42-char hex address, e.g., 0x...
+    - dex: perp dex name (optional)
     """
-    payload: Dict[str, Any] = {"type": "userFunding", "user": user, "startTime": int(startTime)}
+    return _clearinghouse_state_result(_post_info(_clearinghouse_state_payload(user, dex), network))
+
+
+async def aget_clearinghouse_state(user: str, dex: str = "", network: str = "mainnet") -> Dict[str, Any]:
+    return _clearinghouse_state_result(await _apost_info(_clearinghouse_state_payload(user, dex), network))
+
+
+def _window_payload(kind: str, key: str, value: str, startTime: int, endTime: Optional[int]) -> Dict[str, Any]:
+    payload: Dict[str, Any] = {"type": kind, key: value, "startTime": int(startTime)}
     if endTime is not None:
         payload["endTime"] = int(endTime)
-    data = _post_info(payload, network)
+    return payload
+
+
+############################
+# Time-sliced history
+#
+# Windowed history endpoints return at most HYPERLIQUID_HISTORY_PAGE_LIMIT rows
+# per request. Long windows are cut into HYPERLIQUID_HISTORY_SLICE_H slices
+# fetched concurrently; a full page continues from its last timestamp, and
+# rows are stitched in time order with boundary duplicates removed.
+############################
+
+
+def _history_slices(startTime: int, endTime: Optional[int]) -> List[Tuple[int, int]]:
+    end = int(endTime) if endTime is not None else _now_ms()
+    start = int(startTime)
+    step = max(1, int(float(os.getenv("HYPERLIQUID_HISTORY_SLICE_H", "240")) * 3_600_000))
+    slices: List[Tuple[int, int]] = []
+    while start <= end:
+        slices.append((start, min(start + step - 1, end)))
+        start += step
+    return slices
+
+
+def _page_limit() -> int:
+    return int(os.getenv("HYPERLIQUID_HISTORY_PAGE_LIMIT", "500"))
+
+
+def _next_page_start(rows: Any, start: int) -> Optional[int]:
+    """Start of the next page when `rows` is a full page, else None."""
+    if not isinstance(rows, list) or len(rows) < _page_limit():
+        return None
+    try:
+        last = max(int(r.get("time")) for r in rows if isinstance(r, dict))
+    except (TypeError, ValueError):
+        return None
+    # Resume at the last timestamp (rows sharing it are de-duplicated); never loop in place
+    return last if last > start else None
+
+
+def _fetch_slice(kind: str, key: str, value: str, start: int, end: int, network: str) -> List[Dict[str, Any]]:
+    rows: List[Dict[str, Any]] = []
+    while True:
+        page = _post_info(_window_payload(kind, key, value, start, end), network)
+        rows.extend(page if isinstance(page, list) else [])
+        start = _next_page_start(page, start)
+        if start is None:
+            return rows
+
+
+async def _afetch_slice(kind: str, key: str, value: str, start: int, end: int, network: str) -> List[Dict[str, Any]]:
+    rows: List[Dict[str, Any]] = []
+    while True:
+        page = await _apost_info(_window_payload(kind, key, value, start, end), network)
+        rows.extend(page if isinstance(page, list) else [])
+        start = _next_page_start(page, start)
+        if start is None:
+            return rows
+
+
+class _Deduper:
+    def __init__(self) -> None:
+        self.seen: set = set()
+
+    def __call__(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        out: List[Dict[str, Any]] = []
+        for r in sorted(rows, key=lambda r: (r.get("time") or 0) if isinstance(r, dict) else 0):
+            k = json.dumps(r, sort_keys=True, default=str)
+            if k not in self.seen:
+                self.seen.add(k)
+                out.append(r)
+        return out
+
+
+def iter_history(kind: str, key: str, value: str, startTime: int, endTime: Optional[int] = None, network: str = "mainnet") -> Iterator[List[Dict[str, Any]]]:
+    """Yield de-duplicated rows slice by slice in time order while later slices are still fetching."""
+    slices = _history_slices(startTime, endTime)
+    dedupe = _Deduper()
+    if len(slices) == 1:
+        yield dedupe(_fetch_slice(kind, key, value, slices[0][0], slices[0][1], network))
+        return
+    workers = min(len(slices), int(os.getenv("HYPERLIQUID_HISTORY_WORKERS", "6")))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # Each slice runs in a copy of this context so the caller's info_priority applies
+        futures = [pool.submit(contextvars.copy_context().run, _fetch_slice, kind, key, value, s, e, network) for s, e in slices]
+        for fut in futures:
+            yield dedupe(fut.result())
+
+
+async def aiter_history(kind: str, key: str, value: str, startTime: int, endTime: Optional[int] = None, network: str = "mainnet") -> AsyncIterator[List[Dict[str, Any]]]:
+    slices = _history_slices(startTime, endTime)
+    dedupe = _Deduper()
+    # Same bound as the thread pool in iter_history; slices acquire it in time order
+    limit = asyncio.Semaphore(max(1, int(os.getenv("HYPERLIQUID_HISTORY_WORKERS", "6"))))
+
+    async def _bounded(start: int, end: int) -> List[Dict[str, Any]]:
+        async with limit:
+            return await _afetch_slice(kind, key, value, start, end, network)
+
+    tasks = [asyncio.ensure_future(_bounded(s, e)) for s, e in slices]
+    try:
+        for task in tasks:
+            yield dedupe(await task)
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def _history(kind: str, key: str, value: str, startTime: int, endTime: Optional[int], network: str) -> List[Dict[str, Any]]:
+    rows: List[Dict[str, Any]] = []
+    for chunk in iter_history(kind, key, value, startTime, endTime, network):
+        rows.extend(chunk)
+    return rows
+
+
+async def _ahistory(kind: str, key: str, value: str, startTime: int, endTime: Optional[int], network: str) -> List[Dict[str, Any]]:
+    rows: List[Dict[str, Any]] = []
+    async for chunk in aiter_history(kind, key, value, startTime, endTime, network):
+        rows.extend(chunk)
+    return rows
+
+
+def _events_result(data: Any) -> Dict[str, Any]:
     summary = f"events {len(data) if isinstance(data, list) else 0}"
     return {"ok": True, "data": data, "summary": summary}
 
 
-@mcp.tool()
+def get_user_funding(user: str, startTime: int, endTime: Optional[int] = None, network: str = "mainnet") -> Dict[str, Any]:
+    """Retrieve user's funding history (type=userFunding).
+
+    - startTime/endTime in milliseconds; endTime optional (defaults to now)
+    - long windows are fetched as concurrent time slices and stitched
+    """
+    return _events_result(_history("userFunding", "user", user, startTime, endTime, network))
+
+
+async def aget_user_funding(user: str, startTime: int, endTime: Optional[int] = None, network: str = "mainnet") -> Dict[str, Any]:
+    return _events_result(await _ahistory("userFunding", "user", user, startTime, endTime, network))
+
+
 def get_user_non_funding_ledger_updates(user: str, startTime: int, endTime: Optional[int] = None, network: str = "mainnet") -> Dict[str, Any]:
     """Retrieve user's non-funding ledger updates (type=userNonFundingLedgerUpdates)."""
-    payload: Dict[str, Any] = {
-        "type": "userNonFundingLedgerUpdates",
-        "user": user,
-        "startTime": int(startTime),
-    }
-    if endTime is not None:
-        payload["endTime"] = int(endTime)
-    data = _post_info(payload, network)
-    summary = f"events {len(data) if isinstance(data, list) else 0}"
+    return _events_result(_history("userNonFundingLedgerUpdates", "user", user, startTime, endTime, network))
+
+
+async def aget_user_non_funding_ledger_updates(user: str, startTime: int, endTime: Optional[int] = None, network: str = "mainnet") -> Dict[str, Any]:
+    return _events_result(await _ahistory("userNonFundingLedgerUpdates", "user", user, startTime, endTime, network))
+
+
+def _funding_history_result(data: Any) -> Dict[str, Any]:
+    summary = f"points {len(data) if isinstance(data, list) else 0}"
     return {"ok": True, "data": data, "summary": summary}
 
 
-@mcp.tool()
+############################
+# Funding history store
+############################
+
+# Opened on first use (not at import), so importing the module never creates HYPERLIQUID_FUNDING_DB
+_FUNDING_STORE: Optional[FundingStore] = None
+_FUNDING_STORE_OPENED = False
+_FUNDING_STORE_LOCK = threading.Lock()
+
+
+def _funding_store() -> Optional[FundingStore]:
+    global _FUNDING_STORE, _FUNDING_STORE_OPENED
+    with _FUNDING_STORE_LOCK:
+        if not _FUNDING_STORE_OPENED:
+            _FUNDING_STORE = store_from_env()
+            _FUNDING_STORE_OPENED = True
+        return _FUNDING_STORE
+
+
+def _funding_synced(coin: str, start: int, end: int, network: str) -> Optional[FundingStore]:
+    """Bring the local store up to date for [start, end]; returns it (None when the store is unavailable)."""
+    store = _funding_store()
+    if store is None:
+        return None
+    now = _now_ms()
+    ranges = store.missing(network, coin, start, end, now)
+    if ranges:
+        rows: List[Dict[str, Any]] = []
+        for s, e in ranges:
+            rows.extend(_history("fundingHistory", "coin", coin, s, e, network))
+        store.record(network, coin, rows, start, end, now)
+    return store
+
+
+async def _afunding_synced(coin: str, start: int, end: int, network: str) -> Optional[FundingStore]:
+    store = await asyncio.to_thread(_funding_store)
+    if store is None:
+        return None
+    now = _now_ms()
+    ranges = await asyncio.to_thread(store.missing, network, coin, start, end, now)
+    if ranges:
+        chunks = await asyncio.gather(*[_ahistory("fundingHistory", "coin", coin, s, e, network) for s, e in ranges])
+        rows = [r for chunk in chunks for r in chunk]
+        await asyncio.to_thread(store.record, network, coin, rows, start, end, now)
+    return store
+
+
 def get_funding_history(coin: str, startTime: int, endTime: Optional[int] = None, network: str = "mainnet") -> Dict[str, Any]:
-    """Retrieve historical funding rates (type=fundingHistory)."""
-    payload: Dict[str, Any] = {"type": "fundingHistory", "coin": coin, "startTime": int(startTime)}
-    if endTime is not None:
-        payload["endTime"] = int(endTime)
-    data = _post_info(payload, network)
-    summary = f"points {len(data) if isinstance(data, list) else 0}"
+    """Retrieve historical funding rates (type=fundingHistory).
+
+    - served from the local funding store; only the part of the window not yet synced is fetched
+    - long windows are fetched as concurrent slices
+    """
+    end = int(endTime) if endTime is not None else _now_ms()
+    store = _funding_synced(coin, startTime, end, network)
+    if store is not None:
+        return _funding_history_result(store.rows(network, coin, startTime, end))
+    return _funding_history_result(_history("fundingHistory", "coin", coin, startTime, end, network))
+
+
+async def aget_funding_history(coin: str, startTime: int, endTime: Optional[int] = None, network: str = "mainnet") -> Dict[str, Any]:
+    end = int(endTime) if endTime is not None else _now_ms()
+    store = await _afunding_synced(coin, startTime, end, network)
+    if store is not None:
+        return _funding_history_result(await asyncio.to_thread(store.rows, network, coin, startTime, end))
+    return _funding_history_result(await _ahistory("fundingHistory", "coin", coin, startTime, end, network))
+
+
+def _funding_aggregate(rows: List[Dict[str, Any]], coin: str) -> Dict[str, Any]:
+    # Same shape as FundingStore.aggregate, for when the store is disabled
+    vals: List[float] = []
+    for r in rows:
+        try:
+            vals.append(float(r.get("fundingRate")))
+        except (TypeError, ValueError):
+            continue
+    rates = np.array(vals, dtype=np.float64)
+    times = [int(r["time"]) for r in rows if r.get("time") is not None]
+    avg = float(rates.mean()) if rates.size else None
+    return {
+        "coin": coin,
+        "points": int(rates.size),
+        "avg": avg,
+        "sum": float(rates.sum()) if rates.size else None,
+        "min": float(rates.min()) if rates.size else None,
+        "max": float(rates.max()) if rates.size else None,
+        "annualized": avg * 24 * 365 if avg is not None else None,
+        "firstTime": min(times) if times else None,
+        "lastTime": max(times) if times else None,
+    }
+
+
+def _funding_summary_result(agg: Dict[str, Any], start: int, end: int) -> Dict[str, Any]:
+    data = dict(agg, startTime=int(start), endTime=int(end))
+    if agg.get("avg") is None:
+        return {"ok": True, "data": data, "summary": f"{agg.get('coin')} funding: no data"}
+    summary = f"{agg['coin']} funding avg {agg['avg']:.6g} sum {agg['sum']:.6g} annualized {agg['annualized']:.2%} over {agg['points']} points"
+    return {"ok": True, "data": data, "summary": summary}
+
+
+def get_funding_summary(coin: str, startTime: int, endTime: Optional[int] = None, network: str = "mainnet") -> Dict[str, Any]:
+    """Window aggregates of hourly funding for a coin: points, avg, sum, min, max and annualized rate (avg * 24 * 365).
+
+    Computed from the local funding store, so repeat windows need no API calls.
+    """
+    end = int(endTime) if endTime is not None else _now_ms()
+    store = _funding_synced(coin, startTime, end, network)
+    if store is not None:
+        agg = store.aggregate(network, coin, startTime, end)
+    else:
+        agg = _funding_aggregate(_history("fundingHistory", "coin", coin, startTime, end, network), coin)
+    return _funding_summary_result(agg, startTime, end)
+
+
+async def aget_funding_summary(coin: str, startTime: int, endTime: Optional[int] = None, network: str = "mainnet") -> Dict[str, Any]:
+    end = int(endTime) if endTime is not None else _now_ms()
+    store = await _afunding_synced(coin, startTime, end, network)
+    if store is not None:
+        agg = await asyncio.to_thread(store.aggregate, network, coin, startTime, end)
+    else:
+        agg = _funding_aggregate(await _ahistory("fundingHistory", "coin", coin, startTime, end, network), coin)
+    return _funding_summary_result(agg, startTime, end)
+
+
+def _predicted_fundings_result(data: Any) -> Dict[str, Any]:
+    summary = f"coins {len(data) if isinstance(data, list) else 0}"
     return {"ok": True, "data": data, "summary": summary}
 
 
-@mcp.tool()
 def get_predicted_fundings(network: str = "mainnet") -> Dict[str, Any]:
     """Retrieve predicted funding rates for different venues (type=predictedFundings)."""
-    data = _post_info({"type": "predictedFundings"}, network)
-    summary = f"coins {len(data) if isinstance(data, list) else 0}"
+    return _predicted_fundings_result(_post_info({"type": "predictedFundings"}, network))
+
+
+async def aget_predicted_fundings(network: str = "mainnet") -> Dict[str, Any]:
+    return _predicted_fundings_result(await _apost_info({"type": "predictedFundings"}, network))
+
+
+def _oi_cap_result(data: Any) -> Dict[str, Any]:
+    summary = ", ".join(data[:5]) + ("..." if isinstance(data, list) and len(data) > 5 else "") if isinstance(data, list) else ""
     return {"ok": True, "data": data, "summary": summary}
 
 
-@mcp.tool()
 def get_perps_at_open_interest_cap(network: str = "mainnet") -> Dict[str, Any]:
     """Query perps at open interest caps (type=perpsAtOpenInterestCap)."""
-    data = _post_info({"type": "perpsAtOpenInterestCap"}, network)
-    summary = ", ".join(data[:5]) + ("..." if isinstance(data, list) and len(data) > 5 else "") if isinstance(data, list) else ""
+    return _oi_cap_result(_post_info({"type": "perpsAtOpenInterestCap"}, network))
+
+
+async def aget_perps_at_open_interest_cap(network: str = "mainnet") -> Dict[str, Any]:
+    return _oi_cap_result(await _apost_info({"type": "perpsAtOpenInterestCap"}, network))
+
+
+def _auction_status_result(data: Any) -> Dict[str, Any]:
+    summary = f"start {data.get('startTimeSeconds')} dur {data.get('durationSeconds')}"
     return {"ok": True, "data": data, "summary": summary}
 
 
-@mcp.tool()
 def get_perp_deploy_auction_status(network: str = "mainnet") -> Dict[str, Any]:
     """Retrieve information about the Perp Deploy Auction (type=perpDeployAuctionStatus)."""
-    data = _post_info({"type": "perpDeployAuctionStatus"}, network)
-    summary = f"start {data.get('startTimeSeconds')} dur {data.get('durationSeconds')}"
-    return {"ok": True, "data": data, "summary": summary}
+    return _auction_status_result(_post_info({"type": "perpDeployAuctionStatus"}, network))
 
 
-@mcp.tool()
-def get_active_asset_data(user: str, coin: str, network: str = "mainnet") -> Dict[str, Any]:
-    """Retrieve User's Active Asset Data (type=activeAssetData)."""
+async def aget_perp_deploy_auction_status(network: str = "mainnet") -> Dict[str, Any]:
+    return _auction_status_result(await _apost_info({"type": "perpDeployAuctionStatus"}, network))
+
+
+def _active_asset_payload(user: str, coin: str) -> Dict[str, Any]:
     if not isinstance(user, str) or not user.startswith("0x"):
         raise ValueError("user must be a 0x-prefixed address string")
-    payload = {"type": "activeAssetData", "user": user, "coin": coin}
-    data = _post_info(payload, network)
+    return {"type": "activeAssetData", "user": user, "coin": coin}
+
+
+def _active_asset_result(data: Any) -> Dict[str, Any]:
     lev = data.get("leverage", {}) if isinstance(data, dict) else {}
     summary = f"lev {lev.get('type')}/{lev.get('value')} mark {data.get('markPx')}"
     return {"ok": True, "data": data, "summary": summary}
 
 
-@mcp.tool()
-def get_perp_dex_limits(dex: str, network: str = "mainnet") -> Dict[str, Any]:
-    """Retrieve Builder-Deployed Perp Market Limits (type=perpDexLimits)."""
+def get_active_asset_data(user: str, coin: str, network: str = "mainnet") -> Dict[str, Any]:
+    """Retrieve User's Active Asset Data (type=activeAssetData)."""
+    return _active_asset_result(_post_info(_active_asset_payload(user, coin), network))
+
+
+async def aget_active_asset_data(user: str, coin: str, network: str = "mainnet") -> Dict[str, Any]:
+    return _active_asset_result(await _apost_info(_active_asset_payload(user, coin), network))
+
+
+def _perp_dex_limits_payload(dex: str) -> Dict[str, Any]:
     if not dex:
         raise ValueError("dex must be a non-empty string")
-    payload = {"type": "perpDexLimits", "dex": dex}
-    data = _post_info(payload, network)
+    return {"type": "perpDexLimits", "dex": dex}
+
+
+def _perp_dex_limits_result(data: Any) -> Dict[str, Any]:
     summary = f"oiCap {data.get('totalOiCap')} perPerp {data.get('oiSzCapPerPerp')}"
     return {"ok": True, "data": data, "summary": summary}
 
 
-@mcp.tool()
+def get_perp_dex_limits(dex: str, network: str = "mainnet") -> Dict[str, Any]:
+    """Retrieve Builder-Deployed Perp Market Limits (type=perpDexLimits)."""
+    return _perp_dex_limits_result(_post_info(_perp_dex_limits_payload(dex), network))
+
+
+async def aget_perp_dex_limits(dex: str, network: str = "mainnet") -> Dict[str, Any]:
+    return _perp_dex_limits_result(await _apost_info(_perp_dex_limits_payload(dex), network))
+
+
 def server_time_ms() -> Dict[str, int]:
     """Return server time in milliseconds (utility)."""
     return {"timeMs": int(time.time() * 1000)}
 
 
-@mcp.tool()
-def get_orderbook(coin: str, network: str = "mainnet", depth: int = 50) -> Dict[str, Any]:
-    """Fetch current orderbook snapshot via WS l2Book subscription."""
-    data = fetch_orderbook_snapshot(coin=coin, network=network, depth=depth)
+async def aserver_time_ms() -> Dict[str, int]:
+    return server_time_ms()
+
+
+def _orderbook_result(data: Dict[str, Any]) -> Dict[str, Any]:
     topb = data.get("bids", [[]])
     topa = data.get("asks", [[]])
     bb = topb[0][0] if topb and topb[0] else None
@@ -239,10 +795,16 @@ def get_orderbook(coin: str, network: str = "mainnet", depth: int = 50) -> Dict[
     return {"ok": True, "data": data, "summary": summary}
 
 
-@mcp.tool()
-def get_recent_trades(coin: str, network: str = "mainnet", maxMessages: int = 5) -> Dict[str, Any]:
-    """Fetch recent trades via WS trades subscription."""
-    data = fetch_recent_trades(coin=coin, network=network, max_messages=maxMessages)
+def get_orderbook(coin: str, network: str = "mainnet", depth: int = 50) -> Dict[str, Any]:
+    """Fetch current orderbook snapshot via WS l2Book subscription (shared per-coin cache)."""
+    return _orderbook_result(_orderbook_cached(coin, network, depth))
+
+
+async def aget_orderbook(coin: str, network: str = "mainnet", depth: int = 50) -> Dict[str, Any]:
+    return _orderbook_result(await _aorderbook_cached(coin, network, depth))
+
+
+def _recent_trades_result(data: List[Dict[str, Any]]) -> Dict[str, Any]:
     latest = None
     try:
         row = (data[-1].get('data') or data[-1]) if data else {}
@@ -253,63 +815,325 @@ def get_recent_trades(coin: str, network: str = "mainnet", maxMessages: int = 5)
     return {"ok": True, "data": data, "summary": summary}
 
 
+def get_recent_trades(coin: str, network: str = "mainnet", maxMessages: int = 5) -> Dict[str, Any]:
+    """Fetch recent trades via WS trades subscription."""
+    return _recent_trades_result(fetch_recent_trades(coin=coin, network=network, max_messages=maxMessages))
+
+
+async def aget_recent_trades(coin: str, network: str = "mainnet", maxMessages: int = 5) -> Dict[str, Any]:
+    return _recent_trades_result(await afetch_recent_trades(coin=coin, network=network, max_messages=maxMessages))
+
+
 ############################
 # Caching and analytics
 ############################
 
-_CACHE: Dict[str, Dict[str, Any]] = {}
+# Bounded TTL/LRU cache shared by sync and async readers; misses on the same key
+# are single-flight, so concurrent tools wait for one fetch instead of each fetching
+_CACHE = TTLCache(
+    max_entries=int(os.getenv("HYPERLIQUID_CACHE_MAX_ENTRIES", "2048")),
+    max_bytes=int(float(os.getenv("HYPERLIQUID_CACHE_MAX_MB", "64")) * (1 << 20)),
+)
 
 
 def _now_ms() -> int:
     return int(time.time() * 1000)
 
 
-def _get_cache(key: str) -> Optional[Dict[str, Any]]:
-    entry = _CACHE.get(key)
-    if not entry:
-        return None
-    ttl_ms = entry.get("ttlMs", 0)
-    if _now_ms() - entry.get("ts", 0) > ttl_ms:
-        return None
-    return entry.get("value")
+def _get_cache(key: str) -> Any:
+    return _CACHE.get(key)
 
 
 def _set_cache(key: str, value: Any, ttl_ms: int) -> None:
-    _CACHE[key] = {"value": value, "ts": _now_ms(), "ttlMs": ttl_ms}
+    _CACHE.set(key, value, ttl_ms / 1000.0)
+
+
+def _ctxs_ttl() -> float:
+    return float(os.getenv("HYPERLIQUID_CTXS_TTL", "5"))
+
+
+def _ctxs_refresh_s() -> float:
+    return float(os.getenv("HYPERLIQUID_CTXS_REFRESH_S", "10"))
+
+
+# (universe, ctxs, registry, fetch ts in ms); the ts travels with the cached value
+_MetaCtxs = Tuple[Dict[str, Any], List[Dict[str, Any]], AssetRegistry, int]
+
+
+def _split_meta_ctxs(data: Any) -> _MetaCtxs:
+    # The registry (index map + columns) is built once per fetched snapshot
+    return data[0], data[1], AssetRegistry(data[0], data[1]), _now_ms()
+
+
+def _load_meta_ctxs(network: str) -> _MetaCtxs:
+    return _CACHE.get_or_load(
+        f"ctxs:{network}",
+        lambda: _split_meta_ctxs(_post_info({"type": "metaAndAssetCtxs"}, network)),
+        _ctxs_ttl(),
+    )
+
+
+async def _aload_meta_ctxs(network: str) -> _MetaCtxs:
+    async def _load() -> _MetaCtxs:
+        return _split_meta_ctxs(await _apost_info({"type": "metaAndAssetCtxs"}, network))
+    return await _CACHE.aget_or_load(f"ctxs:{network}", _load, _ctxs_ttl())
+
+
+_SAMPLERS: Dict[str, Optional[MarketSampler]] = {}
+_SAMPLERS_LOCK = threading.Lock()
+
+
+def _market_sampler(network: str) -> Optional[MarketSampler]:
+    with _SAMPLERS_LOCK:
+        if network not in _SAMPLERS:
+            _SAMPLERS[network] = sampler_from_env()
+        return _SAMPLERS[network]
+
+
+def _sample(network: str, ts_ms: int, registry: AssetRegistry) -> None:
+    """Feed a ctxs snapshot to the network's rolling sampler (premium/funding/OI/mark history)."""
+    sampler = _market_sampler(network)
+    if sampler is None:
+        return
+    try:
+        sampler.record(ts_ms, registry)
+    except Exception:
+        pass
+
+
+class _CtxsRefresher:
+    """Keeps one network's metaAndAssetCtxs snapshot warm from a daemon thread.
+
+    Readers always get the last good snapshot without waiting; only the very
+    first read, or the first after an idle stop once the snapshot is older than
+    HYPERLIQUID_CTXS_MAX_STALE_S, fetches inline. The thread refreshes every
+    HYPERLIQUID_CTXS_REFRESH_S and exits after HYPERLIQUID_CTXS_IDLE_S without
+    readers.
+    """
+
+    def __init__(self, network: str) -> None:
+        self.network = network
+        self.snapshot: Optional[Dict[str, Any]] = None
+        self.last_read = 0.0
+        self.thread: Optional[threading.Thread] = None
+        self.refreshes = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def _store(self, data: _MetaCtxs) -> None:
+        snap = {"universe": data[0], "ctxs": data[1], "registry": data[2], "ts": data[3]}
+        with self._lock:
+            # Never replace a newer snapshot with an older one
+            newer = self.snapshot is None or snap["ts"] >= self.snapshot["ts"]
+            if newer:
+                self.snapshot = snap
+            self.last_error = None
+        if newer:
+            _sample(self.network, snap["ts"], snap["registry"])
+
+    def refresh(self) -> None:
+        try:
+            data = _split_meta_ctxs(_post_info({"type": "metaAndAssetCtxs"}, self.network))
+        except Exception as e:
+            self._fetch_failed(e)
+            raise
+        self._store(data)
+        with self._lock:
+            self.refreshes += 1
+
+    def _run(self) -> None:
+        # One metaAndAssetCtxs costs 20 weight: 10s keeps the refresher near 120 of the 1200/min budget
+        interval = _ctxs_refresh_s()
+        idle_s = float(os.getenv("HYPERLIQUID_CTXS_IDLE_S", "60"))
+        while True:
+            time.sleep(interval)
+            with self._lock:
+                if time.monotonic() - self.last_read > idle_s:
+                    self.thread = None
+                    return
+            try:
+                with info_priority("background"):
+                    self.refresh()
+            except Exception:
+                # Keep serving the last good snapshot; readers see it flagged stale
+                pass
+
+    def _touch(self) -> bool:
+        """Record a read; start the refresher if idle. True when the inline fetch is needed."""
+        with self._lock:
+            self.last_read = time.monotonic()
+            if self.thread is not None:
+                return self.snapshot is None
+            self.thread = threading.Thread(target=self._run, name=f"hl-ctxs-{self.network}", daemon=True)
+            self.thread.start()
+            if self.snapshot is None:
+                return True
+            max_stale_ms = float(os.getenv("HYPERLIQUID_CTXS_MAX_STALE_S", "30")) * 1000
+            return _now_ms() - self.snapshot["ts"] > max_stale_ms
+
+    def _fetch_failed(self, e: Exception) -> None:
+        with self._lock:
+            self.failures += 1
+            self.last_error = str(e)
+            if self.snapshot is None:
+                raise e
+
+    def _view(self) -> Dict[str, Any]:
+        with self._lock:
+            snap = dict(self.snapshot or {})
+            error = self.last_error
+        age_ms = _now_ms() - snap["ts"]
+        # A healthy refresher lands one snapshot per interval; allow one missed cycle before flagging
+        snap.update(ageMs=age_ms, stale=error is not None or age_ms > 2 * _ctxs_refresh_s() * 1000, error=error)
+        return snap
+
+    def get(self) -> Dict[str, Any]:
+        if self._touch():
+            # Single-flight inline fetch through the TTL cache; a failure still serves the old snapshot
+            try:
+                self._store(_load_meta_ctxs(self.network))
+            except Exception as e:
+                self._fetch_failed(e)
+        return self._view()
+
+    async def aget(self) -> Dict[str, Any]:
+        if self._touch():
+            try:
+                self._store(await _aload_meta_ctxs(self.network))
+            except Exception as e:
+                self._fetch_failed(e)
+        return self._view()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out = {"running": self.thread is not None, "refreshes": self.refreshes, "failures": self.failures, "lastError": self.last_error}
+            ts = self.snapshot["ts"] if self.snapshot else None
+        out["ageMs"] = None if ts is None else _now_ms() - ts
+        return out
+
+
+_CTXS_REFRESHERS: Dict[str, _CtxsRefresher] = {}
+_CTXS_REFRESHERS_LOCK = threading.Lock()
+
+
+def _ctxs_background() -> bool:
+    return os.getenv("HYPERLIQUID_CTXS_BACKGROUND", "1") != "0"
+
+
+def _ctxs_refresher(network: str) -> _CtxsRefresher:
+    with _CTXS_REFRESHERS_LOCK:
+        ref = _CTXS_REFRESHERS.get(network)
+        if ref is None:
+            ref = _CTXS_REFRESHERS[network] = _CtxsRefresher(network)
+        return ref
+
+
+def _meta_ctxs_state(network: str) -> Dict[str, Any]:
+    """ctxs snapshot with staleness: {universe, ctxs, registry, ts, ageMs, stale, error}."""
+    if _ctxs_background():
+        return _ctxs_refresher(network).get()
+    universe_obj, ctxs, registry, ts = _load_meta_ctxs(network)
+    _sample(network, ts, registry)
+    return {"universe": universe_obj, "ctxs": ctxs, "registry": registry, "ts": ts, "ageMs": _now_ms() - ts, "stale": False, "error": None}
+
+
+async def _ameta_ctxs_state(network: str) -> Dict[str, Any]:
+    if _ctxs_background():
+        return await _ctxs_refresher(network).aget()
+    universe_obj, ctxs, registry, ts = await _aload_meta_ctxs(network)
+    _sample(network, ts, registry)
+    return {"universe": universe_obj, "ctxs": ctxs, "registry": registry, "ts": ts, "ageMs": _now_ms() - ts, "stale": False, "error": None}
 
 
 def _meta_ctxs_cached(network: str) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
-    ttl_sec = float(os.getenv("HYPERLIQUID_CTXS_TTL", "5"))
-    ck = f"ctxs:{network}"
-    cached = _get_cache(ck)
-    if cached is not None:
-        return cached[0], cached[1]
-    data = _post_info({"type": "metaAndAssetCtxs"}, network)
-    universe_obj, ctxs = data[0], data[1]
-    _set_cache(ck, (universe_obj, ctxs), int(ttl_sec * 1000))
-    return universe_obj, ctxs
+    state = _meta_ctxs_state(network)
+    return state["universe"], state["ctxs"]
+
+
+async def _ameta_ctxs_cached(network: str) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    state = await _ameta_ctxs_state(network)
+    return state["universe"], state["ctxs"]
+
+
+def asset_registry(network: str = "mainnet") -> AssetRegistry:
+    """AssetRegistry of the current ctxs snapshot (O(1) coin lookups, NumPy columns)."""
+    return _meta_ctxs_state(network)["registry"]
+
+
+async def aasset_registry(network: str = "mainnet") -> AssetRegistry:
+    return (await _ameta_ctxs_state(network))["registry"]
+
+
+def max_tickers() -> int:
+    """Cap on coins a single prompt/tool call fans out to (HYPERLIQUID_MAX_TICKERS)."""
+    return max(1, int(os.getenv("HYPERLIQUID_MAX_TICKERS", "5")))
+
+
+def fan_out(fn: Callable[[Any], Any], items: List[Any], max_workers: Optional[int] = None) -> List[Any]:
+    """Apply fn to every item concurrently; results in input order, exceptions returned in place."""
+    def _call(item: Any) -> Any:
+        try:
+            return fn(item)
+        except Exception as e:
+            return e
+    if len(items) <= 1:
+        return [_call(x) for x in items]
+    with ThreadPoolExecutor(max_workers=max_workers or len(items)) as pool:
+        return list(pool.map(_call, items))
+
+
+def _slice_book(entry: Dict[str, Any], depth: int) -> Dict[str, Any]:
+    book = entry["book"]
+    return {"bids": book.get("bids", [])[:depth], "asks": book.get("asks", [])[:depth]}
+
+
+def _ob_params(depth: int) -> Tuple[int, float, float]:
+    fetch_depth = max(int(depth), int(os.getenv("HYPERLIQUID_OB_FETCH_DEPTH", "200")))
+    return fetch_depth, float(os.getenv("HYPERLIQUID_OB_TTL", "2")), float(os.getenv("HYPERLIQUID_WS_TIMEOUT", "6"))
 
 
 def _orderbook_cached(coin: str, network: str, depth: int) -> Dict[str, Any]:
-    ttl_sec = float(os.getenv("HYPERLIQUID_OB_TTL", "2"))
-    ck = f"ob:{network}:{coin}:{depth}"
-    cached = _get_cache(ck)
-    if cached is not None:
-        return cached
-    ob = fetch_orderbook_snapshot(coin=coin, network=network, depth=depth, timeout_s=float(os.getenv("HYPERLIQUID_WS_TIMEOUT", "6")))
-    _set_cache(ck, ob, int(ttl_sec * 1000))
-    return ob
+    """Per-coin book snapshot shared by every depth; fetched at HYPERLIQUID_OB_FETCH_DEPTH (or more) and sliced on read."""
+    fetch_depth, ttl_sec, timeout_s = _ob_params(depth)
+    entry = _CACHE.get_or_load(
+        f"ob:{network}:{coin}",
+        lambda: {"depth": fetch_depth, "book": fetch_orderbook_snapshot(coin=coin, network=network, depth=fetch_depth, timeout_s=timeout_s)},
+        ttl_sec,
+        accept=lambda e: e["depth"] >= depth,
+    )
+    return _slice_book(entry, depth)
+
+
+async def _aorderbook_cached(coin: str, network: str, depth: int) -> Dict[str, Any]:
+    fetch_depth, ttl_sec, timeout_s = _ob_params(depth)
+
+    async def _load() -> Dict[str, Any]:
+        return {"depth": fetch_depth, "book": await afetch_orderbook_snapshot(coin=coin, network=network, depth=fetch_depth, timeout_s=timeout_s)}
+    entry = await _CACHE.aget_or_load(f"ob:{network}:{coin}", _load, ttl_sec, accept=lambda e: e["depth"] >= depth)
+    return _slice_book(entry, depth)
+
+
+def _trades_params() -> Tuple[float, float]:
+    return float(os.getenv("HYPERLIQUID_TRADES_TTL", "2")), float(os.getenv("HYPERLIQUID_WS_TIMEOUT", "6"))
 
 
 def _trades_cached(coin: str, network: str, limit: int) -> List[Dict[str, Any]]:
-    ttl_sec = float(os.getenv("HYPERLIQUID_TRADES_TTL", "2"))
-    ck = f"trades:{network}:{coin}:{limit}"
-    cached = _get_cache(ck)
-    if cached is not None:
-        return cached
-    tr = fetch_recent_trades(coin=coin, network=network, max_messages=limit, timeout_s=float(os.getenv("HYPERLIQUID_WS_TIMEOUT", "6")))
-    _set_cache(ck, tr, int(ttl_sec * 1000))
-    return tr
+    ttl_sec, timeout_s = _trades_params()
+    return _CACHE.get_or_load(
+        f"trades:{network}:{coin}:{limit}",
+        lambda: fetch_recent_trades(coin=coin, network=network, max_messages=limit, timeout_s=timeout_s),
+        ttl_sec,
+    )
+
+
+async def _atrades_cached(coin: str, network: str, limit: int) -> List[Dict[str, Any]]:
+    ttl_sec, timeout_s = _trades_params()
+    return await _CACHE.aget_or_load(
+        f"trades:{network}:{coin}:{limit}",
+        lambda: afetch_recent_trades(coin=coin, network=network, max_messages=limit, timeout_s=timeout_s),
+        ttl_sec,
+    )
 
 
 def _compute_orderbook_metrics(ob: Dict[str, Any]) -> Dict[str, Any]:
@@ -398,44 +1222,39 @@ def _score_signal(features: Dict[str, Any]) -> Dict[str, Any]:
     return {"label": label, "score": round(score, 3), "confidence": round(confidence, 3), "reasons": reasons[:4]}
 
 
-@mcp.tool()
-def get_full_market_picture(
+def _full_market_picture(
     coin: str,
-    network: str = "mainnet",
-    depth: int = 50,
-    trades: int = 30,
+    network: str,
+    ctxs_state: Any,
+    ob: Any,
+    tr: Any,
+    obm: Optional[Dict[str, Any]] = None,
+    trm: Optional[Dict[str, Any]] = None,
 ) -> Dict[str, Any]:
-    """Return fused Info + WS snapshot, analytics, and a rule-based signal for a coin."""
+    """Assemble get_full_market_picture from fetched parts; a part that failed is passed as its exception.
+
+    obm/trm are precomputed book/trade metrics (batch path); computed here when omitted.
+    """
     flags: List[str] = []
     # Info context
-    try:
-        universe_obj, ctxs = _meta_ctxs_cached(network)
-    except Exception as e:
-        universe_obj, ctxs = ({"universe": []}, [])
-        flags.append(f"ctxs_error:{e}")
-    # Map coin -> index
-    uni = universe_obj.get("universe", []) if isinstance(universe_obj, dict) else []
-    name_to_idx = {a.get("name"): i for i, a in enumerate(uni) if isinstance(a, dict) and "name" in a}
-    idx = name_to_idx.get(coin)
-    info_slice: Dict[str, Any] = {}
-    if idx is not None and idx < len(ctxs):
-        c = ctxs[idx]
-        if isinstance(c, dict):
-            info_slice = c
+    if isinstance(ctxs_state, Exception):
+        flags.append(f"ctxs_error:{ctxs_state}")
+        ctxs_state = {"registry": AssetRegistry({"universe": []}, [])}
+    elif ctxs_state.get("stale"):
+        flags.append(f"ctxs_stale:{ctxs_state.get('ageMs')}ms")
+    info_slice = ctxs_state["registry"].ctx(coin)
     # WS data
-    try:
-        ob = _orderbook_cached(coin, network, depth)
-    except Exception as e:
+    if isinstance(ob, Exception):
+        flags.append(f"ob_error:{ob}")
         ob = {"bids": [], "asks": []}
-        flags.append(f"ob_error:{e}")
-    try:
-        tr = _trades_cached(coin, network, trades)
-    except Exception as e:
+    if isinstance(tr, Exception):
+        flags.append(f"trades_error:{tr}")
         tr = []
-        flags.append(f"trades_error:{e}")
     # Analytics
-    obm = _compute_orderbook_metrics(ob)
-    trm = _compute_trades_metrics(tr, obm.get("mid"))
+    if obm is None:
+        obm = _compute_orderbook_metrics(ob)
+    if trm is None:
+        trm = _compute_trades_metrics(tr, obm.get("mid"))
     # Assemble snapshot
     market_snapshot = {
         "mid": obm.get("mid"),
@@ -473,6 +1292,45 @@ def get_full_market_picture(
     return response
 
 
+def _try(fn: Callable[..., Any], *args: Any) -> Any:
+    try:
+        return fn(*args)
+    except Exception as e:
+        return e
+
+
+def get_full_market_picture(
+    coin: str,
+    network: str = "mainnet",
+    depth: int = 50,
+    trades: int = 30,
+) -> Dict[str, Any]:
+    """Return fused Info + WS snapshot, analytics, and a rule-based signal for a coin."""
+    return _full_market_picture(
+        coin,
+        network,
+        _try(_meta_ctxs_state, network),
+        _try(_orderbook_cached, coin, network, depth),
+        _try(_trades_cached, coin, network, trades),
+    )
+
+
+async def aget_full_market_picture(
+    coin: str,
+    network: str = "mainnet",
+    depth: int = 50,
+    trades: int = 30,
+) -> Dict[str, Any]:
+    # Info and both WS collections overlap instead of running back to back
+    ctxs_state, ob, tr = await asyncio.gather(
+        _ameta_ctxs_state(network),
+        _aorderbook_cached(coin, network, depth),
+        _atrades_cached(coin, network, trades),
+        return_exceptions=True,
+    )
+    return _full_market_picture(coin, network, ctxs_state, ob, tr)
+
+
 ############################
 # Advanced analytics tools
 ############################
@@ -496,10 +1354,7 @@ def _consume_depth(ob: Dict[str, Any], side: str, notional: float) -> Tuple[floa
     return cost, filled
 
 
-@mcp.tool()
-def get_slippage(coin: str, side: str, notionalUsd: float, network: str = "mainnet", depth: int = 100) -> Dict[str, Any]:
-    """Estimate slippage (bps) and avg fill price for a USD notional using orderbook depth."""
-    ob = _orderbook_cached(coin, network, depth)
+def _slippage_result(ob: Dict[str, Any], side: str, notionalUsd: float) -> Dict[str, Any]:
     obm = _compute_orderbook_metrics(ob)
     mid = obm.get("mid")
     if not isinstance(mid, (int, float)) or mid is None:
@@ -515,10 +1370,16 @@ def get_slippage(coin: str, side: str, notionalUsd: float, network: str = "mainn
     return {"ok": True, "avgPx": avg_px, "slippageBps": slippage_bps, "filledUnits": filled, "summary": f"avg {avg_px:.4f} slip {slippage_bps:.2f}bps"}
 
 
-@mcp.tool()
-def get_liquidity_profile(coin: str, network: str = "mainnet", depth: int = 100) -> Dict[str, Any]:
-    """Return cumulative depth at each of top-N levels for bids and asks."""
-    ob = _orderbook_cached(coin, network, depth)
+def get_slippage(coin: str, side: str, notionalUsd: float, network: str = "mainnet", depth: int = 100) -> Dict[str, Any]:
+    """Estimate slippage (bps) and avg fill price for a USD notional using orderbook depth."""
+    return _slippage_result(_orderbook_cached(coin, network, depth), side, notionalUsd)
+
+
+async def aget_slippage(coin: str, side: str, notionalUsd: float, network: str = "mainnet", depth: int = 100) -> Dict[str, Any]:
+    return _slippage_result(await _aorderbook_cached(coin, network, depth), side, notionalUsd)
+
+
+def _liquidity_profile_result(ob: Dict[str, Any]) -> Dict[str, Any]:
     bids: List[Tuple[float, float]] = ob.get("bids", []) or []
     asks: List[Tuple[float, float]] = ob.get("asks", []) or []
     def cumul(levels: List[Tuple[float, float]]) -> List[Tuple[float, float]]:
@@ -531,10 +1392,192 @@ def get_liquidity_profile(coin: str, network: str = "mainnet", depth: int = 100)
     return {"ok": True, "bid": cumul(bids), "ask": cumul(asks), "summary": f"levels {len(bids)}/{len(asks)}"}
 
 
-@mcp.tool()
-def get_volatility_metrics(coin: str, network: str = "mainnet", trades: int = 200) -> Dict[str, Any]:
-    """Compute realized volatility from recent trades; ATR is omitted if candles are unavailable."""
-    tr = _trades_cached(coin, network, trades)
+def get_liquidity_profile(coin: str, network: str = "mainnet", depth: int = 100) -> Dict[str, Any]:
+    """Return cumulative depth at each of top-N levels for bids and asks."""
+    return _liquidity_profile_result(_orderbook_cached(coin, network, depth))
+
+
+async def aget_liquidity_profile(coin: str, network: str = "mainnet", depth: int = 100) -> Dict[str, Any]:
+    return _liquidity_profile_result(await _aorderbook_cached(coin, network, depth))
+
+
+############################
+# Candles
+#
+# candleSnapshot bars are cached per (network, coin, interval) and kept for
+# HYPERLIQUID_CANDLE_RETAIN_S. Once HYPERLIQUID_CANDLE_TTL has passed, only the
+# tail is refreshed: the forming bar from the WS candle channel when it is
+# still current, else the REST bars since the last cached one.
+############################
+
+_INTERVAL_MS: Dict[str, int] = {
+    "1m": 60_000, "3m": 180_000, "5m": 300_000, "15m": 900_000, "30m": 1_800_000,
+    "1h": 3_600_000, "2h": 7_200_000, "4h": 14_400_000, "8h": 28_800_000, "12h": 43_200_000,
+    "1d": 86_400_000, "3d": 259_200_000, "1w": 604_800_000, "1M": 2_592_000_000,
+}
+# candleSnapshot returns at most this many of the most recent bars
+_MAX_CANDLES = 5000
+
+
+def _interval_ms(interval: str) -> int:
+    if interval not in _INTERVAL_MS:
+        raise ValueError(f"interval must be one of {list(_INTERVAL_MS)}")
+    return _INTERVAL_MS[interval]
+
+
+def _candle_payload(coin: str, interval: str, startTime: int, endTime: int) -> Dict[str, Any]:
+    return {"type": "candleSnapshot", "req": {"coin": coin, "interval": interval, "startTime": int(startTime), "endTime": int(endTime)}}
+
+
+def _candle_params() -> Tuple[float, float, bool, float]:
+    return (
+        float(os.getenv("HYPERLIQUID_CANDLE_TTL", "10")),
+        float(os.getenv("HYPERLIQUID_CANDLE_RETAIN_S", "3600")),
+        os.getenv("HYPERLIQUID_CANDLE_WS", "1") != "0",
+        float(os.getenv("HYPERLIQUID_CANDLE_WS_WAIT", "0.5")),
+    )
+
+
+def _merge_candles(bars: List[Dict[str, Any]], updates: Any) -> List[Dict[str, Any]]:
+    """Bars keyed by open time `t`; later updates replace earlier ones. Sorted, capped at _MAX_CANDLES."""
+    by_t = {int(b["t"]): b for b in bars}
+    for c in updates if isinstance(updates, list) else []:
+        if isinstance(c, dict) and c.get("t") is not None:
+            by_t[int(c["t"])] = c
+    return [by_t[t] for t in sorted(by_t)][-_MAX_CANDLES:]
+
+
+def _candle_plan(key: str, bars: int, step: int) -> Tuple[Optional[Dict[str, Any]], int, int]:
+    now = _now_ms()
+    want_from = now - bars * step
+    # Expired-for-serving entries are still valid history to extend
+    prev = _CACHE.get(key)
+    if prev is not None and (prev["from"] > want_from or not prev["bars"]):
+        prev = None
+    return prev, want_from, now
+
+
+def _candle_entry(prev: Optional[Dict[str, Any]], want_from: int, updates: Any) -> Dict[str, Any]:
+    bars = _merge_candles(prev["bars"] if prev else [], updates)
+    return {"bars": bars, "from": prev["from"] if prev else want_from, "fetchedAt": time.monotonic()}
+
+
+def _candle_accept(bars: int, step: int, ttl_s: float) -> Callable[[Dict[str, Any]], bool]:
+    return lambda e: time.monotonic() - e["fetchedAt"] < ttl_s and e["from"] <= _now_ms() - bars * step
+
+
+def _candles_cached(coin: str, interval: str, bars: int, network: str) -> List[Dict[str, Any]]:
+    step = _interval_ms(interval)
+    bars = min(max(int(bars), 1), _MAX_CANDLES)
+    ttl_s, retain_s, use_ws, ws_wait = _candle_params()
+    key = f"candles:{network}:{coin}:{interval}"
+
+    def _load() -> Dict[str, Any]:
+        prev, want_from, now = _candle_plan(key, bars, step)
+        if prev is None:
+            return _candle_entry(None, want_from, _post_info(_candle_payload(coin, interval, want_from, now), network))
+        last_t = int(prev["bars"][-1]["t"])
+        updates: List[Dict[str, Any]] = []
+        if use_ws and now < last_t + step:
+            updates = [c for c in fetch_candle_updates(coin, interval, network, ws_wait) if int(c.get("t") or 0) >= last_t]
+        if not updates:
+            updates = _post_info(_candle_payload(coin, interval, last_t, now), network)
+        return _candle_entry(prev, want_from, updates)
+    entry = _CACHE.get_or_load(key, _load, retain_s, accept=_candle_accept(bars, step, ttl_s))
+    return entry["bars"][-bars:]
+
+
+async def _acandles_cached(coin: str, interval: str, bars: int, network: str) -> List[Dict[str, Any]]:
+    step = _interval_ms(interval)
+    bars = min(max(int(bars), 1), _MAX_CANDLES)
+    ttl_s, retain_s, use_ws, ws_wait = _candle_params()
+    key = f"candles:{network}:{coin}:{interval}"
+
+    async def _load() -> Dict[str, Any]:
+        prev, want_from, now = _candle_plan(key, bars, step)
+        if prev is None:
+            return _candle_entry(None, want_from, await _apost_info(_candle_payload(coin, interval, want_from, now), network))
+        last_t = int(prev["bars"][-1]["t"])
+        updates: List[Dict[str, Any]] = []
+        if use_ws and now < last_t + step:
+            updates = [c for c in await afetch_candle_updates(coin, interval, network, ws_wait) if int(c.get("t") or 0) >= last_t]
+        if not updates:
+            updates = await _apost_info(_candle_payload(coin, interval, last_t, now), network)
+        return _candle_entry(prev, want_from, updates)
+    entry = await _CACHE.aget_or_load(key, _load, retain_s, accept=_candle_accept(bars, step, ttl_s))
+    return entry["bars"][-bars:]
+
+
+def _candles_result(coin: str, interval: str, bars: List[Dict[str, Any]]) -> Dict[str, Any]:
+    last = bars[-1] if bars else {}
+    return {"ok": True, "coin": coin, "interval": interval, "data": bars, "summary": f"{len(bars)} {interval} bars, last close {last.get('c')}"}
+
+
+def get_candles(coin: str, interval: str = "1h", bars: int = 100, network: str = "mainnet") -> Dict[str, Any]:
+    """Return the most recent OHLCV bars (type=candleSnapshot) for a coin; the last bar may still be forming.
+
+    - interval: 1m, 3m, 5m, 15m, 30m, 1h, 2h, 4h, 8h, 12h, 1d, 3d, 1w, 1M
+    - bars: up to 5000
+    """
+    return _candles_result(coin, interval, _candles_cached(coin, interval, bars, network))
+
+
+async def aget_candles(coin: str, interval: str = "1h", bars: int = 100, network: str = "mainnet") -> Dict[str, Any]:
+    return _candles_result(coin, interval, await _acandles_cached(coin, interval, bars, network))
+
+
+def _ohlc_arrays(bars: List[Dict[str, Any]], closed_only: bool) -> Dict[str, np.ndarray]:
+    """float64 o/h/l/c columns; closed_only drops the forming bar (close time T not yet reached)."""
+    if closed_only:
+        now = _now_ms()
+        bars = [b for b in bars if int(b.get("T") or 0) < now]
+    cols: Dict[str, np.ndarray] = {}
+    for f in ("o", "h", "l", "c"):
+        vals: List[float] = []
+        for b in bars:
+            try:
+                vals.append(float(b.get(f)))
+            except (TypeError, ValueError):
+                vals.append(float("nan"))
+        cols[f] = np.array(vals, dtype=np.float64)
+    ok = np.all(np.isfinite(np.vstack(list(cols.values()))), axis=0) & (cols["l"] > 0) & (cols["o"] > 0)
+    return {f: col[ok] for f, col in cols.items()}
+
+
+def _wilder_atr(o: Dict[str, np.ndarray], period: int) -> Optional[float]:
+    h, l, c = o["h"], o["l"], o["c"]
+    if c.size < 2:
+        return None
+    prev_c = c[:-1]
+    tr = np.maximum(h[1:] - l[1:], np.maximum(np.abs(h[1:] - prev_c), np.abs(l[1:] - prev_c)))
+    n = max(int(period), 1)
+    if tr.size <= n:
+        return float(tr.mean())
+    # Wilder smoothing atr_k = (1 - a) * atr_{k-1} + a * tr_k, unrolled from the SMA seed
+    a = 1.0 / n
+    rest = tr[n:]
+    weights = (1.0 - a) ** np.arange(rest.size - 1, -1, -1)
+    return float((1.0 - a) ** rest.size * tr[:n].mean() + a * np.dot(weights, rest))
+
+
+def _ohlc_volatility(o: Dict[str, np.ndarray], step_ms: int) -> Dict[str, Optional[float]]:
+    """Annualized close-to-close, Parkinson and Garman-Klass volatility (24/7 market)."""
+    if o["c"].size < 2:
+        return {"realizedVol": None, "parkinsonVol": None, "garmanKlassVol": None}
+    per_year = 365.0 * 86_400_000 / step_ms
+    rets = np.diff(np.log(o["c"]))
+    hl_sq = np.log(o["h"] / o["l"]) ** 2
+    co_sq = np.log(o["c"] / o["o"]) ** 2
+    parkinson = hl_sq.mean() / (4.0 * np.log(2.0))
+    gk = np.mean(0.5 * hl_sq - (2.0 * np.log(2.0) - 1.0) * co_sq)
+    return {
+        "realizedVol": float(np.sqrt(per_year * np.mean(rets ** 2))),
+        "parkinsonVol": float(np.sqrt(per_year * parkinson)),
+        "garmanKlassVol": float(np.sqrt(per_year * max(gk, 0.0))),
+    }
+
+
+def _trade_prices(tr: List[Dict[str, Any]]) -> List[float]:
     prices: List[float] = []
     for t in tr:
         d = t.get("data") if isinstance(t, dict) else None
@@ -544,77 +1587,395 @@ def get_volatility_metrics(coin: str, network: str = "mainnet", trades: int = 20
             prices.append(float(px))
         except Exception:
             continue
+    return prices
+
+
+def _volatility_result(tr: List[Dict[str, Any]]) -> Dict[str, Any]:
+    prices = _trade_prices(tr)
     rets: List[float] = []
     for i in range(1, len(prices)):
         if prices[i-1] > 0:
             rets.append((prices[i] - prices[i-1]) / prices[i-1])
     import math
     vol = math.sqrt(252) * (sum(r*r for r in rets) / max(len(rets), 1))**0.5 if rets else 0.0
-    return {"ok": True, "realizedVol": vol, "atr": None, "summary": f"realizedVol {vol:.4f}"}
+    return {"ok": True, "source": "trades", "realizedVol": vol, "atr": None, "summary": f"realizedVol {vol:.4f}"}
 
 
-@mcp.tool()
-def get_trend_ma(coin: str, network: str = "mainnet", short: int = 20, long: int = 50) -> Dict[str, Any]:
-    """Compute simple moving averages from recent trades; returns cross signal."""
-    tr = _trades_cached(coin, network, max(long*5, 200))
-    prices: List[float] = []
-    for t in tr:
-        d = t.get("data") if isinstance(t, dict) else None
-        row = d or t
-        px = row.get("px") or row.get("price")
-        try:
-            prices.append(float(px))
-        except Exception:
-            continue
+def _candle_volatility_result(bars: List[Dict[str, Any]], interval: str, atr_period: int) -> Optional[Dict[str, Any]]:
+    o = _ohlc_arrays(bars, closed_only=True)
+    if o["c"].size < 2:
+        return None
+    vol = _ohlc_volatility(o, _interval_ms(interval))
+    atr = _wilder_atr(o, atr_period)
+    last = float(o["c"][-1])
+    return {
+        "ok": True,
+        "source": "candles",
+        "interval": interval,
+        "bars": int(o["c"].size),
+        **vol,
+        "atr": atr,
+        "atrPct": atr / last if atr is not None and last else None,
+        "summary": f"realizedVol {vol['realizedVol']:.4f} parkinson {vol['parkinsonVol']:.4f} GK {vol['garmanKlassVol']:.4f} ATR({atr_period}, {interval}) {atr:.6g}",
+    }
+
+
+def get_volatility_metrics(coin: str, network: str = "mainnet", trades: int = 200, interval: str = "1h", bars: int = 100, atrPeriod: int = 14) -> Dict[str, Any]:
+    """Annualized close-to-close, Parkinson and Garman-Klass volatility plus Wilder ATR from `bars` closed candles.
+
+    Falls back to realized volatility over `trades` recent trades (no ATR) when candles are
+    unavailable; the reason is returned as `candleError`.
+    """
+    _interval_ms(interval)
+    try:
+        res = _candle_volatility_result(_candles_cached(coin, interval, bars + 1, network), interval, atrPeriod)
+        error = None if res is not None else "not enough closed candles"
+    except Exception as e:
+        res, error = None, str(e)
+    if res is not None:
+        return res
+    # Surface why candles were not used alongside the trades-based fallback
+    out = _volatility_result(_trades_cached(coin, network, trades))
+    out["candleError"] = error
+    return out
+
+
+async def aget_volatility_metrics(coin: str, network: str = "mainnet", trades: int = 200, interval: str = "1h", bars: int = 100, atrPeriod: int = 14) -> Dict[str, Any]:
+    _interval_ms(interval)
+    try:
+        res = _candle_volatility_result(await _acandles_cached(coin, interval, bars + 1, network), interval, atrPeriod)
+        error = None if res is not None else "not enough closed candles"
+    except Exception as e:
+        res, error = None, str(e)
+    if res is not None:
+        return res
+    # Surface why candles were not used alongside the trades-based fallback
+    out = _volatility_result(await _atrades_cached(coin, network, trades))
+    out["candleError"] = error
+    return out
+
+
+def _ma_cross(s: Optional[float], l: Optional[float]) -> str:
+    return "bullish" if (s and l and s > l) else ("bearish" if (s and l and s < l) else "neutral")
+
+
+def _trend_ma_result(tr: List[Dict[str, Any]], short: int, long: int) -> Dict[str, Any]:
+    prices = _trade_prices(tr)
     def sma(n: int) -> Optional[float]:
         return (sum(prices[-n:]) / n) if len(prices) >= n else None
     s = sma(short)
     l = sma(long)
-    cross = "bullish" if (s and l and s > l) else ("bearish" if (s and l and s < l) else "neutral")
-    return {"ok": True, "smaShort": s, "smaLong": l, "cross": cross, "summary": f"{cross}: {short}/{long}"}
+    cross = _ma_cross(s, l)
+    return {"ok": True, "source": "trades", "smaShort": s, "smaLong": l, "cross": cross, "summary": f"{cross}: {short}/{long}"}
+
+
+def _candle_trend_result(bars: List[Dict[str, Any]], short: int, long: int, interval: str) -> Optional[Dict[str, Any]]:
+    # Closed bars only, like the volatility metrics, so the signal does not flip within a bar
+    c = _ohlc_arrays(bars, closed_only=True)["c"]
+    if c.size < max(short, long, 1):
+        return None
+    s = float(c[-short:].mean())
+    l = float(c[-long:].mean())
+    cross = _ma_cross(s, l)
+    return {
+        "ok": True,
+        "source": "candles",
+        "interval": interval,
+        "smaShort": s,
+        "smaLong": l,
+        "lastClose": float(c[-1]),
+        "cross": cross,
+        "summary": f"{cross}: {short}/{long} x {interval}",
+    }
+
+
+def get_trend_ma(coin: str, network: str = "mainnet", short: int = 20, long: int = 50, interval: str = "1h") -> Dict[str, Any]:
+    """Compute short/long simple moving averages of closed `interval` candles; returns cross signal.
+
+    Falls back to moving averages of recent trade prints when candles are unavailable
+    (the reason is returned as `candleError`).
+    """
+    _interval_ms(interval)
+    try:
+        res = _candle_trend_result(_candles_cached(coin, interval, max(short, long) + 1, network), short, long, interval)
+        error = None if res is not None else "not enough closed candles"
+    except Exception as e:
+        res, error = None, str(e)
+    if res is not None:
+        return res
+    # Surface why candles were not used alongside the trades-based fallback
+    out = _trend_ma_result(_trades_cached(coin, network, max(long*5, 200)), short, long)
+    out["candleError"] = error
+    return out
+
+
+async def aget_trend_ma(coin: str, network: str = "mainnet", short: int = 20, long: int = 50, interval: str = "1h") -> Dict[str, Any]:
+    _interval_ms(interval)
+    try:
+        res = _candle_trend_result(await _acandles_cached(coin, interval, max(short, long) + 1, network), short, long, interval)
+        error = None if res is not None else "not enough closed candles"
+    except Exception as e:
+        res, error = None, str(e)
+    if res is not None:
+        return res
+    # Surface why candles were not used alongside the trades-based fallback
+    out = _trend_ma_result(await _atrades_cached(coin, network, max(long*5, 200)), short, long)
+    out["candleError"] = error
+    return out
+
+
+def _rolling_stats(coin: str, network: str, fields: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+    sampler = _market_sampler(network)
+    return sampler.stats(coin, fields) if sampler is not None else None
+
+
+def _premium_result(coin: str, network: str, state: Dict[str, Any]) -> Dict[str, Any]:
+    cur = state["registry"].ctx(coin)
+    hist = _rolling_stats(coin, network, ["premium", "funding"]) or {}
+    prem = hist.get("premium") or {}
+    fund = hist.get("funding") or {}
+    z = prem.get("zScore")
+    return {
+        "ok": True,
+        "premium": cur.get("premium"),
+        "funding": cur.get("funding"),
+        "zScore": z,
+        "premiumMean": prem.get("mean"),
+        "premiumStd": prem.get("std"),
+        "premiumSlopePerMin": prem.get("slopePerMin"),
+        "fundingZScore": fund.get("zScore"),
+        "samples": prem.get("samples", 0),
+        "windowS": hist.get("windowS"),
+        "stale": state["stale"],
+        "ageMs": state["ageMs"],
+        "summary": f"prem {cur.get('premium')} fund {cur.get('funding')} z {z:.2f}" if z is not None else f"prem {cur.get('premium')} fund {cur.get('funding')}",
+    }
 
 
-@mcp.tool()
 def get_premium_monitor(coin: str, network: str = "mainnet") -> Dict[str, Any]:
-    """Return current premium (mark vs oracle) and funding; z-score omitted without history."""
-    _, ctxs = _meta_ctxs_cached(network)
-    # build coin map
-    # We don't cache name map here; small overhead
-    uni, _ = _meta_ctxs_cached(network)
-    universe = uni.get("universe", []) if isinstance(uni, dict) else []
-    name_to_idx = {a.get("name"): i for i, a in enumerate(universe) if isinstance(a, dict) and "name" in a}
-    idx = name_to_idx.get(coin)
-    cur = ctxs[idx] if idx is not None and idx < len(ctxs) else {}
-    return {"ok": True, "premium": cur.get("premium"), "funding": cur.get("funding"), "zScore": None, "summary": f"prem {cur.get('premium')} fund {cur.get('funding')}"}
-
-
-@mcp.tool()
-def get_oi_trend(coin: str, network: str = "mainnet") -> Dict[str, Any]:
-    """Compute open-interest delta vs last cached snapshot."""
+    """Return current premium (mark vs oracle) and funding with rolling z-scores.
+
+    z-scores come from the ctxs sampler's window (HYPERLIQUID_SAMPLER_*) and stay None until it has history.
+    """
+    return _premium_result(coin, network, _meta_ctxs_state(network))
+
+
+async def aget_premium_monitor(coin: str, network: str = "mainnet") -> Dict[str, Any]:
+    return _premium_result(coin, network, await _ameta_ctxs_state(network))
+
+
+def _oi_trend_result(coin: str, network: str, state: Dict[str, Any], minutes: float) -> Dict[str, Any]:
+    cur = state["registry"].ctx(coin)
+    cur_oi = float(cur.get("openInterest", 0.0)) if isinstance(cur.get("openInterest"), (int, float, str)) else 0.0
+    sampler = _market_sampler(network)
+    change = sampler.delta(coin, "openInterest", minutes) if sampler is not None else None
+    if change is not None:
+        slope = (sampler.stats(coin, ["openInterest"]) or {}).get("openInterest", {}).get("slopePerMin")
+        delta = cur_oi - change["from"]
+        return {
+            "ok": True,
+            "openInterest": cur_oi,
+            "delta": delta,
+            "deltaPct": delta / change["from"] if change["from"] else None,
+            "spanS": change["spanS"],
+            "slopePerMin": slope,
+            "stale": state["stale"],
+            "ageMs": state["ageMs"],
+            "summary": f"OI {cur_oi} Δ {delta} over {change['spanS'] / 60:.1f}m",
+        }
+    # No sampler history yet: diff against the previous call
     key = f"oi_hist:{network}:{coin}"
     prev = _get_cache(key)
-    uni, ctxs = _meta_ctxs_cached(network)
-    universe = uni.get("universe", []) if isinstance(uni, dict) else []
-    name_to_idx = {a.get("name"): i for i, a in enumerate(universe) if isinstance(a, dict) and "name" in a}
-    idx = name_to_idx.get(coin)
-    cur = ctxs[idx] if idx is not None and idx < len(ctxs) else {}
-    cur_oi = float(cur.get("openInterest", 0.0)) if isinstance(cur.get("openInterest"), (int, float, str)) else 0.0
     _set_cache(key, cur_oi, 60_000)  # keep last for 60s
     delta = None if prev is None else (cur_oi - float(prev))
-    return {"ok": True, "openInterest": cur_oi, "delta": delta, "summary": f"OI {cur_oi} Δ {delta}"}
+    return {"ok": True, "openInterest": cur_oi, "delta": delta, "stale": state["stale"], "ageMs": state["ageMs"], "summary": f"OI {cur_oi} Δ {delta}"}
 
 
-@mcp.tool()
-def get_user_pnl_summary(user: str, network: str = "mainnet", days: int = 1) -> Dict[str, Any]:
-    """Summarize user performance using funding over window and current unrealized PnL."""
-    if not isinstance(user, str) or not user.startswith("0x"):
-        return {"ok": False, "error": "user must be 0x address"}
+def get_oi_trend(coin: str, network: str = "mainnet", minutes: float = 5) -> Dict[str, Any]:
+    """Open-interest change over the last `minutes` and its per-minute trend slope from the ctxs sampler.
+
+    Falls back to the delta vs the previous call while the sampler has no history.
+    """
+    return _oi_trend_result(coin, network, _meta_ctxs_state(network), minutes)
+
+
+async def aget_oi_trend(coin: str, network: str = "mainnet", minutes: float = 5) -> Dict[str, Any]:
+    return _oi_trend_result(coin, network, await _ameta_ctxs_state(network), minutes)
+
+
+def _market_stats_result(coin: str, network: str, state: Dict[str, Any], minutes: float) -> Dict[str, Any]:
+    sampler = _market_sampler(network)
+    if sampler is None:
+        return {"ok": False, "error": "market sampler disabled (HYPERLIQUID_SAMPLER=0)"}
+    stats = sampler.stats(coin)
+    if stats is None:
+        return {"ok": False, "error": f"unknown coin {coin}"}
+    window = stats.pop("windowS")
+    deltas = {f: sampler.delta(coin, f, minutes) for f in stats}
+    data = {f: dict(st, change=deltas[f]) for f, st in stats.items()}
+    prem_z = data["premium"]["zScore"]
+    return {
+        "ok": True,
+        "coin": coin,
+        "windowS": window,
+        "minutes": minutes,
+        "data": data,
+        "stale": state["stale"],
+        "ageMs": state["ageMs"],
+        "summary": f"{coin}: {data['premium']['samples']} samples over {window / 60:.1f}m, premium z {prem_z:.2f}" if prem_z is not None else f"{coin}: {data['premium']['samples']} samples over {window / 60:.1f}m",
+    }
+
+
+def get_market_stats(coin: str, minutes: float = 5, network: str = "mainnet") -> Dict[str, Any]:
+    """Rolling premium, funding, open interest and mark stats for a coin from the ctxs sampler.
+
+    Per field: last, mean, std, zScore, slopePerMin over the sampler window and the change over `minutes`.
+    """
+    return _market_stats_result(coin, network, _meta_ctxs_state(network), minutes)
+
+
+async def aget_market_stats(coin: str, minutes: float = 5, network: str = "mainnet") -> Dict[str, Any]:
+    return _market_stats_result(coin, network, await _ameta_ctxs_state(network), minutes)
+
+
+# Screener sort keys -> AssetRegistry columns
+_SCREEN_SORT_KEYS = {
+    "funding": "funding",
+    "absFunding": "absFunding",
+    "premium": "premium",
+    "absPremium": "absPremium",
+    "oi": "oiUsd",
+    "oiUsd": "oiUsd",
+    "openInterest": "openInterest",
+    "volume": "dayNtlVlm",
+    "dayNtlVlm": "dayNtlVlm",
+    "markPx": "markPx",
+}
+
+
+def _oi_cap_names(network: str) -> List[str]:
+    return _CACHE.get_or_load(f"oicap:{network}", lambda: _post_info({"type": "perpsAtOpenInterestCap"}, network), _ctxs_ttl())
+
+
+async def _aoi_cap_names(network: str) -> List[str]:
+    return await _CACHE.aget_or_load(f"oicap:{network}", lambda: _apost_info({"type": "perpsAtOpenInterestCap"}, network), _ctxs_ttl())
+
+
+def _screen_result(
+    state: Dict[str, Any],
+    caps: Optional[List[str]],
+    sortBy: str,
+    top: int,
+    ascending: bool,
+    minFunding: Optional[float],
+    maxFunding: Optional[float],
+    minPremium: Optional[float],
+    maxPremium: Optional[float],
+    minOiUsd: Optional[float],
+    minVolumeUsd: Optional[float],
+    atOiCap: Optional[bool],
+    includeDelisted: bool,
+) -> Dict[str, Any]:
+    column = _SCREEN_SORT_KEYS.get(sortBy)
+    if column is None:
+        return {"ok": False, "error": f"sortBy must be one of {sorted(_SCREEN_SORT_KEYS)}"}
+    t0 = time.perf_counter()
+    reg: AssetRegistry = state["registry"]
+    ranges = {
+        "funding": (minFunding, maxFunding),
+        "premium": (minPremium, maxPremium),
+        "oiUsd": (minOiUsd, None),
+        "dayNtlVlm": (minVolumeUsd, None),
+    }
+    ranges = {k: v for k, v in ranges.items() if v != (None, None)}
+    mask = None if includeDelisted else ~reg.delisted
+    capped = np.isin(np.asarray(reg.names, dtype=object), list(caps or []))
+    if atOiCap is not None:
+        cap_mask = capped if atOiCap else ~capped
+        mask = cap_mask if mask is None else (mask & cap_mask)
+    rows = reg.screen(column, top=top, ascending=ascending, ranges=ranges, mask=mask)
+    cols = {name: reg.column(name)[rows] for name in ("funding", "premium", "oiUsd", "dayNtlVlm", "markPx")}
+    compute_ms = round((time.perf_counter() - t0) * 1000.0, 3)
+
+    def _num(v: float) -> Optional[float]:
+        return None if np.isnan(v) else float(v)
+
+    table = [
+        {
+            "coin": reg.names[i],
+            "funding": _num(cols["funding"][j]),
+            "premium": _num(cols["premium"][j]),
+            "oiUsd": _num(cols["oiUsd"][j]),
+            "volumeUsd": _num(cols["dayNtlVlm"][j]),
+            "markPx": _num(cols["markPx"][j]),
+            "atOiCap": bool(capped[i]),
+        }
+        for j, i in enumerate(rows.tolist())
+    ]
+    head = ", ".join(f"{r['coin']} {_num(reg.column(column)[i]):.6g}" for r, i in zip(table, rows.tolist()))
+    return {
+        "ok": True,
+        "sortBy": sortBy,
+        "ascending": ascending,
+        "rows": table,
+        "universe": len(reg),
+        "computeMs": compute_ms,
+        "stale": state["stale"],
+        "summary": f"{'bottom' if ascending else 'top'} {len(table)} by {sortBy}: {head or 'none'}",
+    }
+
+
+def screen_markets(
+    sortBy: str = "funding",
+    top: int = 10,
+    ascending: bool = False,
+    minFunding: Optional[float] = None,
+    maxFunding: Optional[float] = None,
+    minPremium: Optional[float] = None,
+    maxPremium: Optional[float] = None,
+    minOiUsd: Optional[float] = None,
+    minVolumeUsd: Optional[float] = None,
+    atOiCap: Optional[bool] = None,
+    includeDelisted: bool = False,
+    network: str = "mainnet",
+) -> Dict[str, Any]:
+    """Rank and filter all perps in one pass over the ctxs columns; returns a compact table.
+
+    - sortBy: funding, absFunding, premium, absPremium, oi (USD), openInterest, volume (24h USD), markPx
+    - min*/max* filters combine with AND; atOiCap=True/False keeps only perps at / not at their OI cap
+    """
+    caps = _oi_cap_names(network) if atOiCap is not None else None
+    return _screen_result(_meta_ctxs_state(network), caps, sortBy, top, ascending, minFunding, maxFunding, minPremium, maxPremium, minOiUsd, minVolumeUsd, atOiCap, includeDelisted)
+
+
+async def ascreen_markets(
+    sortBy: str = "funding",
+    top: int = 10,
+    ascending: bool = False,
+    minFunding: Optional[float] = None,
+    maxFunding: Optional[float] = None,
+    minPremium: Optional[float] = None,
+    maxPremium: Optional[float] = None,
+    minOiUsd: Optional[float] = None,
+    minVolumeUsd: Optional[float] = None,
+    atOiCap: Optional[bool] = None,
+    includeDelisted: bool = False,
+    network: str = "mainnet",
+) -> Dict[str, Any]:
+    if atOiCap is not None:
+        state, caps = await asyncio.gather(_ameta_ctxs_state(network), _aoi_cap_names(network))
+    else:
+        state, caps = await _ameta_ctxs_state(network), None
+    return _screen_result(state, caps, sortBy, top, ascending, minFunding, maxFunding, minPremium, maxPremium, minOiUsd, minVolumeUsd, atOiCap, includeDelisted)
+
+
+def _user_pnl_window(days: int) -> Tuple[int, int]:
     now_ms = _now_ms()
-    start = now_ms - max(1, int(days)) * 24 * 60 * 60 * 1000
-    try:
-        ch = get_clearinghouse_state(user=user, network=network)["data"]
-    except Exception as e:
-        ch = {}
+    return now_ms - max(1, int(days)) * 24 * 60 * 60 * 1000, now_ms
+
+
+def _user_pnl_result(ch: Any, uf: Any, days: int) -> Dict[str, Any]:
+    ch = ch.get("data", {}) if isinstance(ch, dict) else {}
     unreal = 0.0
     try:
         for p in ch.get("assetPositions", []):
@@ -622,31 +1983,329 @@ def get_user_pnl_summary(user: str, network: str = "mainnet", days: int = 1) ->
     except Exception:
         pass
     try:
-        uf = get_user_funding(user=user, startTime=start, endTime=now_ms, network=network)["data"]
-        funding_pnl = sum(float(x.get("delta", {}).get("usdc", 0.0)) for x in uf)
+        funding_pnl = sum(float(x.get("delta", {}).get("usdc", 0.0)) for x in uf["data"])
     except Exception:
         funding_pnl = None
     return {"ok": True, "unrealizedPnl": unreal, "fundingPnl": funding_pnl, "windowDays": days, "summary": f"unreal {unreal} funding {funding_pnl}"}
 
 
-@mcp.tool()
-def get_batch_full_market_picture(coins: List[str], network: str = "mainnet", depth: int = 30, trades: int = 30) -> Dict[str, Any]:
-    """Batch get_full_market_picture for a list of coins."""
+def get_user_pnl_summary(user: str, network: str = "mainnet", days: int = 1) -> Dict[str, Any]:
+    """Summarize user performance using funding over window and current unrealized PnL."""
+    if not isinstance(user, str) or not user.startswith("0x"):
+        return {"ok": False, "error": "user must be 0x address"}
+    start, now_ms = _user_pnl_window(days)
+    ch = _try(get_clearinghouse_state, user, "", network)
+    uf = _try(get_user_funding, user, start, now_ms, network)
+    return _user_pnl_result(ch, uf, days)
+
+
+async def aget_user_pnl_summary(user: str, network: str = "mainnet", days: int = 1) -> Dict[str, Any]:
+    if not isinstance(user, str) or not user.startswith("0x"):
+        return {"ok": False, "error": "user must be 0x address"}
+    start, now_ms = _user_pnl_window(days)
+    ch, uf = await asyncio.gather(
+        aget_clearinghouse_state(user=user, network=network),
+        aget_user_funding(user=user, startTime=start, endTime=now_ms, network=network),
+        return_exceptions=True,
+    )
+    return _user_pnl_result(ch, uf, days)
+
+
+def _book_store(network: str, depth: int, fetch_depth: int, ttl_sec: float, out: Dict[str, Any], books: Any, missing: List[str]) -> None:
+    for c in missing:
+        ob = books if isinstance(books, Exception) else books.get(c)
+        if isinstance(ob, dict):
+            entry = {"depth": fetch_depth, "book": ob}
+            _CACHE.set(f"ob:{network}:{c}", entry, ttl_sec)
+            out[c] = _slice_book(entry, depth)
+        else:
+            out[c] = ob if isinstance(ob, Exception) else RuntimeError("no book")
+
+
+def _books_cached_split(coins: List[str], network: str, depth: int) -> Tuple[Dict[str, Any], List[str]]:
+    out: Dict[str, Any] = {}
+    missing: List[str] = []
+    for c in coins:
+        entry = _CACHE.get(f"ob:{network}:{c}", accept=lambda e: e["depth"] >= depth)
+        if entry is None:
+            missing.append(c)
+        else:
+            out[c] = _slice_book(entry, depth)
+    return out, missing
+
+
+def _orderbooks_cached(coins: List[str], network: str, depth: int) -> Dict[str, Any]:
+    """Books for many coins: cache hits are sliced, all misses are collected concurrently (errors in place)."""
+    fetch_depth, ttl_sec, timeout_s = _ob_params(depth)
+    out, missing = _books_cached_split(coins, network, depth)
+    if missing:
+        try:
+            books: Any = fetch_orderbook_snapshots(missing, network=network, depth=fetch_depth, timeout_s=timeout_s)
+        except Exception as e:
+            books = e
+        _book_store(network, depth, fetch_depth, ttl_sec, out, books, missing)
+    return out
+
+
+async def _aorderbooks_cached(coins: List[str], network: str, depth: int) -> Dict[str, Any]:
+    fetch_depth, ttl_sec, timeout_s = _ob_params(depth)
+    out, missing = _books_cached_split(coins, network, depth)
+    if missing:
+        try:
+            books: Any = await afetch_orderbook_snapshots(missing, network=network, depth=fetch_depth, timeout_s=timeout_s)
+        except Exception as e:
+            books = e
+        _book_store(network, depth, fetch_depth, ttl_sec, out, books, missing)
+    return out
+
+
+def _trades_store(network: str, limit: int, ttl_sec: float, out: Dict[str, Any], batches: Any, missing: List[str]) -> None:
+    for c in missing:
+        tr = batches if isinstance(batches, Exception) else batches.get(c)
+        if isinstance(tr, list):
+            _CACHE.set(f"trades:{network}:{c}:{limit}", tr, ttl_sec)
+        out[c] = tr if tr is not None else RuntimeError("no trades")
+
+
+def _trades_cached_split(coins: List[str], network: str, limit: int) -> Tuple[Dict[str, Any], List[str]]:
     out: Dict[str, Any] = {}
+    missing: List[str] = []
     for c in coins:
+        tr = _CACHE.get(f"trades:{network}:{c}:{limit}")
+        if tr is None:
+            missing.append(c)
+        else:
+            out[c] = tr
+    return out, missing
+
+
+def _trades_many_cached(coins: List[str], network: str, limit: int) -> Dict[str, Any]:
+    ttl_sec, timeout_s = _trades_params()
+    out, missing = _trades_cached_split(coins, network, limit)
+    if missing:
         try:
-            out[c] = get_full_market_picture(c, network=network, depth=depth, trades=trades)
+            batches: Any = fetch_recent_trades_many(missing, network=network, max_messages=limit, timeout_s=timeout_s)
+        except Exception as e:
+            batches = e
+        _trades_store(network, limit, ttl_sec, out, batches, missing)
+    return out
+
+
+async def _atrades_many_cached(coins: List[str], network: str, limit: int) -> Dict[str, Any]:
+    ttl_sec, timeout_s = _trades_params()
+    out, missing = _trades_cached_split(coins, network, limit)
+    if missing:
+        try:
+            batches: Any = await afetch_recent_trades_many(missing, network=network, max_messages=limit, timeout_s=timeout_s)
+        except Exception as e:
+            batches = e
+        _trades_store(network, limit, ttl_sec, out, batches, missing)
+    return out
+
+
+def _nan_to_none(v: float) -> Optional[float]:
+    return None if np.isnan(v) else float(v)
+
+
+def _batch_orderbook_metrics(books: List[Dict[str, Any]], top_n: int = 10) -> List[Dict[str, Any]]:
+    """_compute_orderbook_metrics for many books at once over padded [coins, top_n] arrays."""
+    n = len(books)
+    px = {side: np.full((n, top_n), np.nan) for side in ("bids", "asks")}
+    sz = {side: np.zeros((n, top_n)) for side in ("bids", "asks")}
+    for i, ob in enumerate(books):
+        for side in ("bids", "asks"):
+            levels = (ob.get(side) or [])[:top_n]
+            if levels:
+                arr = np.asarray(levels, dtype=np.float64)[:, :2]
+                px[side][i, :len(arr)] = arr[:, 0]
+                sz[side][i, :len(arr)] = arr[:, 1]
+    best_bid, best_ask = px["bids"][:, 0], px["asks"][:, 0]
+    both = ~np.isnan(best_bid) & ~np.isnan(best_ask)
+    mid = np.where(both, (best_bid + best_ask) / 2.0, np.where(np.isnan(best_bid), best_ask, best_bid))
+    spread = np.where(both, best_ask - best_bid, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        spread_bps = np.where((spread != 0) & (mid != 0), spread / mid * 10000.0, np.nan)
+        bid_sum, ask_sum = sz["bids"].sum(axis=1), sz["asks"].sum(axis=1)
+        total = bid_sum + ask_sum
+        imbalance = np.where(total > 0, (bid_sum - ask_sum) / total, 0.0)
+    return [
+        {
+            "mid": _nan_to_none(mid[i]),
+            "spread": _nan_to_none(spread[i]),
+            "spreadBps": _nan_to_none(spread_bps[i]),
+            "tobVolumes": {"bid": float(sz["bids"][i, 0]), "ask": float(sz["asks"][i, 0])},
+            "depth": {"bidTopN": float(bid_sum[i]), "askTopN": float(ask_sum[i]), "levels": top_n},
+            "imbalance": float(imbalance[i]),
+        }
+        for i in range(n)
+    ]
+
+
+def _batch_trades_metrics(trades: List[List[Dict[str, Any]]], mids: List[Optional[float]]) -> List[Dict[str, Any]]:
+    """_compute_trades_metrics for many coins with one bincount pass over all trades."""
+    n = len(trades)
+    idx: List[int] = []
+    pxs: List[float] = []
+    szs: List[float] = []
+    sides: List[int] = []
+    for i, tr in enumerate(trades):
+        for t in tr:
+            d = t.get("data") if isinstance(t, dict) else None
+            row = d or t
+            if not isinstance(row, dict):
+                continue
+            px = row.get("px") or row.get("price")
+            sz = row.get("sz") or row.get("size")
+            side = row.get("side") or row.get("aggressor")
+            try:
+                if px is not None and sz is not None:
+                    pxf, szf = float(px), float(sz)
+                    idx.append(i)
+                    pxs.append(pxf)
+                    szs.append(szf)
+                    sides.append(1 if side in ("buy", "Buy", "b") else (-1 if side in ("sell", "Sell", "s") else 0))
+            except Exception:
+                continue
+    ix = np.asarray(idx, dtype=np.int64)
+    p = np.asarray(pxs, dtype=np.float64)
+    q = np.asarray(szs, dtype=np.float64)
+    sd = np.asarray(sides, dtype=np.int64)
+    vol = np.bincount(ix, weights=q, minlength=n)
+    notional = np.bincount(ix, weights=p * q, minlength=n)
+    buys = np.bincount(ix, weights=(sd == 1).astype(np.float64), minlength=n)
+    sells = np.bincount(ix, weights=(sd == -1).astype(np.float64), minlength=n)
+    out: List[Dict[str, Any]] = []
+    for i in range(n):
+        vwap = float(notional[i] / vol[i]) if vol[i] > 0 else None
+        ref_mid = mids[i]
+        count = int(buys[i] + sells[i])
+        out.append({
+            "vwap": vwap,
+            "tradeImbalance": (buys[i] - sells[i]) / max(count, 1),
+            "vwapDrift": ((vwap - ref_mid) / ref_mid) if (vwap and ref_mid) else None,
+            "count": count,
+        })
+    return out
+
+
+def _batch_market_picture(coins: List[str], network: str, ctxs_state: Any, books: Dict[str, Any], trades: Dict[str, Any]) -> Dict[str, Any]:
+    obs = [books.get(c) if isinstance(books.get(c), dict) else {"bids": [], "asks": []} for c in coins]
+    trs = [trades.get(c) if isinstance(trades.get(c), list) else [] for c in coins]
+    obms = _batch_orderbook_metrics(obs)
+    trms = _batch_trades_metrics(trs, [m.get("mid") for m in obms])
+    out: Dict[str, Any] = {}
+    for c, obm, trm in zip(coins, obms, trms):
+        try:
+            out[c] = _full_market_picture(c, network, ctxs_state, books.get(c, {"bids": [], "asks": []}), trades.get(c, []), obm=obm, trm=trm)
         except Exception as e:
             out[c] = {"error": str(e)}
     return {"ok": True, "data": out, "summary": f"coins {len(out)}"}
 
 
-@mcp.tool()
+def get_batch_full_market_picture(coins: List[str], network: str = "mainnet", depth: int = 30, trades: int = 30) -> Dict[str, Any]:
+    """Batch get_full_market_picture for a list of coins."""
+    coins = list(dict.fromkeys(coins))
+    # ctxs once; books and trades for every coin collected concurrently on the shared WS session
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        books_f = pool.submit(_orderbooks_cached, coins, network, depth)
+        trades_f = pool.submit(_trades_many_cached, coins, network, trades)
+        with info_priority("batch"):
+            ctxs_state = _try(_meta_ctxs_state, network)
+        books, trs = books_f.result(), trades_f.result()
+    return _batch_market_picture(coins, network, ctxs_state, books, trs)
+
+
+async def aget_batch_full_market_picture(coins: List[str], network: str = "mainnet", depth: int = 30, trades: int = 30) -> Dict[str, Any]:
+    coins = list(dict.fromkeys(coins))
+    with info_priority("batch"):
+        ctxs_state, books, trs = await asyncio.gather(
+            _ameta_ctxs_state(network),
+            _aorderbooks_cached(coins, network, depth),
+            _atrades_many_cached(coins, network, trades),
+            return_exceptions=True,
+        )
+    if isinstance(books, Exception):
+        books = {c: books for c in coins}
+    if isinstance(trs, Exception):
+        trs = {c: trs for c in coins}
+    return _batch_market_picture(coins, network, ctxs_state, books, trs)
+
+
 def get_metrics() -> Dict[str, Any]:
-    """Return basic telemetry counters for info calls/errors."""
-    return {"ok": True, "metrics": dict(_METRICS), "summary": f"info calls {_METRICS['info_calls']} errors {_METRICS['info_errors']}"}
+    """Return telemetry for info calls/errors, HTTP pools, the response cache, ctxs refreshers, the weight budget, the funding store and the ctxs sampler."""
+    with _METRICS_LOCK:
+        metrics = dict(_METRICS)
+    cache = _CACHE.stats()
+    with _SCHEDULERS_LOCK:
+        schedulers = {url: sched.stats() for url, sched in _SCHEDULERS.items() if sched is not None}
+    with _CTXS_REFRESHERS_LOCK:
+        refreshers = dict(_CTXS_REFRESHERS)
+    with _FUNDING_STORE_LOCK:
+        store = _FUNDING_STORE
+    # Reported only once opened; metrics alone do not create the database
+    funding_store = store.stats() if store is not None else None
+    with _SAMPLERS_LOCK:
+        samplers = {net: sm.info() for net, sm in _SAMPLERS.items() if sm is not None}
+    return {
+        "ok": True,
+        "metrics": metrics,
+        "httpPools": _http_pool_stats(),
+        "cache": cache,
+        "ctxsRefresh": {net: ref.stats() for net, ref in refreshers.items()},
+        "rateLimiter": schedulers,
+        "fundingStore": funding_store,
+        "sampler": samplers,
+        "summary": f"info calls {metrics['info_calls']} errors {metrics['info_errors']} cache hit rate {cache['hitRate']}",
+    }
 
-if __name__ == "__main__":
-    mcp.run()
+
+async def aget_metrics() -> Dict[str, Any]:
+    return get_metrics()
 
 
+############################
+# MCP registration
+############################
+
+# FastMCP serves the async variants under the original tool names and docs, so
+# concurrent tool calls share one event loop; the sync functions above remain
+# the in-process API used by the selector, the router and the FastAPI server.
+_MCP_TOOLS = [
+    info_raw,
+    get_perp_dexs,
+    get_meta,
+    get_meta_and_asset_ctxs,
+    get_clearinghouse_state,
+    get_user_funding,
+    get_user_non_funding_ledger_updates,
+    get_funding_history,
+    get_funding_summary,
+    get_predicted_fundings,
+    get_perps_at_open_interest_cap,
+    get_perp_deploy_auction_status,
+    get_active_asset_data,
+    get_perp_dex_limits,
+    server_time_ms,
+    get_orderbook,
+    get_recent_trades,
+    get_candles,
+    get_full_market_picture,
+    get_slippage,
+    get_liquidity_profile,
+    get_volatility_metrics,
+    get_trend_ma,
+    get_premium_monitor,
+    get_oi_trend,
+    get_market_stats,
+    screen_markets,
+    get_user_pnl_summary,
+    get_batch_full_market_picture,
+    get_metrics,
+]
+
+for _fn in _MCP_TOOLS:
+    mcp.tool(name=_fn.__name__, description=inspect.getdoc(_fn))(globals()["a" + _fn.__name__])
+
+
+if __name__ == "__main__":
+    mcp.run()
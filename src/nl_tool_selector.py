@@ -3,14 +3,21 @@
 
 from __future__ import annotations
 
+import hashlib
+import json
+import os
 import re
+import threading
 import time
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
 from typing import Any, Callable, Dict, List, Optional, Tuple
 
-from sentence_transformers import SentenceTransformer, util
+import numpy as np
+from sentence_transformers import SentenceTransformer
 
 import mcp_hyperliquid as hl
+from embedder_registry import default_embedder_key, get_embedder
 
 
 _ETH_ADDR_RE = re.compile(r"\b0x[a-fA-F0-9]{40}\b")
@@ -44,6 +51,21 @@ def _parse_time_window_days(text: str) -> int:
     return 1
 
 
+_INTERVAL_RE = re.compile(r"\b(1m|3m|5m|15m|30m|1h|2h|4h|8h|12h|1d|3d|1w)\b")
+
+
+def _parse_interval(text: str) -> str:
+    m = _INTERVAL_RE.search(text)
+    if m:
+        return m.group(1)
+    lower = text.lower()
+    if "daily" in lower:
+        return "1d"
+    if "weekly" in lower:
+        return "1w"
+    return "1h"
+
+
 def _parse_target_price(text: str) -> Optional[float]:
     lower = text.lower()
     if not any(k in lower for k in ["until", "up to", "to "]):
@@ -67,6 +89,12 @@ class ToolSpec:
     name: str
     description: str
     builder: Callable[[str], Optional[Tuple[Callable[..., Any], Dict[str, Any]]]]
+    # Extra phrasings routed to this tool; its score is the best match over description + examples
+    examples: List[str] = field(default_factory=list)
+    # Minimum routing score to run the tool (None -> RAG_TOOL_MIN_SCORE)
+    threshold: Optional[float] = None
+    # Run once per ticker in the prompt (builders that take a `coin`)
+    fan_out: bool = True
 
 
 def _b_meta_and_ctxs(_: str) -> Optional[Tuple[Callable[..., Any], Dict[str, Any]]]:
@@ -101,7 +129,7 @@ def _b_funding_history(prompt: str) -> Optional[Tuple[Callable[..., Any], Dict[s
     days = _parse_time_window_days(prompt)
     end = _now_ms()
     start = end - days * 24 * 60 * 60 * 1000
-    return hl.get_funding_history, {"coin": tickers[0], "startTime": start, "endTime": end, "network": "mainnet"}
+    return hl.get_funding_summary, {"coin": tickers[0], "startTime": start, "endTime": end, "network": "mainnet"}
 
 
 def _b_predicted_funding(_: str) -> Optional[Tuple[Callable[..., Any], Dict[str, Any]]]:
@@ -112,6 +140,36 @@ def _b_oi_caps(_: str) -> Optional[Tuple[Callable[..., Any], Dict[str, Any]]]:
     return hl.get_perps_at_open_interest_cap, {"network": "mainnet"}
 
 
+_TOP_N_RE = re.compile(r"\b(?:top|bottom|best|worst)\s+(\d{1,3})\b", re.IGNORECASE)
+# "OI cap" / "at the cap", not "market cap" or "capital"
+_OI_CAP_RE = re.compile(r"\b(?:oi|open interest) cap\b|\bat (?:the )?cap\b")
+
+
+def _b_screen_markets(prompt: str) -> Optional[Tuple[Callable[..., Any], Dict[str, Any]]]:
+    lower = prompt.lower()
+    kwargs: Dict[str, Any] = {"network": "mainnet", "top": 10}
+    m = _TOP_N_RE.search(prompt)
+    if m:
+        kwargs["top"] = int(m.group(1))
+    biggest = any(k in lower for k in ["biggest", "largest", "extreme"])
+    if "premium" in lower or "basis" in lower:
+        kwargs["sortBy"] = "absPremium" if biggest else "premium"
+    elif "volume" in lower or "traded" in lower:
+        kwargs["sortBy"] = "volume"
+    elif "open interest" in lower or re.search(r"\boi\b", lower):
+        kwargs["sortBy"] = "oi"
+    else:
+        kwargs["sortBy"] = "absFunding" if biggest else "funding"
+    kwargs["ascending"] = any(k in lower for k in ["lowest", "most negative", "smallest", "least", "bottom"])
+    if "negative funding" in lower:
+        kwargs["maxFunding"] = 0.0
+    elif "positive funding" in lower:
+        kwargs["minFunding"] = 0.0
+    if _OI_CAP_RE.search(lower):
+        kwargs["atOiCap"] = True
+    return hl.screen_markets, kwargs
+
+
 def _b_asks_to_price(prompt: str) -> Optional[Tuple[Callable[..., Any], Dict[str, Any]]]:
     tickers = _extract_tickers(prompt)
     tgt = _parse_target_price(prompt)
@@ -166,14 +224,14 @@ def _b_volatility_metrics(prompt: str) -> Optional[Tuple[Callable[..., Any], Dic
     tickers = _extract_tickers(prompt)
     if not tickers:
         return None
-    return hl.get_volatility_metrics, {"coin": tickers[0], "network": "mainnet", "trades": 200}
+    return hl.get_volatility_metrics, {"coin": tickers[0], "network": "mainnet", "trades": 200, "interval": _parse_interval(prompt)}
 
 
 def _b_trend_ma(prompt: str) -> Optional[Tuple[Callable[..., Any], Dict[str, Any]]]:
     tickers = _extract_tickers(prompt)
     if not tickers:
         return None
-    return hl.get_trend_ma, {"coin": tickers[0], "network": "mainnet", "short": 20, "long": 50}
+    return hl.get_trend_ma, {"coin": tickers[0], "network": "mainnet", "short": 20, "long": 50, "interval": _parse_interval(prompt)}
 
 
 def _b_premium_monitor(prompt: str) -> Optional[Tuple[Callable[..., Any], Dict[str, Any]]]:
@@ -195,98 +253,533 @@ TOOLS: List[ToolSpec] = [
         name="full_market_picture",
         description="Fused Info + WebSocket snapshot with analytics and buy/sell signal for a coin like $BTC.",
         builder=_b_full_market,
+        examples=[
+            "What's going on with $BTC right now?",
+            "Should I buy or sell $SOL?",
+            "Give me a market overview for $ETH",
+            "Is $HYPE bullish or bearish?",
+        ],
     ),
     ToolSpec(
         name="funding_history",
         description="Historical funding rate series for a coin to compute averages over day or week.",
         builder=_b_funding_history,
+        examples=[
+            "What was the average funding for $BTC this week?",
+            "Show $ETH funding over the last 30 days",
+            "How has funding on $SOL changed today?",
+        ],
     ),
     ToolSpec(
         name="predicted_fundings",
         description="Predicted funding rates across venues (overview, not coin-specific).",
         builder=_b_predicted_funding,
+        examples=[
+            "What are the predicted funding rates?",
+            "Next funding across venues",
+            "Which coins will pay the highest funding next?",
+        ],
+        threshold=0.25,
     ),
     ToolSpec(
         name="oi_caps",
         description="List perps currently at open interest caps (global).",
         builder=_b_oi_caps,
+        examples=[
+            "Which perps are at their open interest cap?",
+            "List markets that hit the OI limit",
+            "Are any assets capped on open interest?",
+        ],
+        threshold=0.25,
+    ),
+    ToolSpec(
+        name="screen_markets",
+        description="Rank and filter all perps by funding, premium, open interest or volume (cross-market screener).",
+        builder=_b_screen_markets,
+        examples=[
+            "Which perps have the highest funding?",
+            "Top 10 coins by open interest",
+            "Biggest premium across the market",
+            "Most traded perps by volume today",
+            "Which markets at the OI cap have negative funding?",
+            "Lowest funding rates right now",
+        ],
+        threshold=0.25,
+        fan_out=False,
     ),
     ToolSpec(
         name="orderbook",
         description="Orderbook snapshot with top of book for a specific coin like $ETH.",
         builder=_b_orderbook,
+        examples=[
+            "Show the $ETH order book",
+            "What are the best bid and ask for $BTC?",
+            "Top of book for $SOL",
+        ],
     ),
     ToolSpec(
         name="trades",
         description="Recent trades for a specific coin like $ETH to see flow and VWAP.",
         builder=_b_trades,
+        examples=[
+            "Recent $ETH trades",
+            "What trades just printed on $BTC?",
+            "Show the latest fills and flow for $SOL",
+        ],
     ),
     ToolSpec(
         name="asks_to_price",
         description="Sum asks up to a target price mentioned in the prompt (e.g., 'until $115,000').",
         builder=_b_asks_to_price,
+        examples=[
+            "How much $BTC is offered until $115,000?",
+            "Total asks for $ETH up to 4000",
+            "How many units to push $SOL to 250?",
+        ],
+        # The target price refers to one coin
+        fan_out=False,
     ),
     ToolSpec(
         name="account_summary",
         description="Wallet account summary using clearinghouseState when a 0x address is provided.",
         builder=_b_account_summary,
+        examples=[
+            "What is the balance of 0xabc...?",
+            "Show account value and positions for this wallet",
+            "How much can this address withdraw?",
+        ],
     ),
     ToolSpec(
         name="active_asset_data",
         description="Active asset data (limits, leverage, mark) for a wallet and coin like $APT.",
         builder=_b_active_asset,
+        examples=[
+            "What leverage does this wallet have on $APT?",
+            "Max trade size for 0x... on $ETH",
+            "Active asset limits for a wallet and coin",
+        ],
     ),
     ToolSpec(
         name="slippage",
         description="Slippage/price impact estimate for buying/selling a USD notional on a coin.",
         builder=_b_slippage,
+        examples=[
+            "What's the price impact of buying 50000 USD of $ETH?",
+            "Slippage to sell $10000 of $BTC",
+            "How much would a large $SOL market order move the price?",
+        ],
     ),
     ToolSpec(
         name="meta_and_ctxs",
         description="Perp asset contexts including mark price, funding, open interest, premium.",
         builder=_b_meta_and_ctxs,
+        examples=[
+            "Show mark prices, funding and open interest for all perps",
+            "Asset contexts for every market",
+            "Which perp has the highest open interest?",
+        ],
+        threshold=0.25,
     ),
     ToolSpec(
         name="user_pnl",
         description="User PnL summary over a window (1d/7d/30d) for a 0x wallet.",
         builder=_b_user_pnl,
+        examples=[
+            "What is the PnL of 0x... this week?",
+            "How much did this wallet make over 30 days?",
+            "Daily profit and loss for an address",
+        ],
     ),
     ToolSpec(
         name="liquidity_profile",
         description="Cumulative depth profile for bids/asks to gauge top-N liquidity.",
         builder=_b_liquidity_profile,
+        examples=[
+            "How deep is the $BTC book?",
+            "Cumulative liquidity near the mid for $ETH",
+            "Depth on bids versus asks for $SOL",
+        ],
     ),
     ToolSpec(
         name="volatility_metrics",
-        description="Realized volatility snapshot from recent trades for a coin.",
+        description="Realized, Parkinson and Garman-Klass volatility and ATR from candles for a coin.",
         builder=_b_volatility_metrics,
+        examples=[
+            "How volatile is $ETH right now?",
+            "Realized volatility for $BTC",
+            "Is $SOL choppy today?",
+            "What is the 4h ATR on $BTC?",
+        ],
     ),
     ToolSpec(
         name="trend_ma",
-        description="Simple moving average trend and cross (e.g., 20/50).",
+        description="Simple moving average trend and cross (e.g., 20/50) over candle closes.",
         builder=_b_trend_ma,
+        examples=[
+            "Is $BTC above its moving average?",
+            "Golden cross on $ETH?",
+            "Moving average trend for $SOL",
+        ],
     ),
     ToolSpec(
         name="premium_monitor",
         description="Current perp premium vs oracle and funding for a coin.",
         builder=_b_premium_monitor,
+        examples=[
+            "Is $ETH trading at a premium to oracle?",
+            "Mark vs oracle premium for $BTC",
+            "Perp basis on $SOL",
+        ],
     ),
     ToolSpec(
         name="oi_trend",
         description="Open interest level and delta vs prior cached snapshot.",
         builder=_b_oi_trend,
+        examples=[
+            "Is open interest rising on $BTC?",
+            "How has $ETH OI changed?",
+            "Open interest delta for $SOL",
+        ],
     ),
 ]
 
 
-_EMBEDDER: Optional[SentenceTransformer] = None
+def _get_embedder() -> SentenceTransformer:
+    # Shared with retrieval (same model/device -> same instance); RAG_EMBEDDER by default
+    return get_embedder()
 
 
-def _get_embedder() -> SentenceTransformer:
-    global _EMBEDDER
-    if _EMBEDDER is None:
-        _EMBEDDER = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
-    return _EMBEDDER
+# Tools below this routing score are not run unless their ToolSpec sets a threshold
+TOOL_MIN_SCORE = float(os.getenv("RAG_TOOL_MIN_SCORE", "0.0"))
+
+
+class ToolRouter:
+    """Normalized embeddings of every tool phrase (description + examples), grouped by tool.
+
+    Rows for tool i are embeddings[starts[i]:starts[i + 1]], so scoring a prompt is one
+    matrix-vector product followed by a per-tool max (np.maximum.reduceat).
+    """
+
+    def __init__(self, embeddings: np.ndarray, starts: np.ndarray, names: List[str]) -> None:
+        self.embeddings = embeddings.astype(np.float32)
+        self.starts = starts.astype(np.int64)
+        self.names = names
+
+    def scores(self, query_emb: np.ndarray) -> np.ndarray:
+        sims = self.embeddings @ query_emb.astype(np.float32)
+        return np.maximum.reduceat(sims, self.starts[:-1])
+
+
+_ROUTER: Optional[ToolRouter] = None
+_ROUTER_LOCK = threading.Lock()
+
+
+def _router_path() -> str:
+    return os.getenv("RAG_TOOL_ROUTER_PATH") or os.path.join(os.getenv("RAG_INDEX_DIR", "./rag_index"), "tool_router.npz")
+
+
+def _tool_phrases() -> List[List[str]]:
+    return [[t.description] + list(t.examples) for t in TOOLS]
+
+
+def _router_signature(phrases: List[List[str]]) -> str:
+    model_id, backend = default_embedder_key()
+    blob = json.dumps({"model": model_id, "backend": backend, "tools": [t.name for t in TOOLS], "phrases": phrases})
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()
+
+
+def get_router() -> ToolRouter:
+    """Routing matrix for TOOLS, loaded from disk when the model id and phrases match, else built once."""
+    global _ROUTER
+    if _ROUTER is not None:
+        return _ROUTER
+    with _ROUTER_LOCK:
+        if _ROUTER is not None:
+            return _ROUTER
+        phrases = _tool_phrases()
+        sig = _router_signature(phrases)
+        names = [t.name for t in TOOLS]
+        path = _router_path()
+        router: Optional[ToolRouter] = None
+        if os.path.exists(path):
+            try:
+                with np.load(path, allow_pickle=False) as data:
+                    if str(data["signature"]) == sig:
+                        router = ToolRouter(data["embeddings"], data["starts"], names)
+            except Exception:
+                router = None
+        if router is None:
+            flat = [p for group in phrases for p in group]
+            starts = np.cumsum([0] + [len(group) for group in phrases])
+            embs = _get_embedder().encode(flat, normalize_embeddings=True, convert_to_numpy=True)
+            router = ToolRouter(np.asarray(embs), np.asarray(starts), names)
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+                tmp = path + ".tmp.npz"
+                np.savez(tmp, embeddings=router.embeddings, starts=router.starts, signature=np.asarray(sig))
+                os.replace(tmp, path)
+            except Exception:
+                pass
+        _ROUTER = router
+        return router
+
+
+def warm_router() -> None:
+    """Load the embedder and routing matrix ahead of the first request."""
+    try:
+        get_router()
+    except Exception:
+        pass
+
+
+# Selected tools run concurrently on a per-request pool of up to RAG_TOOL_WORKERS threads,
+# under one deadline per prompt
+TOOL_WORKERS = int(os.getenv("RAG_TOOL_WORKERS", "8"))
+TOOL_DEADLINE_S = float(os.getenv("RAG_TOOL_DEADLINE_S", "8.0"))
+
+
+def _timed_call(fn: Callable[..., Any], kwargs: Dict[str, Any]) -> Tuple[Any, int]:
+    t0 = time.perf_counter()
+    try:
+        res = fn(**kwargs)
+    except Exception as e:
+        res = {"ok": False, "error": str(e)}
+    return res, int((time.perf_counter() - t0) * 1000)
+
+
+def _run_tools(
+    jobs: List[Tuple[Callable[..., Any], Dict[str, Any]]],
+    deadline_s: Optional[float] = None,
+) -> List[Tuple[Any, Optional[int], Optional[str]]]:
+    """Run (fn, kwargs) jobs concurrently; returns (response, elapsedMs, status) per job, in job order.
+
+    status is None for finished jobs, "timedOut" for jobs still running at the deadline (their
+    thread finishes in the background, results dropped) and "skipped" for jobs that never started.
+    The pool belongs to this call, so stragglers never hold workers another request needs.
+    """
+    if not jobs:
+        return []
+    deadline_s = TOOL_DEADLINE_S if deadline_s is None else deadline_s
+    pool = ThreadPoolExecutor(max_workers=max(1, min(len(jobs), TOOL_WORKERS)), thread_name_prefix="nl-tool")
+    try:
+        futures = [pool.submit(_timed_call, fn, kwargs) for fn, kwargs in jobs]
+        done, _ = wait(futures, timeout=deadline_s)
+        out: List[Tuple[Any, Optional[int], Optional[str]]] = []
+        for fut in futures:
+            if fut in done:
+                res, elapsed = fut.result()
+                out.append((res, elapsed, None))
+            else:
+                # cancel() only succeeds for jobs still queued behind the worker limit
+                out.append((None, None, "skipped" if fut.cancel() else "timedOut"))
+        return out
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _failed(res: Any) -> bool:
+    return res is None or (isinstance(res, dict) and res.get("ok") is False)
+
+
+def _label_coin(line: str, coin: str) -> str:
+    # "Funding: avg x" -> "Funding (ETH): avg x" so multi-coin lines stay distinguishable
+    label, sep, rest = line.partition(":")
+    return f"{label} ({coin}):{rest}" if sep else f"{coin}: {line}"
+
+
+def _render_tool_result(name: str, prompt: str, res: Any) -> Optional[str]:
+    """One natural-language context line for a tool response (None when there is nothing to say)."""
+    # prefer summary; fallback to minimal key-values
+    summary = res.get("summary") if isinstance(res, dict) else None
+    payload = {}
+    # attach a compact structured slice to aid the model
+    try:
+        if name == "account_summary":
+            d = (res.get("data") if isinstance(res, dict) else {}) or {}
+            ms = d.get("marginSummary", {}) if isinstance(d, dict) else {}
+            positions = d.get("assetPositions", []) if isinstance(d, dict) else []
+            payload = {
+                "accountValue": ms.get("accountValue"),
+                "totalNtlPos": ms.get("totalNtlPos"),
+                "positions": len(positions),
+                "withdrawable": d.get("withdrawable"),
+            }
+        elif name == "asks_to_price":
+            # Sum asks up to a target price
+            target = _parse_target_price(prompt)
+            data = res.get("data") if isinstance(res, dict) else None
+            asks = (data or {}).get("asks") if isinstance(data, dict) else []
+            total_units = 0.0
+            total_notional = 0.0
+            try:
+                for level in asks or []:
+                    px, sz = level[0], level[1]
+                    pxf = float(px)
+                    szf = float(sz)
+                    if target is not None and pxf <= target:
+                        total_units += szf
+                        total_notional += pxf * szf
+                    else:
+                        break
+            except Exception:
+                total_units = 0.0
+                total_notional = 0.0
+            payload = {"asksTo": target, "units": total_units, "notional": total_notional}
+        elif name == "oi_caps":
+            caps = res.get("data") if isinstance(res, dict) else []
+            if isinstance(caps, list):
+                payload = {"caps": caps[:20]}
+        elif name == "funding_history":
+            agg = (res.get("data") or {}) if isinstance(res, dict) else {}
+            payload = {
+                "avgFunding": agg.get("avg"),
+                "sumFunding": agg.get("sum"),
+                "annualized": agg.get("annualized"),
+                "points": agg.get("points", 0),
+            }
+        elif name == "full_market_picture":
+            mp = res if isinstance(res, dict) else {}
+            sig = (mp.get("signal") or {}) if isinstance(mp, dict) else {}
+            snap = (mp.get("marketSnapshot") or {}) if isinstance(mp, dict) else {}
+            payload = {
+                "signal": sig.get("label"),
+                "score": sig.get("score"),
+                "mid": snap.get("mid"),
+                "funding": snap.get("funding"),
+                "OI": snap.get("OI"),
+            }
+        elif name == "slippage":
+            payload = {
+                "avgPx": res.get("avgPx") if isinstance(res, dict) else None,
+                "slippageBps": res.get("slippageBps") if isinstance(res, dict) else None,
+            }
+        elif name == "predicted_fundings":
+            data = res.get("data") if isinstance(res, dict) else []
+            coins = [e[0] for e in data if isinstance(e, list) and e]
+            payload = {"coins": coins[:15]}
+        elif name == "liquidity_profile":
+            bid = res.get("bid") if isinstance(res, dict) else []
+            ask = res.get("ask") if isinstance(res, dict) else []
+            try:
+                bid_total = float(bid[-1][1]) if bid else 0.0
+                ask_total = float(ask[-1][1]) if ask else 0.0
+            except Exception:
+                bid_total, ask_total = 0.0, 0.0
+            payload = {"bidTotal": bid_total, "askTotal": ask_total, "levels": (len(bid), len(ask))}
+        elif name == "volatility_metrics":
+            payload = {
+                "realizedVol": res.get("realizedVol") if isinstance(res, dict) else None,
+                "parkinsonVol": res.get("parkinsonVol") if isinstance(res, dict) else None,
+                "atr": res.get("atr") if isinstance(res, dict) else None,
+                "interval": res.get("interval") if isinstance(res, dict) else None,
+            }
+        elif name == "trend_ma":
+            payload = {
+                "s": res.get("smaShort") if isinstance(res, dict) else None,
+                "l": res.get("smaLong") if isinstance(res, dict) else None,
+                "cross": res.get("cross") if isinstance(res, dict) else None,
+            }
+        elif name == "premium_monitor":
+            payload = {
+                "premium": res.get("premium") if isinstance(res, dict) else None,
+                "funding": res.get("funding") if isinstance(res, dict) else None,
+                "z": res.get("zScore") if isinstance(res, dict) else None,
+            }
+        elif name == "oi_trend":
+            payload = {
+                "oi": res.get("openInterest") if isinstance(res, dict) else None,
+                "delta": res.get("delta") if isinstance(res, dict) else None,
+                "spanS": res.get("spanS") if isinstance(res, dict) else None,
+            }
+        elif name == "screen_markets":
+            rows = res.get("rows") if isinstance(res, dict) else []
+            payload = {"sortBy": res.get("sortBy"), "rows": rows or []}
+    except Exception:
+        payload = {}
+
+    # Natural text, no raw dict printing
+    if name == "account_summary" and payload:
+        return (
+            f"Wallet: available ${payload.get('withdrawable')}, account ${payload.get('accountValue')}, "
+            f"NtlPos {payload.get('totalNtlPos')}, positions {payload.get('positions')}"
+        )
+    elif name == "asks_to_price" and payload:
+        ticker_list = _extract_tickers(prompt)
+        coin = ticker_list[0] if ticker_list else ""
+        tgt = payload.get("asksTo")
+        units = payload.get("units")
+        notion = payload.get("notional")
+        if tgt is not None and units is not None:
+            return (
+                f"Asks to ${tgt}: {units:.4f} {coin} (~${notion:.2f})"
+            )
+    elif name == "oi_caps" and payload:
+        caps = payload.get('caps') or []
+        return "OI caps: " + ", ".join(caps)
+    elif name == "funding_history" and payload:
+        avg = payload.get('avgFunding')
+        if avg is None:
+            return "Funding: no data"
+        return f"Funding: avg {avg:.6g}, sum {payload.get('sumFunding'):.6g}, annualized {payload.get('annualized'):.2%} ({payload.get('points')} points)"
+    elif name == "full_market_picture" and payload:
+        # Convert real-time snapshot into a compact NL summary for the model
+        sig = payload.get('signal')
+        score = payload.get('score')
+        mid = payload.get('mid')
+        fund = payload.get('funding')
+        oi = payload.get('OI')
+        parts = []
+        if sig is not None: parts.append(f"signal {sig} ({score})")
+        if mid is not None: parts.append(f"mid {mid}")
+        if fund is not None: parts.append(f"funding {fund}")
+        if oi is not None: parts.append(f"OI {oi}")
+        return "Market: " + ", ".join(parts)
+    elif name == "slippage" and payload:
+        return (
+            f"Slippage: avg px {payload.get('avgPx')}, slip {payload.get('slippageBps')}bps"
+        )
+    elif name == "liquidity_profile" and payload:
+        bt = payload.get('bidTotal')
+        at = payload.get('askTotal')
+        return (
+            f"Liquidity: top-depth bid {bt}, ask {at}"
+        )
+    elif name == "volatility_metrics" and payload:
+        if payload.get('atr') is not None:
+            return (
+                f"Vol ({payload.get('interval')}): realized {payload.get('realizedVol'):.4f}, "
+                f"Parkinson {payload.get('parkinsonVol'):.4f}, ATR {payload.get('atr'):.6g}"
+            )
+        return (
+            f"Vol: realized {payload.get('realizedVol')}"
+        )
+    elif name == "trend_ma" and payload:
+        return (
+            f"Trend: {payload.get('cross')} 20/50"
+        )
+    elif name == "premium_monitor" and payload:
+        z = payload.get('z')
+        return (
+            f"Premium: {payload.get('premium')}, funding {payload.get('funding')}"
+            + (f", z {z:.2f}" if z is not None else "")
+        )
+    elif name == "oi_trend" and payload:
+        span = payload.get('spanS')
+        return (
+            f"OI: {payload.get('oi')} Δ {payload.get('delta')}"
+            + (f" over {span / 60:.0f}m" if span else "")
+        )
+    elif name == "screen_markets" and payload:
+        parts = [
+            f"{r.get('coin')} (funding {r.get('funding') or 0:.6g}, prem {r.get('premium') or 0:.6g}, OI ${r.get('oiUsd') or 0:,.0f}, vol ${r.get('volumeUsd') or 0:,.0f})"
+            for r in payload.get("rows", [])
+        ]
+        return f"Screener by {payload.get('sortBy')}: " + ("; ".join(parts) if parts else "no matches")
+    elif summary:
+        return summary
+    else:
+        return f"{name}: done"
+    return None
 
 
 def build_realtime_context(prompt: str, max_tools: int = 3) -> str:
@@ -296,12 +789,10 @@ def build_realtime_context(prompt: str, max_tools: int = 3) -> str:
 
 
 def build_realtime_context_structured(prompt: str, max_tools: int = 3) -> tuple[str, List[Dict[str, Any]]]:
-    embedder = _get_embedder()
-    # Rank tools by similarity of prompt to tool descriptions
-    tool_texts = [t.description for t in TOOLS]
-    em_tools = embedder.encode(tool_texts, normalize_embeddings=True, convert_to_numpy=True)
-    em_query = embedder.encode([prompt], normalize_embeddings=True, convert_to_numpy=True)[0]
-    sims = util.cos_sim(em_query, em_tools).cpu().numpy()[0]
+    router = get_router()
+    # Rank tools by best similarity of the prompt to each tool's phrases
+    em_query = _get_embedder().encode([prompt], normalize_embeddings=True, convert_to_numpy=True)[0]
+    sims = router.scores(np.asarray(em_query))
     ranked: List[Tuple[float, ToolSpec]] = sorted(zip(sims, TOOLS), key=lambda x: x[0], reverse=True)
 
     # Context gating: if a wallet address is present, prefer user-scoped tools only;
@@ -311,7 +802,7 @@ def build_realtime_context_structured(prompt: str, max_tools: int = 3) -> tuple[
 
     def _allowed(name: str) -> bool:
         user_only = {"account_summary", "active_asset_data", "user_pnl"}
-        global_only = {"oi_caps", "predicted_fundings", "meta_and_ctxs"}
+        global_only = {"oi_caps", "predicted_fundings", "meta_and_ctxs", "screen_markets"}
         ticker_tools = {
             "full_market_picture", "orderbook", "trades", "funding_history",
             "asks_to_price", "slippage", "premium_monitor", "volatility_metrics",
@@ -326,194 +817,74 @@ def build_realtime_context_structured(prompt: str, max_tools: int = 3) -> tuple[
         # no addr/ticker → allow global only
         return name in global_only
 
-    lines: List[str] = []
-    calls: List[Dict[str, Any]] = []
-    used = 0
-    for _, spec in ranked:
-        if used >= max_tools:
-            break
-        if not _allowed(spec.name):
-            continue
-        try:
-            built = spec.builder(prompt)
-            if not built:
+    # Pick the top-ranked tools that apply to this prompt, expand per-coin tools across
+    # every ticker (up to HYPERLIQUID_MAX_TICKERS), then run all calls concurrently under one
+    # RAG_TOOL_DEADLINE_S deadline
+    tickers = _extract_tickers(prompt)[:hl.max_tickers()]
+    candidates = iter(ranked)
+
+    def _pick(n: int) -> List[List[Tuple[ToolSpec, Callable[..., Any], Dict[str, Any]]]]:
+        groups: List[List[Tuple[ToolSpec, Callable[..., Any], Dict[str, Any]]]] = []
+        while len(groups) < n:
+            nxt = next(candidates, None)
+            if nxt is None:
+                break
+            score, spec = nxt
+            if not _allowed(spec.name):
                 continue
-            fn, kwargs = built
-            res = fn(**kwargs)
-            try:
-                calls.append({"tool": spec.name, "function": getattr(fn, "__name__", str(fn)), "kwargs": kwargs, "response": res})
-            except Exception:
-                pass
-            # prefer summary; fallback to minimal key-values
-            if isinstance(res, dict) and res.get("ok") is False:
+            if score < (spec.threshold if spec.threshold is not None else TOOL_MIN_SCORE):
                 continue
-            summary = res.get("summary") if isinstance(res, dict) else None
-            payload = {}
-            # attach a compact structured slice to aid the model
             try:
-                if spec.name == "account_summary":
-                    d = (res.get("data") if isinstance(res, dict) else {}) or {}
-                    ms = d.get("marginSummary", {}) if isinstance(d, dict) else {}
-                    positions = d.get("assetPositions", []) if isinstance(d, dict) else []
-                    payload = {
-                        "accountValue": ms.get("accountValue"),
-                        "totalNtlPos": ms.get("totalNtlPos"),
-                        "positions": len(positions),
-                        "withdrawable": d.get("withdrawable"),
-                    }
-                elif spec.name == "asks_to_price":
-                    # Sum asks up to a target price
-                    target = _parse_target_price(prompt)
-                    data = res.get("data") if isinstance(res, dict) else None
-                    asks = (data or {}).get("asks") if isinstance(data, dict) else []
-                    total_units = 0.0
-                    total_notional = 0.0
-                    try:
-                        for level in asks or []:
-                            px, sz = level[0], level[1]
-                            pxf = float(px)
-                            szf = float(sz)
-                            if target is not None and pxf <= target:
-                                total_units += szf
-                                total_notional += pxf * szf
-                            else:
-                                break
-                    except Exception:
-                        total_units = 0.0
-                        total_notional = 0.0
-                    payload = {"asksTo": target, "units": total_units, "notional": total_notional}
-                elif spec.name == "oi_caps":
-                    caps = res.get("data") if isinstance(res, dict) else []
-                    if isinstance(caps, list):
-                        payload = {"caps": caps[:20]}
-                elif spec.name == "funding_history":
-                    rows = res.get("data") if isinstance(res, dict) else []
-                    vals: List[float] = []
-                    for row in rows or []:
-                        try:
-                            vals.append(float(row.get("fundingRate")))
-                        except Exception:
-                            continue
-                    avg = (sum(vals) / len(vals)) if vals else None
-                    payload = {"avgFunding": avg, "points": len(vals)}
-                elif spec.name == "full_market_picture":
-                    mp = res if isinstance(res, dict) else {}
-                    sig = (mp.get("signal") or {}) if isinstance(mp, dict) else {}
-                    snap = (mp.get("marketSnapshot") or {}) if isinstance(mp, dict) else {}
-                    payload = {
-                        "signal": sig.get("label"),
-                        "score": sig.get("score"),
-                        "mid": snap.get("mid"),
-                        "funding": snap.get("funding"),
-                        "OI": snap.get("OI"),
-                    }
-                elif spec.name == "slippage":
-                    payload = {
-                        "avgPx": res.get("avgPx") if isinstance(res, dict) else None,
-                        "slippageBps": res.get("slippageBps") if isinstance(res, dict) else None,
-                    }
-                elif spec.name == "predicted_fundings":
-                    data = res.get("data") if isinstance(res, dict) else []
-                    coins = [e[0] for e in data if isinstance(e, list) and e]
-                    payload = {"coins": coins[:15]}
-                elif spec.name == "liquidity_profile":
-                    bid = res.get("bid") if isinstance(res, dict) else []
-                    ask = res.get("ask") if isinstance(res, dict) else []
-                    try:
-                        bid_total = float(bid[-1][1]) if bid else 0.0
-                        ask_total = float(ask[-1][1]) if ask else 0.0
-                    except Exception:
-                        bid_total, ask_total = 0.0, 0.0
-                    payload = {"bidTotal": bid_total, "askTotal": ask_total, "levels": (len(bid), len(ask))}
-                elif spec.name == "volatility_metrics":
-                    payload = {"realizedVol": res.get("realizedVol") if isinstance(res, dict) else None}
-                elif spec.name == "trend_ma":
-                    payload = {
-                        "s": res.get("smaShort") if isinstance(res, dict) else None,
-                        "l": res.get("smaLong") if isinstance(res, dict) else None,
-                        "cross": res.get("cross") if isinstance(res, dict) else None,
-                    }
-                elif spec.name == "premium_monitor":
-                    payload = {
-                        "premium": res.get("premium") if isinstance(res, dict) else None,
-                        "funding": res.get("funding") if isinstance(res, dict) else None,
-                    }
-                elif spec.name == "oi_trend":
-                    payload = {
-                        "oi": res.get("openInterest") if isinstance(res, dict) else None,
-                        "delta": res.get("delta") if isinstance(res, dict) else None,
-                    }
+                built = spec.builder(prompt)
             except Exception:
-                payload = {}
-
-            # Natural text, no raw dict printing
-            if spec.name == "account_summary" and payload:
-                lines.append(
-                    f"Wallet: available ${payload.get('withdrawable')}, account ${payload.get('accountValue')}, "
-                    f"NtlPos {payload.get('totalNtlPos')}, positions {payload.get('positions')}"
-                )
-            elif spec.name == "asks_to_price" and payload:
-                ticker_list = _extract_tickers(prompt)
-                coin = ticker_list[0] if ticker_list else ""
-                tgt = payload.get("asksTo")
-                units = payload.get("units")
-                notion = payload.get("notional")
-                if tgt is not None and units is not None:
-                    lines.append(
-                        f"Asks to ${tgt}: {units:.4f} {coin} (~${notion:.2f})"
-                    )
-            elif spec.name == "oi_caps" and payload:
-                caps = payload.get('caps') or []
-                lines.append("OI caps: " + ", ".join(caps))
-            elif spec.name == "funding_history" and payload:
-                avg = payload.get('avgFunding')
-                lines.append(f"Funding: avg {avg}" if avg is not None else "Funding: no data")
-            elif spec.name == "full_market_picture" and payload:
-                # Convert real-time snapshot into a compact NL summary for the model
-                sig = payload.get('signal')
-                score = payload.get('score')
-                mid = payload.get('mid')
-                fund = payload.get('funding')
-                oi = payload.get('OI')
-                parts = []
-                if sig is not None: parts.append(f"signal {sig} ({score})")
-                if mid is not None: parts.append(f"mid {mid}")
-                if fund is not None: parts.append(f"funding {fund}")
-                if oi is not None: parts.append(f"OI {oi}")
-                lines.append("Market: " + ", ".join(parts))
-            elif spec.name == "slippage" and payload:
-                lines.append(
-                    f"Slippage: avg px {payload.get('avgPx')}, slip {payload.get('slippageBps')}bps"
-                )
-            elif spec.name == "liquidity_profile" and payload:
-                bt = payload.get('bidTotal')
-                at = payload.get('askTotal')
-                lines.append(
-                    f"Liquidity: top-depth bid {bt}, ask {at}"
-                )
-            elif spec.name == "volatility_metrics" and payload:
-                lines.append(
-                    f"Vol: realized {payload.get('realizedVol')}"
-                )
-            elif spec.name == "trend_ma" and payload:
-                lines.append(
-                    f"Trend: {payload.get('cross')} 20/50"
-                )
-            elif spec.name == "premium_monitor" and payload:
-                lines.append(
-                    f"Premium: {payload.get('premium')}, funding {payload.get('funding')}"
-                )
-            elif spec.name == "oi_trend" and payload:
-                lines.append(
-                    f"OI: {payload.get('oi')} Δ {payload.get('delta')}"
-                )
-            elif summary:
-                lines.append(summary)
+                continue
+            if not built:
+                continue
+            fn, kwargs = built
+            if spec.fan_out and "coin" in kwargs and len(tickers) > 1:
+                groups.append([(spec, fn, dict(kwargs, coin=t)) for t in tickers])
             else:
-                lines.append(f"{spec.name}: done")
-            used += 1
+                groups.append([(spec, fn, kwargs)])
+        return groups
+
+    selected: List[Tuple[ToolSpec, Callable[..., Any], Dict[str, Any]]] = []
+    results: List[Tuple[Any, Optional[int], Optional[str]]] = []
+    deadline = time.monotonic() + TOOL_DEADLINE_S
+    groups = _pick(max_tools)
+    while groups:
+        batch = [call for group in groups for call in group]
+        batch_results = _run_tools([(fn, kwargs) for _, fn, kwargs in batch], max(deadline - time.monotonic(), 0.0))
+        selected.extend(batch)
+        results.extend(batch_results)
+        # A tool whose calls all failed gives its slot to the next-ranked tool; timed-out and
+        # skipped tools keep theirs since the shared deadline is already spent
+        failed = 0
+        i = 0
+        for group in groups:
+            group_results = batch_results[i:i + len(group)]
+            i += len(group)
+            if all(status is None and _failed(res) for res, _, status in group_results):
+                failed += 1
+        groups = _pick(failed) if failed and time.monotonic() < deadline else []
+
+    lines: List[str] = []
+    calls: List[Dict[str, Any]] = []
+    # Assemble in ranked order regardless of completion order
+    for (spec, fn, kwargs), (res, elapsed_ms, status) in zip(selected, results):
+        call = {"tool": spec.name, "function": getattr(fn, "__name__", str(fn)), "kwargs": kwargs, "response": res, "elapsedMs": elapsed_ms}
+        if status is not None:
+            call[status] = True
+        calls.append(call)
+        if status is not None or _failed(res):
+            continue
+        try:
+            line = _render_tool_result(spec.name, prompt, res)
         except Exception:
             continue
+        if line and spec.fan_out and "coin" in kwargs and len(tickers) > 1:
+            line = _label_coin(line, kwargs["coin"])
+        if line:
+            lines.append(line)
 
     return "\n".join(lines), calls
 
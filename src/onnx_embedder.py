@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Optional ONNX Runtime backend for the sentence embedder.
+
+The transformer of a SentenceTransformer model is exported to ONNX once
+(optionally int8 dynamically quantized) and cached under RAG_ONNX_CACHE
+(default ~/.cache/hl_onnx/<model>/). Pooling and normalization are done in
+NumPy so `OnnxEmbedder.encode` is a drop-in for `SentenceTransformer.encode`
+as used by rag_query, rag_chat, server.py and nl_tool_selector.
+
+Every export runs a parity check against the PyTorch embeddings; an artifact
+whose cosine parity is below RAG_ONNX_PARITY_MIN is not used.
+
+Select the backend with RAG_EMBEDDER_BACKEND=torch|onnx|onnx-int8, or export ahead
+of time:
+
+    python onnx_embedder.py --model sentence-transformers/all-MiniLM-L6-v2 --int8
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+try:  # Optional dependency; torch backend is used when unavailable
+    import onnxruntime as ort  # type: ignore
+    ORT_AVAILABLE = True
+except Exception:  # pragma: no cover
+    ort = None  # type: ignore
+    ORT_AVAILABLE = False
+
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+_CONFIG_NAME = "embedder.json"
+
+_PARITY_SENTENCES = [
+    "What is the funding rate for BTC perps on Hyperliquid?",
+    "How do I query clearinghouseState for a wallet?",
+    "Explain the difference between mark price and oracle price.",
+    "Which perps are at their open interest cap?",
+    "How are liquidations handled for isolated margin positions?",
+    "metaAndAssetCtxs returns universe metadata and per-asset contexts.",
+    "Vaults let depositors share in a leader's trading PnL.",
+    "The orderbook imbalance is skewed toward bids.",
+]
+
+
+def onnx_cache_dir(model_id: str) -> str:
+    root = os.getenv("RAG_ONNX_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "hl_onnx"))
+    return os.path.join(root, model_id.strip("/").replace("/", "__"))
+
+
+def _model_file(quantize: bool) -> str:
+    return "model.int8.onnx" if quantize else "model.onnx"
+
+
+def export_onnx(model_id: str, out_dir: str, quantize: bool = False, opset: int = 14) -> str:
+    """Export the model's transformer to `out_dir` (plus tokenizer and pooling config)."""
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    st = SentenceTransformer(model_id, device="cpu")
+    hf_model = st[0].auto_model.eval()
+    tokenizer = st.tokenizer
+    pooling = "mean"
+    for module in st:
+        if type(module).__name__ == "Pooling":
+            if getattr(module, "pooling_mode_cls_token", False):
+                pooling = "cls"
+            elif getattr(module, "pooling_mode_max_tokens", False):
+                pooling = "max"
+    normalize = any(type(m).__name__ == "Normalize" for m in st)
+
+    os.makedirs(out_dir, exist_ok=True)
+    tokenizer.save_pretrained(out_dir)
+    sample = tokenizer(["hello world"], return_tensors="pt")
+    input_names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in sample]
+
+    class _Encoder(torch.nn.Module):
+        def __init__(self, model: Any) -> None:
+            super().__init__()
+            self.model = model
+
+        def forward(self, *inputs: Any) -> Any:
+            return self.model(**dict(zip(input_names, inputs)))[0]
+
+    fp32_path = os.path.join(out_dir, _model_file(False))
+    if not os.path.exists(fp32_path):
+        axes = {n: {0: "batch", 1: "seq"} for n in input_names}
+        axes["last_hidden_state"] = {0: "batch", 1: "seq"}
+        with torch.no_grad():
+            torch.onnx.export(
+                _Encoder(hf_model),
+                tuple(sample[n] for n in input_names),
+                fp32_path,
+                input_names=input_names,
+                output_names=["last_hidden_state"],
+                dynamic_axes=axes,
+                opset_version=opset,
+                do_constant_folding=True,
+            )
+    path = fp32_path
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        path = os.path.join(out_dir, _model_file(True))
+        quantize_dynamic(fp32_path, path, weight_type=QuantType.QInt8)
+
+    config_path = os.path.join(out_dir, _CONFIG_NAME)
+    config: Dict[str, Any] = {}
+    if os.path.exists(config_path):
+        with open(config_path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+    config.update({
+        "model_id": model_id,
+        "inputs": input_names,
+        "pooling": pooling,
+        "normalize": normalize,
+        "max_seq_length": int(st.max_seq_length or 256),
+        "dim": int(st.get_sentence_embedding_dimension() or 0),
+    })
+    with open(config_path, "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=2)
+    return path
+
+
+class OnnxEmbedder:
+    """ONNX Runtime sentence embedder with the `encode` signature of SentenceTransformer."""
+
+    def __init__(self, model_dir: str, quantized: bool = False, device: Optional[str] = None) -> None:
+        if not ORT_AVAILABLE:
+            raise RuntimeError("onnxruntime is not installed")
+        from transformers import AutoTokenizer
+
+        with open(os.path.join(model_dir, _CONFIG_NAME), "r", encoding="utf-8") as f:
+            self.config: Dict[str, Any] = json.load(f)
+        self.model_dir = model_dir
+        self.model_path = os.path.join(model_dir, _model_file(quantized))
+        self.quantized = quantized
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.input_names: List[str] = list(self.config.get("inputs") or ["input_ids", "attention_mask"])
+        self.max_seq_length = int(self.config.get("max_seq_length", 256))
+        providers = ["CPUExecutionProvider"]
+        if (device or "").startswith("cuda") and "CUDAExecutionProvider" in ort.get_available_providers():
+            providers.insert(0, "CUDAExecutionProvider")
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        threads = int(os.getenv("RAG_ONNX_THREADS", "0"))
+        if threads > 0:
+            opts.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(self.model_path, sess_options=opts, providers=providers)
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return int(self.config.get("dim", 0))
+
+    def _pool(self, hidden: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        pooling = self.config.get("pooling", "mean")
+        if pooling == "cls":
+            return hidden[:, 0]
+        m = mask[..., None].astype(hidden.dtype)
+        if pooling == "max":
+            return np.where(m > 0, hidden, -1e9).max(axis=1)
+        return (hidden * m).sum(axis=1) / np.clip(m.sum(axis=1), 1e-9, None)
+
+    def encode(
+        self,
+        sentences: Union[str, Sequence[str]],
+        batch_size: int = 32,
+        show_progress_bar: bool = False,
+        convert_to_numpy: bool = True,
+        normalize_embeddings: bool = False,
+        **_: Any,
+    ) -> np.ndarray:
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        dim = self.get_sentence_embedding_dimension()
+        out = np.zeros((len(texts), dim), dtype=np.float32) if dim else None
+        # Length-sorted batches keep padding (and wasted compute) small
+        order = sorted(range(len(texts)), key=lambda i: -len(texts[i]))
+        done = 0
+        for start in range(0, len(order), batch_size):
+            rows = order[start:start + batch_size]
+            enc = self.tokenizer(
+                [texts[i] for i in rows],
+                padding=True,
+                truncation=True,
+                max_length=self.max_seq_length,
+                return_tensors="np",
+            )
+            feeds = {n: enc[n].astype(np.int64) for n in self.input_names if n in enc}
+            hidden = self.session.run(None, feeds)[0]
+            pooled = self._pool(hidden, enc["attention_mask"]).astype(np.float32)
+            if out is None:
+                out = np.zeros((len(texts), pooled.shape[1]), dtype=np.float32)
+            out[rows] = pooled
+            done += len(rows)
+            if show_progress_bar:
+                print(f"\rEncoded {done}/{len(texts)}", end="", file=sys.stderr)
+        if show_progress_bar and texts:
+            print(file=sys.stderr)
+        if out is None:
+            out = np.zeros((0, 0), dtype=np.float32)
+        if self.config.get("normalize") or normalize_embeddings:
+            out /= np.clip(np.linalg.norm(out, axis=1, keepdims=True), 1e-12, None)
+        return out[0] if single else out
+
+
+def check_parity(
+    model_id: str,
+    embedder: Any,
+    sentences: Optional[Sequence[str]] = None,
+    reference: Any = None,
+) -> Dict[str, Any]:
+    """Compare `embedder` against the PyTorch SentenceTransformer on cosine scores."""
+    if reference is None:
+        from sentence_transformers import SentenceTransformer
+
+        reference = SentenceTransformer(model_id, device="cpu")
+    texts = list(sentences or _PARITY_SENTENCES)
+    ref = np.asarray(reference.encode(texts, convert_to_numpy=True, normalize_embeddings=True), dtype=np.float32)
+    got = np.asarray(embedder.encode(texts, convert_to_numpy=True, normalize_embeddings=True), dtype=np.float32)
+    row_cos = (ref * got).sum(axis=1)
+    # Retrieval cares about query-vs-document scores, not just vector agreement
+    ref_scores = ref @ ref.T
+    got_scores = got @ ref.T
+    # Nearest neighbour other than the sentence itself (column -1 is the self-match)
+    top1 = float((ref_scores.argsort(axis=1)[:, -2] == got_scores.argsort(axis=1)[:, -2]).mean())
+    return {
+        "minCosine": float(row_cos.min()),
+        "meanCosine": float(row_cos.mean()),
+        "maxScoreDiff": float(np.abs(ref_scores - got_scores).max()),
+        "top1Agreement": top1,
+        "n": len(texts),
+    }
+
+
+def get_onnx_embedder(model_id: str, quantize: bool = False, device: Optional[str] = None) -> OnnxEmbedder:
+    """Load the cached ONNX artifact for `model_id`, exporting and parity-checking it on first use."""
+    out_dir = onnx_cache_dir(model_id)
+    config_path = os.path.join(out_dir, _CONFIG_NAME)
+    key = "parity_int8" if quantize else "parity"
+    if not os.path.exists(os.path.join(out_dir, _model_file(quantize))) or not os.path.exists(config_path):
+        export_onnx(model_id, out_dir, quantize=quantize)
+    with open(config_path, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    embedder = OnnxEmbedder(out_dir, quantized=quantize, device=device)
+    parity = config.get(key)
+    if parity is None:
+        parity = check_parity(model_id, embedder)
+        config[key] = parity
+        with open(config_path, "w", encoding="utf-8") as f:
+            json.dump(config, f, indent=2)
+    min_cos = float(os.getenv("RAG_ONNX_PARITY_MIN", "0.98"))
+    if parity.get("minCosine", 0.0) < min_cos:
+        raise RuntimeError(f"ONNX embedder parity too low for {model_id}: {parity}")
+    return embedder
+
+
+def load_embedder(model_id: str, backend: Optional[str] = None, device: Optional[str] = None) -> Any:
+    """Return an embedder for `model_id` on the requested backend (RAG_EMBEDDER_BACKEND by default).
+
+    ONNX backends fall back to PyTorch when onnxruntime is missing or parity fails.
+    """
+    backend = (backend or os.getenv("RAG_EMBEDDER_BACKEND") or "torch").strip().lower()
+    if backend in {"onnx", "onnx-int8"}:
+        try:
+            return get_onnx_embedder(model_id, quantize=backend == "onnx-int8", device=device)
+        except Exception as e:
+            print(f"ONNX embedder unavailable ({e}); using PyTorch", file=sys.stderr)
+    from sentence_transformers import SentenceTransformer
+
+    return SentenceTransformer(model_id, device=device)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export a SentenceTransformer model to ONNX and check parity")
+    parser.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2", help="SentenceTransformer model id")
+    parser.add_argument("--int8", action="store_true", help="Also produce an int8 dynamically quantized model")
+    parser.add_argument("--out", default=None, help="Output directory (default: RAG_ONNX_CACHE/<model>)")
+    args = parser.parse_args()
+
+    out_dir = args.out or onnx_cache_dir(args.model)
+    path = export_onnx(args.model, out_dir, quantize=args.int8)
+    embedder = OnnxEmbedder(out_dir, quantized=args.int8)
+    parity = check_parity(args.model, embedder)
+    config_path = os.path.join(out_dir, _CONFIG_NAME)
+    with open(config_path, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    config["parity_int8" if args.int8 else "parity"] = parity
+    with open(config_path, "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=2)
+    print(f"Exported {path}")
+    print(json.dumps(parity, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,9 @@
 
 import argparse
 import json
-from typing import Any, List
+import os
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Union
 
 import numpy as np
 import re
@@ -13,9 +15,13 @@ from peft import PeftModel
 import torch
 from market_data_router import get_market_data_summary
 from nl_tool_selector import build_realtime_context
+from lexical_index import IdentifierIndex, build_or_load_identifiers
+from chunk_store import open_chunk_store
+from onnx_embedder import BACKENDS
+from embedder_registry import get_embedder, set_default_embedder
 
 try:  # Prefer shared retriever if available and FAISS works there
-    from rag_query import load_chunks, build_or_load_index, retrieve  # type: ignore
+    from rag_query import load_chunks, build_or_load_index, build_or_load_bm25, build_or_load_collections, retrieve  # type: ignore
     _RQ_AVAILABLE = True
 except Exception:
     _RQ_AVAILABLE = False
@@ -53,12 +59,22 @@ except Exception:
         embeddings = embedder.encode(texts, batch_size=64, show_progress_bar=True, convert_to_numpy=True, normalize_embeddings=True)
         return NumpyIndex(embeddings), embeddings
 
+    def build_or_load_bm25(chunks: List[dict], index_dir: str) -> Any:
+        # Hybrid BM25 lives in rag_query/lexical_index; dense-only in the fallback
+        return None
+
+    def build_or_load_collections(chunks: List[dict], index: Any, index_dir: str) -> Any:
+        # Collection shards need rag_query; the fallback searches the flat index
+        return index
+
     def retrieve(
         query: str,
         chunks: List[dict],
         index: Any,
         embedder: SentenceTransformer,
         top_k: int = 5,
+        lexical: Any = None,
+        collections: Optional[Sequence[str]] = None,
     ) -> List[dict]:
         q_emb = embedder.encode([query], convert_to_numpy=True, normalize_embeddings=True)
         scores, indices = index.search(q_emb, top_k)
@@ -107,11 +123,31 @@ def _extract_identifiers(text: str) -> List[str]:
     return out
 
 
+def _exact_match_candidates(
+    identifiers: List[str],
+    chunks: List[dict],
+    id_index: Optional[IdentifierIndex],
+) -> Iterator[dict]:
+    if id_index is not None:
+        for row in id_index.lookup(identifiers):
+            if row < len(chunks):
+                yield chunks[row]
+        return
+    # No precomputed index: fall back to scanning every chunk
+    for c in chunks:
+        text = c.get("text", "")
+        title = c.get("title", "")
+        meta = f"{c.get('source_url','')} {c.get('doc_path','')}"
+        if any(ident in text or ident in title or ident in meta for ident in identifiers):
+            yield c
+
+
 def _merge_exact_matches(
     query: str,
     chunks: List[dict],
     retrieved: List[dict],
     top_k: int,
+    id_index: Optional[IdentifierIndex] = None,
 ) -> List[dict]:
     identifiers = _extract_identifiers(query)
     if not identifiers:
@@ -121,32 +157,31 @@ def _merge_exact_matches(
     def _key_of(item: dict) -> str:
         return str(item.get("id") or f"{item.get('doc_path')}#{item.get('chunk_index')}")
     seen_keys: set[str] = set(_key_of(r) for r in retrieved)
-    for c in chunks:
-        text = c.get("text", "")
-        title = c.get("title", "")
-        meta = f"{c.get('source_url','')} {c.get('doc_path','')}"
-        if any(ident in text or ident in title or ident in meta for ident in identifiers):
-            item = c.copy()
-            # Give a high score to force top placement
-            item["score"] = 1.1
-            k = _key_of(item)
-            if k not in seen_keys:
-                matches.append(item)
-                seen_keys.add(k)
-            if len(matches) >= top_k:
-                break
+    for c in _exact_match_candidates(identifiers, chunks, id_index):
+        item = c.copy()
+        # Give a high score to force top placement
+        item["score"] = 1.1
+        k = _key_of(item)
+        if k not in seen_keys:
+            matches.append(item)
+            seen_keys.add(k)
+        if len(matches) >= top_k:
+            break
     # Order: exact matches first, then fill with baseline retrieval without duplicates
     out: List[dict] = []
+    out_keys: set[str] = set()
     for i, m in enumerate(matches):
         m["rank"] = i
         out.append(m)
+        out_keys.add(_key_of(m))
         if len(out) >= top_k:
             return out
     for r in retrieved:
         k = _key_of(r)
-        if any(_key_of(x) == k for x in out):
+        if k in out_keys:
             continue
         out.append(r)
+        out_keys.add(k)
         if len(out) >= top_k:
             break
     return out
@@ -200,7 +235,64 @@ def _build_system_message(rt_types: set[str], rt_mode: str) -> str:
     return base
 
 
-def build_prompt_and_rt(user_query: str, context: str, rt_mode: str) -> tuple[str, str]:
+_RETRIEVAL_STATS = {"performed": 0, "skipped": 0}
+_RETRIEVAL_STATS_LOCK = threading.Lock()
+
+
+def retrieval_stats() -> Dict[str, int]:
+    with _RETRIEVAL_STATS_LOCK:
+        return dict(_RETRIEVAL_STATS)
+
+
+class LazyDocsContext:
+    """Docs context that runs retrieval + exact-match merge + build_context only on first use.
+
+    Prompt modes that discard the docs (e.g. rt_mode=prefer with real-time data) never
+    call it; close() then records the avoided retrieval.
+    """
+
+    def __init__(
+        self,
+        query: str,
+        chunks: Sequence[dict],
+        index: Any,
+        embedder: SentenceTransformer,
+        top_k: int = 5,
+        lexical: Any = None,
+        id_index: Optional[IdentifierIndex] = None,
+        collections: Optional[Sequence[str]] = None,
+    ) -> None:
+        self.query = query
+        self.chunks = chunks
+        self.index = index
+        self.embedder = embedder
+        self.top_k = top_k
+        self.lexical = lexical
+        self.id_index = id_index
+        self.collections = collections
+        self._context: Optional[str] = None
+        self._closed = False
+
+    def __call__(self) -> str:
+        if self._context is None:
+            retrieved_base = retrieve(
+                self.query, self.chunks, self.index, self.embedder,
+                top_k=self.top_k, lexical=self.lexical, collections=self.collections,
+            )
+            retrieved = _merge_exact_matches(self.query, self.chunks, retrieved_base, top_k=self.top_k, id_index=self.id_index)
+            self._context = build_context(retrieved)
+            with _RETRIEVAL_STATS_LOCK:
+                _RETRIEVAL_STATS["performed"] += 1
+        return self._context
+
+    def close(self) -> None:
+        if not self._closed and self._context is None:
+            with _RETRIEVAL_STATS_LOCK:
+                _RETRIEVAL_STATS["skipped"] += 1
+        self._closed = True
+
+
+def build_rt_display(user_query: str, rt_mode: str) -> str:
     # Embedding-based tool selection
     rt = "" if rt_mode == "off" else build_realtime_context(user_query, max_tools=3)
     extras: List[str] = []
@@ -210,7 +302,19 @@ def build_prompt_and_rt(user_query: str, context: str, rt_mode: str) -> tuple[st
     market = "" if rt_mode == "off" else get_market_data_summary(user_query, network="mainnet")
     if market:
         extras.append(market)
-    rt_display = "\n".join(extras) if extras else ""
+    return "\n".join(extras) if extras else ""
+
+
+def build_prompt_and_rt(
+    user_query: str,
+    context: Union[str, Callable[[], str]],
+    rt_mode: str,
+    rt_display: Optional[str] = None,
+) -> tuple[str, str]:
+    # `context` may be a callable (e.g. LazyDocsContext) so docs are only retrieved when
+    # this prompt keeps them; pass `rt_display` to reuse already-fetched real-time data.
+    if rt_display is None:
+        rt_display = build_rt_display(user_query, rt_mode)
     if rt_display:
         # Heuristic override: treat premium/mark/vol/liquidity/oi queries as real-time intents too
         ql = user_query.lower()
@@ -221,9 +325,11 @@ def build_prompt_and_rt(user_query: str, context: str, rt_mode: str) -> tuple[st
         ]
         rt_intent = any(k in ql for k in rt_keywords)
         if rt_mode == "merge" and not rt_intent:
-            context = "[Real-time]\n" + rt_display + "\n\n" + context
+            context = "[Real-time]\n" + rt_display + "\n\n" + (context() if callable(context) else context)
         else:
             context = "[Real-time]\n" + rt_display
+    elif callable(context):
+        context = context()
     # Derive tool types present to tailor the system message
     rt_types: set[str] = set()
     if rt_display:
@@ -246,16 +352,27 @@ def main():
     parser.add_argument('--dataset', required=True, help='Path to chunks.jsonl')
     parser.add_argument('--index-dir', default='./rag_index', help='Directory to store/load FAISS index')
     parser.add_argument('--embedder', default='sentence-transformers/all-MiniLM-L6-v2', help='SentenceTransformer model id')
+    parser.add_argument('--embedder-backend', choices=BACKENDS, default=os.getenv('RAG_EMBEDDER_BACKEND', 'torch'), help='Embedder backend')
     parser.add_argument('--model', default='Qwen/Qwen2.5-1.5B-Instruct', help='HF causal LM id')
     parser.add_argument('--lora', default=None, help='Optional path to LoRA adapter (trained)')
     parser.add_argument('--max-new-tokens', type=int, default=384)
     parser.add_argument('--top-k', type=int, default=5)
     parser.add_argument('--rt-mode', choices=['prefer', 'merge', 'off'], default='prefer', help='How to use real-time context vs docs')
+    parser.add_argument('--no-bm25', action='store_true', help='Dense-only retrieval (skip the BM25 hybrid)')
+    parser.add_argument('--no-chunk-store', action='store_true', help='Parse chunks.jsonl into memory instead of the mmap chunk store')
+    parser.add_argument('--collections', default=os.getenv('RAG_COLLECTIONS'), help='Comma-separated collections to search (default: all)')
     args = parser.parse_args()
 
-    chunks = load_chunks(args.dataset)
-    embedder = SentenceTransformer(args.embedder)
+    chunks = load_chunks(args.dataset) if args.no_chunk_store else open_chunk_store(args.dataset, args.index_dir)
+    # Tool selection (nl_tool_selector) embeds with the default registry embedder; share this one
+    set_default_embedder(args.embedder, backend=args.embedder_backend)
+    embedder = get_embedder(args.embedder, backend=args.embedder_backend)
     index, _ = build_or_load_index(chunks, embedder, args.index_dir)
+    lexical = None if args.no_bm25 else build_or_load_bm25(chunks, args.index_dir)
+    id_index = build_or_load_identifiers(chunks, args.index_dir)
+    collections = [c.strip() for c in args.collections.split(',') if c.strip()] if args.collections else None
+    if collections is not None:
+        index = build_or_load_collections(chunks, index, args.index_dir)
 
     device = 'cuda' if torch.cuda.is_available() else ('mps' if torch.backends.mps.is_available() else 'cpu')
     tokenizer = AutoTokenizer.from_pretrained(args.model)
@@ -277,10 +394,8 @@ def main():
             q = input('> ').strip()
             if not q:
                 continue
-            retrieved_base = retrieve(q, chunks, index, embedder, top_k=args.top_k)
-            retrieved = _merge_exact_matches(q, chunks, retrieved_base, top_k=args.top_k)
-            context = build_context(retrieved)
-            prompt, rt_display = build_prompt_and_rt(q, context, args.rt_mode)
+            docs = LazyDocsContext(q, chunks, index, embedder, top_k=args.top_k, lexical=lexical, id_index=id_index, collections=collections)
+            rt_display = build_rt_display(q, args.rt_mode)
             if rt_display:
                 # Only print the human-readable summary lines (no internal keys)
                 print("\n".join([ln for ln in rt_display.splitlines() if ":" not in ln or ln.split(":",1)[0] not in {"account_summary","oi_caps","funding_history","full_market_picture","slippage","predicted_fundings","meta_and_ctxs","trades","orderbook","asks_to_price"}]))
@@ -301,13 +416,15 @@ def main():
                             rt_types.add(name)
             messages = [
                 {"role": "system", "content": _build_system_message(rt_types, args.rt_mode)},
-                {"role": "user", "content": q + "\n\n" + ("[Real-time]\n" + rt_display if rt_display else "") + ("\n\n" + context if args.rt_mode == 'merge' and not rt_display else "")},
+                {"role": "user", "content": q + "\n\n" + ("[Real-time]\n" + rt_display if rt_display else "") + ("\n\n" + docs() if args.rt_mode == 'merge' and not rt_display else "")},
             ]
             try:
                 text_input = tokenizer.apply_chat_template(messages, tokenize=False, add_generation_prompt=True)
                 inputs = tokenizer(text_input, return_tensors='pt').to(device)
             except Exception:
+                prompt, _ = build_prompt_and_rt(q, docs, args.rt_mode, rt_display=rt_display)
                 inputs = tokenizer(prompt, return_tensors='pt').to(device)
+            docs.close()
             gen_kwargs = dict(
                 max_new_tokens=args.max_new_tokens,
                 pad_token_id=tokenizer.eos_token_id,
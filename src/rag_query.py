@@ -4,11 +4,18 @@
 import argparse
 import json
 import os
-from typing import Any, List, Tuple
+import sys
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, TextIO, Tuple
 
 import numpy as np
 from sentence_transformers import SentenceTransformer
 
+from chunk_store import open_chunk_store
+from collection_index import ShardedIndex, build_or_load_collections, collection_of
+from lexical_index import BM25Index, build_or_load_bm25, fuse_rrf
+from embedder_registry import get_embedder
+from onnx_embedder import BACKENDS
+
 # Optional FAISS. If unavailable or incompatible (e.g., NumPy 2.x ABI), fall back to NumPy index.
 try:  # noqa: SIM105
     import faiss  # type: ignore
@@ -18,6 +25,14 @@ except Exception:  # pragma: no cover
     FAISS_AVAILABLE = False
 
 
+# Hybrid retrieval: each side contributes top_k * HYBRID_CANDIDATES candidates to
+# reciprocal-rank fusion; BM25_WEIGHT scales the lexical side relative to dense.
+HYBRID_CANDIDATES = int(os.getenv('RAG_HYBRID_CANDIDATES', '4'))
+BM25_WEIGHT = float(os.getenv('RAG_BM25_WEIGHT', '1.0'))
+# Metadata filters (`where`) are applied after search, so over-fetch by this factor
+FILTER_OVERFETCH = int(os.getenv('RAG_FILTER_OVERFETCH', '8'))
+
+
 def load_chunks(jsonl_path: str) -> List[dict]:
     data: List[dict] = []
     with open(jsonl_path, 'r', encoding='utf-8') as f:
@@ -48,7 +63,7 @@ class NumpyIndex:
 
 
 def build_or_load_index(
-    chunks: List[dict],
+    chunks: Sequence[dict],
     embedder: SentenceTransformer,
     index_dir: str,
 ) -> Tuple[Any, np.ndarray]:
@@ -91,41 +106,264 @@ def build_or_load_index(
         return NumpyIndex(embeddings), embeddings
 
 
-def retrieve(
-    query: str,
-    chunks: List[dict],
+def _all_of(preds: List[Callable[[int], bool]]) -> Optional[Callable[[int], bool]]:
+    if not preds:
+        return None
+    if len(preds) == 1:
+        return preds[0]
+    return lambda row: all(p(row) for p in preds)
+
+
+def _row_filter(
+    chunks: Sequence[dict],
     index: Any,
-    embedder: SentenceTransformer,
-    top_k: int = 5,
+    collections: Optional[Sequence[str]],
+    where: Optional[Dict[str, Any]],
+) -> Tuple[Optional[Callable[[int], bool]], Optional[Callable[[int], bool]]]:
+    """(dense, lexical) predicates over chunk rows for collection/metadata filters (None when unfiltered).
+
+    `where` maps a chunk field to a value or a list of accepted values. With a
+    ShardedIndex, dense hits already come from the selected shards, so only BM25
+    candidates are checked against the collection codes; with a flat index the
+    collection is derived from each candidate's metadata on both sides.
+    """
+    meta = chunks.metadata if hasattr(chunks, 'metadata') else chunks.__getitem__
+    dense: List[Callable[[int], bool]] = []
+    lex: List[Callable[[int], bool]] = []
+    if where:
+        conds = {k: set(v) if isinstance(v, (list, tuple, set)) else {v} for k, v in where.items()}
+
+        def match(row: int) -> bool:
+            m = meta(row)
+            return all(m.get(k) in vals for k, vals in conds.items())
+        dense.append(match)
+        lex.append(match)
+    if collections is not None:
+        if isinstance(index, ShardedIndex):
+            codes = set(index.codes_for(collections))
+            row_codes = index.row_codes
+            lex.append(lambda row: int(row_codes[row]) in codes)
+        else:
+            wanted = set(collections)
+            key = os.getenv("RAG_COLLECTION_KEY", "host")
+
+            def in_collection(row: int) -> bool:
+                return collection_of(meta(row), key) in wanted
+            dense.append(in_collection)
+            lex.append(in_collection)
+    return _all_of(dense), _all_of(lex)
+
+
+def _search(index: Any, q_emb: np.ndarray, k: int, collections: Optional[Sequence[str]]) -> Tuple[np.ndarray, np.ndarray]:
+    if collections is not None and isinstance(index, ShardedIndex):
+        return index.search(q_emb, k, collections=collections)
+    return index.search(q_emb, k)
+
+
+def _collect_hits(
+    chunks: Sequence[dict],
+    indices: np.ndarray,
+    scores: np.ndarray,
+    top_k: Optional[int] = None,
+    keep: Optional[Callable[[int], bool]] = None,
 ) -> List[dict]:
-    q_emb = embedder.encode([query], convert_to_numpy=True, normalize_embeddings=True)
-    scores, indices = index.search(q_emb, top_k)
     result: List[dict] = []
-    for rank, (idx, score) in enumerate(zip(indices[0], scores[0])):
-        if idx < 0 or idx >= len(chunks):
+    for idx, score in zip(indices, scores):
+        if idx < 0 or idx >= len(chunks) or (keep is not None and not keep(int(idx))):
             continue
         item = chunks[int(idx)].copy()
         item['score'] = float(score)
+        item['rank'] = len(result)
+        result.append(item)
+        if top_k is not None and len(result) >= top_k:
+            break
+    return result
+
+
+def _hybrid_hits(
+    query: str,
+    chunks: Sequence[dict],
+    dense_indices: np.ndarray,
+    dense_scores: np.ndarray,
+    lexical: BM25Index,
+    top_k: int,
+    keep: Optional[Callable[[int], bool]] = None,
+    lex_keep: Optional[Callable[[int], bool]] = None,
+    lex_k: Optional[int] = None,
+) -> List[dict]:
+    lex_scores, lex_rows = lexical.search(query, lex_k or len(dense_indices))
+    dense_rows = [int(i) for i in dense_indices if 0 <= i < len(chunks)]
+    dense_by_row = {int(i): float(s) for i, s in zip(dense_indices, dense_scores)}
+    lex_by_row = {int(i): float(s) for i, s in zip(lex_rows, lex_scores)}
+    if keep is not None:
+        dense_rows = [r for r in dense_rows if keep(r)]
+    if lex_keep is not None:
+        lex_rows = [int(r) for r in lex_rows if lex_keep(int(r))]
+    result: List[dict] = []
+    for rank, (row, score) in enumerate(fuse_rrf([dense_rows, lex_rows], weights=[1.0, BM25_WEIGHT])[:top_k]):
+        if row >= len(chunks):
+            continue
+        item = chunks[row].copy()
+        item['score'] = score
         item['rank'] = rank
+        item['dense_score'] = dense_by_row.get(row)
+        item['bm25_score'] = lex_by_row.get(row)
         result.append(item)
     return result
 
 
+def _candidate_pool(top_k: int, lexical: Optional[BM25Index], filtered: bool) -> int:
+    # Over-fetch (once) on a side whose candidates will be filtered afterwards
+    pool = top_k if lexical is None else top_k * HYBRID_CANDIDATES
+    return pool * FILTER_OVERFETCH if filtered else pool
+
+
+def retrieve(
+    query: str,
+    chunks: Sequence[dict],
+    index: Any,
+    embedder: SentenceTransformer,
+    top_k: int = 5,
+    lexical: Optional[BM25Index] = None,
+    collections: Optional[Sequence[str]] = None,
+    where: Optional[Dict[str, Any]] = None,
+) -> List[dict]:
+    """Top-k chunks for `query`.
+
+    `collections` restricts the search to those shards of a ShardedIndex;
+    `where` keeps only chunks whose fields match (e.g. {"title": [...]})."""
+    return retrieve_many([query], chunks, index, embedder, top_k=top_k, lexical=lexical, collections=collections, where=where)[0]
+
+
+def retrieve_many(
+    queries: Sequence[str],
+    chunks: Sequence[dict],
+    index: Any,
+    embedder: SentenceTransformer,
+    top_k: int = 5,
+    batch_size: int = 64,
+    lexical: Optional[BM25Index] = None,
+    collections: Optional[Sequence[str]] = None,
+    where: Optional[Dict[str, Any]] = None,
+) -> List[List[dict]]:
+    """Retrieve for many queries with one batched encode and one [B, D] search per batch."""
+    keep, lex_keep = _row_filter(chunks, index, collections, where)
+    pool = _candidate_pool(top_k, lexical, keep is not None)
+    # BM25 runs over the whole corpus, so it is sized by its own filter
+    lex_k = _candidate_pool(top_k, lexical, lex_keep is not None)
+    results: List[List[dict]] = []
+    for start in range(0, len(queries), batch_size):
+        batch = list(queries[start:start + batch_size])
+        q_emb = embedder.encode(batch, batch_size=batch_size, convert_to_numpy=True, normalize_embeddings=True)
+        scores, indices = _search(index, q_emb, pool, collections)
+        for row, q in enumerate(batch):
+            if lexical is None:
+                results.append(_collect_hits(chunks, indices[row], scores[row], top_k=top_k, keep=keep))
+            else:
+                results.append(_hybrid_hits(q, chunks, indices[row], scores[row], lexical, top_k, keep=keep, lex_keep=lex_keep, lex_k=lex_k))
+    return results
+
+
+def _iter_query_batches(stream: TextIO, batch_size: int) -> Iterator[List[str]]:
+    batch: List[str] = []
+    for line in stream:
+        q = line.strip()
+        if not q:
+            continue
+        batch.append(q)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def run_batch(
+    queries_path: str,
+    out_path: Optional[str],
+    chunks: Sequence[dict],
+    index: Any,
+    embedder: SentenceTransformer,
+    top_k: int = 5,
+    batch_size: int = 64,
+    include_text: bool = False,
+    lexical: Optional[BM25Index] = None,
+    collections: Optional[Sequence[str]] = None,
+    where: Optional[Dict[str, Any]] = None,
+) -> int:
+    """Stream queries (one per line, '-' for stdin) and write one JSONL result record per query."""
+    src = sys.stdin if queries_path == '-' else open(queries_path, 'r', encoding='utf-8')
+    dst = sys.stdout if not out_path or out_path == '-' else open(out_path, 'w', encoding='utf-8')
+    count = 0
+    try:
+        for batch in _iter_query_batches(src, batch_size):
+            for q, hits in zip(batch, retrieve_many(batch, chunks, index, embedder, top_k=top_k, batch_size=batch_size, lexical=lexical, collections=collections, where=where)):
+                if not include_text:
+                    hits = [{k: v for k, v in h.items() if k != 'text'} for h in hits]
+                dst.write(json.dumps({'qid': count, 'query': q, 'results': hits}, ensure_ascii=False) + '\n')
+                count += 1
+    finally:
+        if src is not sys.stdin:
+            src.close()
+        if dst is not sys.stdout:
+            dst.close()
+    return count
+
+
 def main():
     parser = argparse.ArgumentParser(description='Simple local RAG retriever over chunked JSONL dataset')
     parser.add_argument('--dataset', required=True, help='Path to chunks.jsonl produced by scraper')
     parser.add_argument('--index-dir', default='./rag_index', help='Directory to store/load FAISS index')
     parser.add_argument('--model', default='sentence-transformers/all-MiniLM-L6-v2', help='SentenceTransformer model id')
+    parser.add_argument('--backend', choices=BACKENDS, default=os.getenv('RAG_EMBEDDER_BACKEND', 'torch'), help='Embedder backend')
     parser.add_argument('--top-k', type=int, default=5, help='Top K chunks to retrieve')
     parser.add_argument('--query', default=None, help='Optional single-shot query; if omitted, starts REPL')
+    parser.add_argument('--queries-file', default=None, help="Batch mode: file with one query per line ('-' for stdin)")
+    parser.add_argument('--output', default=None, help='Batch mode: JSONL output path (default stdout)')
+    parser.add_argument('--batch-size', type=int, default=64, help='Batch mode: queries encoded/searched per batch')
+    parser.add_argument('--include-text', action='store_true', help='Batch mode: include chunk text in results')
+    parser.add_argument('--no-bm25', action='store_true', help='Dense-only retrieval (skip the BM25 hybrid)')
+    parser.add_argument('--no-chunk-store', action='store_true', help='Parse chunks.jsonl into memory instead of the mmap chunk store')
+    parser.add_argument('--collections', default=None, help='Comma-separated collections to search (e.g. hyperliquid.gitbook.io)')
+    parser.add_argument('--where', action='append', default=[], help='Metadata filter field=value (repeatable; same field ORs values)')
+    parser.add_argument('--list-collections', action='store_true', help='Print collections and their chunk counts, then exit')
     args = parser.parse_args()
 
-    chunks = load_chunks(args.dataset)
-    embedder = SentenceTransformer(args.model)
+    chunks = load_chunks(args.dataset) if args.no_chunk_store else open_chunk_store(args.dataset, args.index_dir)
+    embedder = get_embedder(args.model, backend=args.backend)
     index, _ = build_or_load_index(chunks, embedder, args.index_dir)
+    lexical = None if args.no_bm25 else build_or_load_bm25(chunks, args.index_dir)
+    collections = [c.strip() for c in args.collections.split(',') if c.strip()] if args.collections else None
+    where: Dict[str, Any] = {}
+    for cond in args.where:
+        field, _, value = cond.partition('=')
+        where.setdefault(field.strip(), []).append(value)
+    if collections is not None or args.list_collections:
+        index = build_or_load_collections(chunks, index, args.index_dir)
+    if args.list_collections:
+        for name, size in index.sizes().items():
+            print(f'{size:8d}  {name}')
+        return
+
+    if args.queries_file:
+        n = run_batch(
+            args.queries_file,
+            args.output,
+            chunks,
+            index,
+            embedder,
+            top_k=args.top_k,
+            batch_size=args.batch_size,
+            include_text=args.include_text,
+            lexical=lexical,
+            collections=collections,
+            where=where or None,
+        )
+        print(f'Wrote results for {n} queries', file=sys.stderr)
+        return
 
     if args.query:
-        results = retrieve(args.query, chunks, index, embedder, top_k=args.top_k)
+        results = retrieve(args.query, chunks, index, embedder, top_k=args.top_k, lexical=lexical, collections=collections, where=where or None)
         for r in results:
             print(f"[score={r['score']:.4f}] {r['title']} — {r['source_url']}")
             print(r['text'][:500].replace('\n', ' '))
@@ -138,7 +376,7 @@ def main():
             q = input('> ').strip()
             if not q:
                 continue
-            results = retrieve(q, chunks, index, embedder, top_k=args.top_k)
+            results = retrieve(q, chunks, index, embedder, top_k=args.top_k, lexical=lexical, collections=collections, where=where or None)
             for r in results:
                 print(f"[score={r['score']:.4f}] {r['title']} — {r['source_url']}")
                 print(r['text'][:500].replace('\n', ' '))
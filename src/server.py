@@ -27,6 +27,7 @@ except Exception:
 
 # Reuse chat building utilities
 import rag_chat as rc
+from embedder_registry import embedder_stats, get_embedder, set_default_embedder
 
 
 app = FastAPI(title="HyperLiquid Chat Server", version="0.1.0")
@@ -40,6 +41,17 @@ app.add_middleware(
 )
 
 
+def _parse_collections(value: Any) -> Optional[List[str]]:
+    # Request value (list or comma-separated string), else RAG_COLLECTIONS; None searches everything
+    if value is None or value == "":
+        value = os.getenv("RAG_COLLECTIONS") or None
+    if value is None:
+        return None
+    names = value if isinstance(value, list) else str(value).split(",")
+    names = [str(n).strip() for n in names if str(n).strip()]
+    return names or None
+
+
 def _strip_api_phrases(text: str) -> str:
     banned = ["POST ", "Content-Type", "endpoint", "https://", "http://"]
     for b in banned:
@@ -66,10 +78,32 @@ def _startup() -> None:
     model_id = os.getenv("RAG_MODEL", "Qwen/Qwen2.5-1.5B-Instruct")
     lora_path = os.getenv("RAG_LORA")
 
-    # Load dataset and embedder/index
-    chunks = rc.load_chunks(dataset)
-    embedder = SentenceTransformer(embedder_id)
+    # Load dataset and embedder/index. The mmap chunk store keeps startup/RSS flat
+    # as the corpus grows; RAG_CHUNK_STORE=0 parses chunks.jsonl into memory instead.
+    if os.getenv("RAG_CHUNK_STORE", "1") != "0":
+        chunks = rc.open_chunk_store(dataset, index_dir)
+    else:
+        chunks = rc.load_chunks(dataset)
+    # RAG_EMBEDDER_BACKEND=onnx|onnx-int8 serves queries through ONNX Runtime. The
+    # registry instance is shared with nl_tool_selector, so it is loaded once, here.
+    set_default_embedder(embedder_id)
+    embedder = get_embedder(embedder_id)
+    try:
+        # Tool-routing matrix is built (or loaded from RAG_INDEX_DIR) now, not on the first chat
+        from nl_tool_selector import warm_router
+        warm_router()
+    except Exception:
+        pass
     index, _ = rc.build_or_load_index(chunks, embedder, index_dir)
+    # Lexical BM25 side of hybrid retrieval (RAG_BM25=0 for dense-only)
+    lexical = rc.build_or_load_bm25(chunks, index_dir) if os.getenv("RAG_BM25", "1") != "0" else None
+    # Exact hex identifier -> chunk rows, for address/tx-hash boosting
+    id_index = rc.build_or_load_identifiers(chunks, index_dir)
+    # Per-collection shards (one per source host) so filtered requests only score
+    # the chunks they target. Shards are row views of `index`, not copies of its
+    # vectors; RAG_SHARDS=0 keeps the single flat index.
+    if os.getenv("RAG_SHARDS", "1") != "0":
+        index = rc.build_or_load_collections(chunks, index, index_dir)
 
     # Model
     # Honor explicit device override
@@ -97,6 +131,8 @@ def _startup() -> None:
     app.state.chunks = chunks
     app.state.embedder = embedder
     app.state.index = index
+    app.state.lexical = lexical
+    app.state.id_index = id_index
     app.state.tokenizer = tokenizer
     app.state.model = model
     app.state.device = device
@@ -111,18 +147,19 @@ def chat(payload: Dict[str, Any]) -> JSONResponse:
         raise HTTPException(status_code=400, detail="message is required")
     rt_mode: str = str(payload.get("rt_mode", "prefer"))
     top_k: int = int(payload.get("top_k", 5))
+    collections = _parse_collections(payload.get("collections"))
 
     chunks = app.state.chunks
     embedder: SentenceTransformer = app.state.embedder
     index = app.state.index
+    lexical = app.state.lexical
+    id_index = app.state.id_index
     tokenizer: AutoTokenizer = app.state.tokenizer
     model: AutoModelForCausalLM = app.state.model
     device: str = app.state.device
 
-    # Retrieve docs
-    retrieved_base = rc.retrieve(message, chunks, index, embedder, top_k=top_k)
-    retrieved = rc._merge_exact_matches(message, chunks, retrieved_base, top_k=top_k)
-    context = rc.build_context(retrieved)
+    # Docs are retrieved lazily: only if the prompt built below actually includes them
+    docs = rc.LazyDocsContext(message, chunks, index, embedder, top_k=top_k, lexical=lexical, id_index=id_index, collections=collections)
     # Build RT context with trace of MCP calls
     try:
         from nl_tool_selector import build_realtime_context_structured
@@ -132,7 +169,6 @@ def chat(payload: Dict[str, Any]) -> JSONResponse:
     # Deterministic market router as before
     market = "" if rt_mode == "off" else rc.get_market_data_summary(message, network="mainnet")
     rt_display = "\n".join([x for x in [rt_text, market] if x])
-    prompt, _ = rc.build_prompt_and_rt(message, context, rt_mode)
 
     # Build chat template when available
     # Tailor system prompt to present real-time types
@@ -145,13 +181,15 @@ def chat(payload: Dict[str, Any]) -> JSONResponse:
                     rt_types.add(name)
     messages = [
         {"role": "system", "content": rc._build_system_message(rt_types, rt_mode)},
-        {"role": "user", "content": message + "\n\n" + ("[Real-time]\n" + rt_display if rt_display else "") + ("\n\n" + context if rt_mode == "merge" and not rt_display else "")},
+        {"role": "user", "content": message + "\n\n" + ("[Real-time]\n" + rt_display if rt_display else "") + ("\n\n" + docs() if rt_mode == "merge" and not rt_display else "")},
     ]
     try:
         text_input = tokenizer.apply_chat_template(messages, tokenize=False, add_generation_prompt=True)
         inputs = tokenizer(text_input, return_tensors='pt').to(device)
     except Exception:
+        prompt, _ = rc.build_prompt_and_rt(message, docs, rt_mode, rt_display=rt_display)
         inputs = tokenizer(prompt, return_tensors='pt').to(device)
+    docs.close()
 
     gen_kwargs = dict(
         max_new_tokens=int(payload.get("max_new_tokens", 384)),
@@ -181,31 +219,49 @@ def chat(payload: Dict[str, Any]) -> JSONResponse:
 
 @app.get("/api/config")
 def config() -> JSONResponse:
+    index = getattr(app.state, "index", None)
     return JSONResponse({
         "ok": True,
         "model": getattr(app.state, "model_id", None),
         "embedder": getattr(app.state, "embedder_id", None),
         "rt_modes": ["prefer", "merge", "off"],
+        "collections": index.sizes() if hasattr(index, "sizes") else {},
+    })
+
+
+@app.get("/api/stats")
+def stats() -> JSONResponse:
+    return JSONResponse({
+        "ok": True,
+        "retrieval": rc.retrieval_stats(),
+        "embedders": embedder_stats(),
     })
 
 
 @app.get("/api/chat_stream")
-def chat_stream(message: str, rt_mode: str = "prefer", top_k: int = 5, max_new_tokens: int = 384) -> StreamingResponse:
+def chat_stream(
+    message: str,
+    rt_mode: str = "prefer",
+    top_k: int = 5,
+    max_new_tokens: int = 384,
+    collections: Optional[str] = None,
+) -> StreamingResponse:
     message = (message or "").strip()
     if not message:
         return StreamingResponse((x for x in []), media_type="text/event-stream")
 
+    collections = _parse_collections(collections)
     chunks = app.state.chunks
     embedder: SentenceTransformer = app.state.embedder
     index = app.state.index
+    lexical = app.state.lexical
+    id_index = app.state.id_index
     tokenizer: AutoTokenizer = app.state.tokenizer
     model: AutoModelForCausalLM = app.state.model
     device: str = app.state.device
 
-    # Retrieve docs and RT
-    retrieved_base = rc.retrieve(message, chunks, index, embedder, top_k=top_k)
-    retrieved = rc._merge_exact_matches(message, chunks, retrieved_base, top_k=top_k)
-    context = rc.build_context(retrieved)
+    # Docs are retrieved lazily: only if the prompt built below actually includes them
+    docs = rc.LazyDocsContext(message, chunks, index, embedder, top_k=top_k, lexical=lexical, id_index=id_index, collections=collections)
     # Build RT context with trace of MCP calls
     try:
         from nl_tool_selector import build_realtime_context_structured
@@ -214,7 +270,6 @@ def chat_stream(message: str, rt_mode: str = "prefer", top_k: int = 5, max_new_t
         rt_text, rt_calls = (rc.build_realtime_context(message, max_tools=3), []) if rt_mode != "off" else ("", [])
     market = "" if rt_mode == "off" else rc.get_market_data_summary(message, network="mainnet")
     rt_display = "\n".join([x for x in [rt_text, market] if x])
-    prompt, _ = rc.build_prompt_and_rt(message, context, rt_mode)
 
     # Tailored system prompt
     rt_types: set[str] = set()
@@ -226,13 +281,15 @@ def chat_stream(message: str, rt_mode: str = "prefer", top_k: int = 5, max_new_t
                     rt_types.add(name)
     messages = [
         {"role": "system", "content": rc._build_system_message(rt_types, rt_mode)},
-        {"role": "user", "content": message + "\n\n" + ("[Real-time]\n" + rt_display if rt_display else "") + ("\n\n" + context if rt_mode == "merge" and not rt_display else "")},
+        {"role": "user", "content": message + "\n\n" + ("[Real-time]\n" + rt_display if rt_display else "") + ("\n\n" + docs() if rt_mode == "merge" and not rt_display else "")},
     ]
     try:
         text_input = tokenizer.apply_chat_template(messages, tokenize=False, add_generation_prompt=True)
         inputs = tokenizer(text_input, return_tensors='pt').to(device)
     except Exception:
+        prompt, _ = rc.build_prompt_and_rt(message, docs, rt_mode, rt_display=rt_display)
         inputs = tokenizer(prompt, return_tensors='pt').to(device)
+    docs.close()
 
     streamer = TextIteratorStreamer(tokenizer, skip_prompt=True, skip_special_tokens=True)
     gen_kwargs = dict(
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Bounded TTL cache with LRU eviction and single-flight loading.
+
+Entries expire after their TTL and the cache never holds more than
+`max_entries` items or roughly `max_bytes` of values (sizes are estimated
+once on insert). `get_or_load` / `aget_or_load` coalesce concurrent misses on
+the same key: one caller runs the loader, the others wait for its result.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+
+def approx_size(value: Any, _depth: int = 0) -> int:
+    """Rough deep size in bytes of JSON-like values (dict/list/tuple/str/number)."""
+    size = sys.getsizeof(value)
+    if _depth > 6:
+        return size
+    if isinstance(value, dict):
+        for k, v in value.items():
+            size += approx_size(k, _depth + 1) + approx_size(v, _depth + 1)
+    elif isinstance(value, (list, tuple)):
+        for v in value:
+            size += approx_size(v, _depth + 1)
+    return size
+
+
+class TTLCache:
+    """Thread-safe TTL + LRU cache; `None` is never stored (it means "miss")."""
+
+    def __init__(self, max_entries: int = 2048, max_bytes: int = 64 << 20, sweep_every: int = 256) -> None:
+        self.max_entries = max(1, int(max_entries))
+        self.max_bytes = max(1, int(max_bytes))
+        self.sweep_every = max(1, int(sweep_every))
+        # key -> (value, expires_at, size); order is least -> most recently used
+        self._data: "OrderedDict[str, Tuple[Any, float, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        # key -> [lock, callers using it]; removed by the last caller once its load is done
+        self._key_locks: Dict[str, List[Any]] = {}
+        self._inflight: Dict[Tuple[int, str], asyncio.Future] = {}
+        self._sets = 0
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "loads": 0, "coalesced": 0}
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _drop(self, key: str) -> None:
+        _, _, size = self._data.pop(key)
+        self._bytes -= size
+
+    def _lookup(self, key: str, accept: Optional[Callable[[Any], bool]]) -> Any:
+        # Caller holds self._lock
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at, _ = entry
+        if time.monotonic() >= expires_at:
+            self._drop(key)
+            self._counters["expirations"] += 1
+            return None
+        if accept is not None and not accept(value):
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def get(self, key: str, accept: Optional[Callable[[Any], bool]] = None) -> Any:
+        with self._lock:
+            value = self._lookup(key, accept)
+            self._counters["hits" if value is not None else "misses"] += 1
+            return value
+
+    def set(self, key: str, value: Any, ttl_s: float) -> None:
+        if value is None:
+            return
+        size = approx_size(value)
+        with self._lock:
+            if key in self._data:
+                self._drop(key)
+            self._data[key] = (value, time.monotonic() + float(ttl_s), size)
+            self._bytes += size
+            self._sets += 1
+            if self._sets % self.sweep_every == 0:
+                now = time.monotonic()
+                for k in [k for k, (_, exp, _) in self._data.items() if now >= exp]:
+                    self._drop(k)
+                    self._counters["expirations"] += 1
+            # LRU eviction; the entry just inserted is kept even if it alone exceeds max_bytes
+            while len(self._data) > 1 and (len(self._data) > self.max_entries or self._bytes > self.max_bytes):
+                self._drop(next(iter(self._data)))
+                self._counters["evictions"] += 1
+
+    def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Any],
+        ttl_s: float,
+        accept: Optional[Callable[[Any], bool]] = None,
+    ) -> Any:
+        """Cached value for key, or loader() run once for all concurrent callers on a miss."""
+        value = self.get(key, accept)
+        if value is not None:
+            return value
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            key_lock[1] += 1
+        try:
+            with key_lock[0]:
+                with self._lock:
+                    value = self._lookup(key, accept)
+                    if value is not None:
+                        self._counters["coalesced"] += 1
+                        return value
+                    self._counters["loads"] += 1
+                value = loader()
+                self.set(key, value, ttl_s)
+            return value
+        finally:
+            # The last caller out drops the lock, so no one can be left waiting on a removed one
+            with self._lock:
+                key_lock[1] -= 1
+                if key_lock[1] == 0:
+                    del self._key_locks[key]
+
+    async def aget_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl_s: float,
+        accept: Optional[Callable[[Any], bool]] = None,
+    ) -> Any:
+        """Async get_or_load: waiters on the same event loop await the first caller's load."""
+        value = self.get(key, accept)
+        if value is not None:
+            return value
+        loop = asyncio.get_running_loop()
+        flight = (id(loop), key)
+        fut = self._inflight.get(flight)
+        while fut is not None:
+            with self._lock:
+                self._counters["coalesced"] += 1
+            try:
+                value = await asyncio.shield(fut)
+            except asyncio.CancelledError:
+                if not fut.cancelled():
+                    raise
+                # The loading task was cancelled, not this one: join the next load or run our own
+                fut = self._inflight.get(flight)
+                continue
+            if accept is None or accept(value):
+                return value
+            break
+        fut = loop.create_future()
+        self._inflight[flight] = fut
+        with self._lock:
+            self._counters["loads"] += 1
+        try:
+            value = await loader()
+        except asyncio.CancelledError:
+            fut.cancel()
+            raise
+        except Exception as e:
+            fut.set_exception(e)
+            # Waiters see the error; mark it retrieved so an unawaited future does not warn
+            fut.exception()
+            raise
+        else:
+            self.set(key, value, ttl_s)
+            fut.set_result(value)
+            return value
+        finally:
+            if self._inflight.get(flight) is fut:
+                del self._inflight[flight]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = dict(self._counters)
+            out.update(entries=len(self._data), bytes=self._bytes, maxEntries=self.max_entries, maxBytes=self.max_bytes)
+        lookups = out["hits"] + out["misses"]
+        # Coalesced misses were served by another caller's load, so they count as hits here
+        out["hitRate"] = round((out["hits"] + out["coalesced"]) / lookups, 3) if lookups else None
+        return out
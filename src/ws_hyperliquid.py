@@ -112,6 +112,77 @@ class SharedSession:
                 time.sleep(0.05)
         return out
 
+    async def acollect(self, subscription: Dict[str, Any], max_messages: int, timeout_s: float) -> List[Dict[str, Any]]:
+        """collect() for callers on another event loop: awaits instead of blocking their thread."""
+        key = self._key(subscription)
+        fut = asyncio.run_coroutine_threadsafe(self._subscribe(subscription), self.loop)
+        try:
+            await asyncio.wait_for(asyncio.wrap_future(fut), timeout=5.0)
+        except Exception:
+            pass
+        out: List[Dict[str, Any]] = []
+        deadline = time.time() + timeout_s
+        while len(out) < max_messages and time.time() < deadline:
+            q = self.sub_queues[key]
+            try:
+                item = q.popleft()
+                out.append(item)
+            except Exception:
+                await asyncio.sleep(0.05)
+        return out
+
+    async def _subscribe_many(self, subscriptions: List[Dict[str, Any]]) -> None:
+        for sub in subscriptions:
+            await self._subscribe(sub)
+
+    def _drain(self, keys: List[str], outs: List[List[Dict[str, Any]]], max_messages: int) -> Tuple[bool, bool]:
+        """Move queued messages into outs; returns (any still short of max_messages, any moved)."""
+        pending = False
+        moved = False
+        for key, out in zip(keys, outs):
+            q = self.sub_queues[key]
+            while q and len(out) < max_messages:
+                out.append(q.popleft())
+                moved = True
+            if len(out) < max_messages:
+                pending = True
+        return pending, moved
+
+    def collect_many(self, subscriptions: List[Dict[str, Any]], max_messages: int, timeout_s: float) -> List[List[Dict[str, Any]]]:
+        """collect() for several subscriptions at once: one shared deadline instead of one per subscription."""
+        keys = [self._key(sub) for sub in subscriptions]
+        fut = asyncio.run_coroutine_threadsafe(self._subscribe_many(subscriptions), self.loop)
+        try:
+            fut.result(timeout=5.0)
+        except Exception:
+            pass
+        outs: List[List[Dict[str, Any]]] = [[] for _ in keys]
+        deadline = time.time() + timeout_s
+        while time.time() < deadline:
+            pending, moved = self._drain(keys, outs, max_messages)
+            if not pending:
+                break
+            if not moved:
+                time.sleep(0.05)
+        return outs
+
+    async def acollect_many(self, subscriptions: List[Dict[str, Any]], max_messages: int, timeout_s: float) -> List[List[Dict[str, Any]]]:
+        keys = [self._key(sub) for sub in subscriptions]
+        fut = asyncio.run_coroutine_threadsafe(self._subscribe_many(subscriptions), self.loop)
+        try:
+            await asyncio.wait_for(asyncio.wrap_future(fut), timeout=5.0)
+        except Exception:
+            pass
+        outs: List[List[Dict[str, Any]]] = [[] for _ in keys]
+        deadline = time.time() + timeout_s
+        while time.time() < deadline:
+            pending, moved = self._drain(keys, outs, max_messages)
+            if not pending:
+                break
+            if not moved:
+                await asyncio.sleep(0.05)
+        return outs
+
 
 _SESSIONS: Dict[str, SharedSession] = {}
 
@@ -122,6 +193,32 @@ def _get_shared_session(network: str) -> SharedSession:
     return _SESSIONS[network]
 
 
+async def _collect_single_use(
+    subscription: Dict[str, Any],
+    network: str,
+    max_messages: int,
+    timeout_s: float,
+) -> List[Dict[str, Any]]:
+    url = _select_ws_base(network)
+    msgs: List[Dict[str, Any]] = []
+    async with websockets.connect(url, ping_interval=20, ping_timeout=20) as ws:
+        sub = {"method": "subscribe", "subscription": subscription}
+        await ws.send(json.dumps(sub))
+        while len(msgs) < max_messages:
+            try:
+                raw = await asyncio.wait_for(ws.recv(), timeout=timeout_s)
+            except asyncio.TimeoutError:
+                break
+            try:
+                data = json.loads(raw)
+            except Exception:
+                continue
+            if not isinstance(data, dict):
+                continue
+            msgs.append(data)
+    return msgs
+
+
 def collect_subscription(
     subscription: Dict[str, Any],
     network: str = "mainnet",
@@ -134,61 +231,116 @@ def collect_subscription(
         return sess.collect(subscription, max_messages=max_messages, timeout_s=timeout_s)
     # Fallback single-use connection
     loop = asyncio.new_event_loop()
-    async def _temp():
-        url = _select_ws_base(network)
-        msgs: List[Dict[str, Any]] = []
-        async with websockets.connect(url, ping_interval=20, ping_timeout=20) as ws:
-            sub = {"method": "subscribe", "subscription": subscription}
-            await ws.send(json.dumps(sub))
-            while len(msgs) < max_messages:
-                try:
-                    raw = await asyncio.wait_for(ws.recv(), timeout=timeout_s)
-                except asyncio.TimeoutError:
-                    break
-                try:
-                    data = json.loads(raw)
-                except Exception:
-                    continue
-                if not isinstance(data, dict):
-                    continue
-                msgs.append(data)
-        return msgs
     try:
-        return loop.run_until_complete(_temp())
+        return loop.run_until_complete(_collect_single_use(subscription, network, max_messages, timeout_s))
     finally:
         loop.close()
 
 
-def fetch_orderbook_snapshot(coin: str, network: str = "mainnet", depth: int = 50, timeout_s: float = 3.0) -> Dict[str, Any]:
-    # Allow env-configurable timeout and message budget
-    timeout_s = float(os.getenv("HYPERLIQUID_WS_TIMEOUT", str(timeout_s)))
-    max_msgs = int(os.getenv("HYPERLIQUID_WS_OB_MSGS", "5"))
-    # Try multiple channel variants for robustness
-    variants = [
-        {"type": "l2Book", "coin": coin},
-        {"type": "book", "coin": coin},
-        {"type": "l2book", "coin": coin},
-    ]
-    ob = {}
-    msgs: List[Dict[str, Any]] = []
-    for sub in variants:
+async def acollect_subscription(
+    subscription: Dict[str, Any],
+    network: str = "mainnet",
+    max_messages: int = 3,
+    timeout_s: float = 3.0,
+) -> List[Dict[str, Any]]:
+    use_shared = os.getenv("HYPERLIQUID_WS_SHARED", "1") != "0"
+    if use_shared:
+        sess = _get_shared_session(network)
+        return await sess.acollect(subscription, max_messages=max_messages, timeout_s=timeout_s)
+    return await _collect_single_use(subscription, network, max_messages, timeout_s)
+
+
+async def _collect_single_use_many(
+    subscriptions: List[Dict[str, Any]],
+    network: str,
+    max_messages: int,
+    timeout_s: float,
+) -> List[List[Dict[str, Any]]]:
+    results = await asyncio.gather(
+        *(_collect_single_use(sub, network, max_messages, timeout_s) for sub in subscriptions),
+        return_exceptions=True,
+    )
+    return [r if isinstance(r, list) else [] for r in results]
+
+
+def collect_subscriptions(
+    subscriptions: List[Dict[str, Any]],
+    network: str = "mainnet",
+    max_messages: int = 3,
+    timeout_s: float = 3.0,
+) -> List[List[Dict[str, Any]]]:
+    """Collect several subscriptions concurrently; one message list per subscription, in order."""
+    if not subscriptions:
+        return []
+    use_shared = os.getenv("HYPERLIQUID_WS_SHARED", "1") != "0"
+    if use_shared:
+        sess = _get_shared_session(network)
+        return sess.collect_many(subscriptions, max_messages=max_messages, timeout_s=timeout_s)
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(_collect_single_use_many(subscriptions, network, max_messages, timeout_s))
+    finally:
+        loop.close()
+
+
+async def acollect_subscriptions(
+    subscriptions: List[Dict[str, Any]],
+    network: str = "mainnet",
+    max_messages: int = 3,
+    timeout_s: float = 3.0,
+) -> List[List[Dict[str, Any]]]:
+    if not subscriptions:
+        return []
+    use_shared = os.getenv("HYPERLIQUID_WS_SHARED", "1") != "0"
+    if use_shared:
+        sess = _get_shared_session(network)
+        return await sess.acollect_many(subscriptions, max_messages=max_messages, timeout_s=timeout_s)
+    return await _collect_single_use_many(subscriptions, network, max_messages, timeout_s)
+
+
+def _for_coin(msgs: List[Dict[str, Any]], coin: str, channels: Tuple[str, ...]) -> List[Dict[str, Any]]:
+    """Drop other channels' messages and other coins' rows: the shared session copies
+    string-channel messages into every queue.
+
+    Book messages carry data.coin; trade messages carry a list of rows with their own coin.
+    Messages without a channel or coin are kept.
+    """
+    out: List[Dict[str, Any]] = []
+    for m in msgs or []:
+        if not isinstance(m, dict):
+            continue
+        channel = m.get("channel")
+        if isinstance(channel, str) and channel not in channels:
+            continue
+        data = m.get("data")
+        if isinstance(data, list):
+            rows = [r for r in data if not isinstance(r, dict) or r.get("coin") in (None, coin)]
+            if rows:
+                out.append(dict(m, data=rows) if len(rows) != len(data) else m)
+        elif isinstance(data, dict) and data.get("coin") not in (None, coin):
+            continue
+        else:
+            out.append(m)
+    return out
+
+
+# Try multiple channel variants for robustness
+_BOOK_VARIANTS = ("l2Book", "book", "l2book")
+
+
+def _pick_book_message(msgs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    # Pick the most recent message that looks like a book update
+    for m in reversed(msgs or []):
         try:
-            msgs = collect_subscription(sub, network=network, max_messages=max_msgs, timeout_s=timeout_s)
-            # Pick the most recent message that looks like a book update
-            for m in reversed(msgs or []):
-                try:
-                    candidate = m.get("data") if isinstance(m, dict) else None
-                    if isinstance(candidate, dict) and isinstance(candidate.get("bids"), list) and isinstance(candidate.get("asks"), list):
-                        ob = m
-                        break
-                except Exception:
-                    continue
-            if ob:
-                break
+            candidate = m.get("data") if isinstance(m, dict) else None
+            if isinstance(candidate, dict) and isinstance(candidate.get("bids"), list) and isinstance(candidate.get("asks"), list):
+                return m
         except Exception:
             continue
-    if not ob and msgs:
-        ob = msgs[-1]
+    return {}
+
+
+def _parse_orderbook(ob: Dict[str, Any], depth: int) -> Dict[str, Any]:
     # Normalize a few common shapes
     bids: List[Tuple[float, float]] = []
     asks: List[Tuple[float, float]] = []
@@ -212,11 +364,143 @@ def fetch_orderbook_snapshot(coin: str, network: str = "mainnet", depth: int = 5
     return {"bids": bids, "asks": asks}
 
 
+def fetch_orderbook_snapshot(coin: str, network: str = "mainnet", depth: int = 50, timeout_s: float = 3.0) -> Dict[str, Any]:
+    # Allow env-configurable timeout and message budget
+    timeout_s = float(os.getenv("HYPERLIQUID_WS_TIMEOUT", str(timeout_s)))
+    max_msgs = int(os.getenv("HYPERLIQUID_WS_OB_MSGS", "5"))
+    ob: Dict[str, Any] = {}
+    msgs: List[Dict[str, Any]] = []
+    for kind in _BOOK_VARIANTS:
+        try:
+            msgs = _for_coin(collect_subscription({"type": kind, "coin": coin}, network=network, max_messages=max_msgs, timeout_s=timeout_s), coin, _BOOK_VARIANTS)
+            ob = _pick_book_message(msgs)
+            if ob:
+                break
+        except Exception:
+            continue
+    if not ob and msgs:
+        ob = msgs[-1]
+    return _parse_orderbook(ob, depth)
+
+
+async def afetch_orderbook_snapshot(coin: str, network: str = "mainnet", depth: int = 50, timeout_s: float = 3.0) -> Dict[str, Any]:
+    timeout_s = float(os.getenv("HYPERLIQUID_WS_TIMEOUT", str(timeout_s)))
+    max_msgs = int(os.getenv("HYPERLIQUID_WS_OB_MSGS", "5"))
+    ob: Dict[str, Any] = {}
+    msgs: List[Dict[str, Any]] = []
+    for kind in _BOOK_VARIANTS:
+        try:
+            msgs = _for_coin(await acollect_subscription({"type": kind, "coin": coin}, network=network, max_messages=max_msgs, timeout_s=timeout_s), coin, _BOOK_VARIANTS)
+            ob = _pick_book_message(msgs)
+            if ob:
+                break
+        except Exception:
+            continue
+    if not ob and msgs:
+        ob = msgs[-1]
+    return _parse_orderbook(ob, depth)
+
+
+def _books_from_batches(coins: List[str], found: Dict[str, Dict[str, Any]], last: Dict[str, List[Dict[str, Any]]], depth: int) -> Dict[str, Dict[str, Any]]:
+    out: Dict[str, Dict[str, Any]] = {}
+    for coin in coins:
+        ob = found.get(coin) or (last.get(coin) or [{}])[-1]
+        out[coin] = _parse_orderbook(ob, depth)
+    return out
+
+
+def fetch_orderbook_snapshots(coins: List[str], network: str = "mainnet", depth: int = 50, timeout_s: float = 3.0) -> Dict[str, Dict[str, Any]]:
+    """fetch_orderbook_snapshot for many coins, subscribed and collected concurrently."""
+    timeout_s = float(os.getenv("HYPERLIQUID_WS_TIMEOUT", str(timeout_s)))
+    max_msgs = int(os.getenv("HYPERLIQUID_WS_OB_MSGS", "5"))
+    found: Dict[str, Dict[str, Any]] = {}
+    last: Dict[str, List[Dict[str, Any]]] = {}
+    remaining = list(coins)
+    for kind in _BOOK_VARIANTS:
+        if not remaining:
+            break
+        try:
+            batches = collect_subscriptions([{"type": kind, "coin": c} for c in remaining], network=network, max_messages=max_msgs, timeout_s=timeout_s)
+        except Exception:
+            continue
+        for coin, msgs in zip(remaining, batches):
+            msgs = _for_coin(msgs, coin, _BOOK_VARIANTS)
+            last[coin] = msgs or last.get(coin, [])
+            ob = _pick_book_message(msgs)
+            if ob:
+                found[coin] = ob
+        remaining = [c for c in remaining if c not in found]
+    return _books_from_batches(coins, found, last, depth)
+
+
+async def afetch_orderbook_snapshots(coins: List[str], network: str = "mainnet", depth: int = 50, timeout_s: float = 3.0) -> Dict[str, Dict[str, Any]]:
+    timeout_s = float(os.getenv("HYPERLIQUID_WS_TIMEOUT", str(timeout_s)))
+    max_msgs = int(os.getenv("HYPERLIQUID_WS_OB_MSGS", "5"))
+    found: Dict[str, Dict[str, Any]] = {}
+    last: Dict[str, List[Dict[str, Any]]] = {}
+    remaining = list(coins)
+    for kind in _BOOK_VARIANTS:
+        if not remaining:
+            break
+        try:
+            batches = await acollect_subscriptions([{"type": kind, "coin": c} for c in remaining], network=network, max_messages=max_msgs, timeout_s=timeout_s)
+        except Exception:
+            continue
+        for coin, msgs in zip(remaining, batches):
+            msgs = _for_coin(msgs, coin, _BOOK_VARIANTS)
+            last[coin] = msgs or last.get(coin, [])
+            ob = _pick_book_message(msgs)
+            if ob:
+                found[coin] = ob
+        remaining = [c for c in remaining if c not in found]
+    return _books_from_batches(coins, found, last, depth)
+
+
 def fetch_recent_trades(coin: str, network: str = "mainnet", max_messages: int = 5, timeout_s: float = 3.0) -> List[Dict[str, Any]]:
     timeout_s = float(os.getenv("HYPERLIQUID_WS_TIMEOUT", str(timeout_s)))
-    return collect_subscription({"type": "trades", "coin": coin}, network=network, max_messages=max_messages, timeout_s=timeout_s)
+    return _for_coin(collect_subscription({"type": "trades", "coin": coin}, network=network, max_messages=max_messages, timeout_s=timeout_s), coin, ("trades",))
+
+
+async def afetch_recent_trades(coin: str, network: str = "mainnet", max_messages: int = 5, timeout_s: float = 3.0) -> List[Dict[str, Any]]:
+    timeout_s = float(os.getenv("HYPERLIQUID_WS_TIMEOUT", str(timeout_s)))
+    return _for_coin(await acollect_subscription({"type": "trades", "coin": coin}, network=network, max_messages=max_messages, timeout_s=timeout_s), coin, ("trades",))
+
+
+def fetch_recent_trades_many(coins: List[str], network: str = "mainnet", max_messages: int = 5, timeout_s: float = 3.0) -> Dict[str, List[Dict[str, Any]]]:
+    timeout_s = float(os.getenv("HYPERLIQUID_WS_TIMEOUT", str(timeout_s)))
+    batches = collect_subscriptions([{"type": "trades", "coin": c} for c in coins], network=network, max_messages=max_messages, timeout_s=timeout_s)
+    return {c: _for_coin(msgs, c, ("trades",)) for c, msgs in zip(coins, batches)}
+
+
+async def afetch_recent_trades_many(coins: List[str], network: str = "mainnet", max_messages: int = 5, timeout_s: float = 3.0) -> Dict[str, List[Dict[str, Any]]]:
+    timeout_s = float(os.getenv("HYPERLIQUID_WS_TIMEOUT", str(timeout_s)))
+    batches = await acollect_subscriptions([{"type": "trades", "coin": c} for c in coins], network=network, max_messages=max_messages, timeout_s=timeout_s)
+    return {c: _for_coin(msgs, c, ("trades",)) for c, msgs in zip(coins, batches)}
+
+
+
+def _parse_candles(msgs: List[Dict[str, Any]], coin: str, interval: str) -> List[Dict[str, Any]]:
+    # Candle messages are broadcast to every queue (channel is a string), so filter on symbol/interval
+    out: List[Dict[str, Any]] = []
+    for m in msgs:
+        if not isinstance(m, dict) or m.get("channel") != "candle":
+            continue
+        data = m.get("data")
+        for c in data if isinstance(data, list) else [data]:
+            if isinstance(c, dict) and c.get("s") == coin and c.get("i") == interval:
+                out.append(c)
+    return out
+
+
+def fetch_candle_updates(coin: str, interval: str, network: str = "mainnet", timeout_s: float = 0.5) -> List[Dict[str, Any]]:
+    """Candle updates (t, T, o, h, l, c, v, n, ...) received on the WS candle channel within timeout_s, oldest first."""
+    msgs = collect_subscription({"type": "candle", "coin": coin, "interval": interval}, network=network, max_messages=200, timeout_s=timeout_s)
+    return _parse_candles(msgs, coin, interval)
 
 
+async def afetch_candle_updates(coin: str, interval: str, network: str = "mainnet", timeout_s: float = 0.5) -> List[Dict[str, Any]]:
+    msgs = await acollect_subscription({"type": "candle", "coin": coin, "interval": interval}, network=network, max_messages=200, timeout_s=timeout_s)
+    return _parse_candles(msgs, coin, interval)
 
 if __name__ == "__main__":
     import argparse
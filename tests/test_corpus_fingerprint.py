@@ -0,0 +1,8 @@
+from chunk_store import corpus_fingerprint
+
+
+def test_list_fingerprint_changes_on_same_length_edit():
+    chunks = [{"id": "a", "text": "funding is paid hourly"}, {"id": "b", "text": "oi caps"}]
+    edited = [dict(chunks[0], text="funding is paid every 8h"), chunks[1]]
+    assert corpus_fingerprint(chunks) == corpus_fingerprint([dict(c) for c in chunks])
+    assert corpus_fingerprint(chunks) != corpus_fingerprint(edited)
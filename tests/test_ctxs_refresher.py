@@ -0,0 +1,27 @@
+import pytest
+
+pytest.importorskip("mcp")
+
+import mcp_hyperliquid as hl  # noqa: E402
+
+
+def _refresher_with_age(age_ms: int) -> "hl._CtxsRefresher":
+    ref = hl._CtxsRefresher("mainnet")
+    ref.snapshot = {"universe": {}, "ctxs": [], "registry": None, "ts": hl._now_ms() - age_ms}
+    return ref
+
+
+def test_healthy_refresher_is_not_stale_between_refreshes(monkeypatch):
+    for name in ("HYPERLIQUID_CTXS_REFRESH_S", "HYPERLIQUID_CTXS_TTL"):
+        monkeypatch.delenv(name, raising=False)
+    # Just before the next default 10s refresh lands
+    assert _refresher_with_age(9_500)._view()["stale"] is False
+    # A missed cycle is flagged
+    assert _refresher_with_age(25_000)._view()["stale"] is True
+
+
+def test_refresh_error_is_stale(monkeypatch):
+    monkeypatch.delenv("HYPERLIQUID_CTXS_REFRESH_S", raising=False)
+    ref = _refresher_with_age(0)
+    ref.last_error = "boom"
+    assert ref._view()["stale"] is True
@@ -0,0 +1,40 @@
+import os
+
+import pytest
+
+from funding_store import HOUR_MS, store_from_env
+
+
+@pytest.fixture
+def funding_db(tmp_path, monkeypatch):
+    path = tmp_path / "funding.sqlite"
+    monkeypatch.setenv("HYPERLIQUID_FUNDING_DB", str(path))
+    monkeypatch.delenv("HYPERLIQUID_FUNDING_STORE", raising=False)
+    return path
+
+
+def test_synced_window_needs_no_fetch(funding_db):
+    store = store_from_env()
+    now = 10 * HOUR_MS + 30 * 60_000
+    start, end = 0, now
+    assert store.missing("mainnet", "BTC", start, end, now) == [(start, end)]
+    rows = [{"time": h * HOUR_MS + 5, "fundingRate": "0.0001", "premium": "0"} for h in range(10)]
+    store.record("mainnet", "BTC", rows, start, end, now)
+    assert store.missing("mainnet", "BTC", start, end, now) == []
+    agg = store.aggregate("mainnet", "BTC", start, end)
+    assert agg["points"] == 10
+    assert agg["annualized"] == pytest.approx(0.0001 * 24 * 365)
+
+
+def test_store_is_opened_on_first_use(funding_db, monkeypatch):
+    pytest.importorskip("mcp")
+    import mcp_hyperliquid as hl
+
+    assert not os.path.exists(funding_db)
+    # Restored after the test, so the temporary store does not leak into other tests
+    monkeypatch.setattr(hl, "_FUNDING_STORE", None)
+    monkeypatch.setattr(hl, "_FUNDING_STORE_OPENED", False)
+    assert hl.get_metrics()["fundingStore"] is None
+    assert not os.path.exists(funding_db)
+    assert hl._funding_store() is not None
+    assert os.path.exists(funding_db)
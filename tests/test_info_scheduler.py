@@ -0,0 +1,29 @@
+import asyncio
+import time
+
+from info_scheduler import WeightScheduler
+
+
+def test_cancelled_aacquire_releases_its_ticket():
+    sched = WeightScheduler(budget_per_min=60.0, capacity=1.0, max_wait_s=5.0)
+
+    async def cancel_queued() -> None:
+        sched.acquire(1.0)  # drain the bucket so the next caller queues
+        task = asyncio.ensure_future(sched.aacquire(1.0))
+        await asyncio.sleep(0.1)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    asyncio.run(cancel_queued())
+    stats = sched.stats()
+    assert stats["queueDepth"] == 0
+    assert stats["priorities"]["interactive"]["timeouts"] == 0
+
+    # Once the bucket has refilled, a fresh caller is granted straight away
+    time.sleep(1.1)
+    t0 = time.monotonic()
+    sched.acquire(1.0)
+    assert time.monotonic() - t0 < 0.1